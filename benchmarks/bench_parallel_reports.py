@@ -0,0 +1,100 @@
+"""
+Benchmark of counting tasks.txt across a pool of worker processes.
+
+Writes a task file of the given size to a temporary directory, with a
+journal of changes which have not been folded into it yet, and times
+`count_task_file` with 1 up to the given number of worker processes,
+checking that every run produces the same counters. The speed-up over
+a single process is shown for each number of workers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parallel_reports --tasks 1000000 --workers 8
+"""
+
+# =====Importing Libraries=====
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from task_engine import count_task_file  # noqa: E402
+from task_storage import Task, TextBackend, write_text_tasks  # noqa: E402
+
+
+def counters(counts):
+    """
+    The function `counters` turns the result of `count_task_file` into
+    plain tuples which can be compared.
+    """
+
+    totals, user_counts = counts
+    return ((totals.total, totals.completed, totals.overdue),
+            {username: (user.total, user.completed, user.overdue)
+             for username, user in user_counts.items()})
+
+
+def main():
+    """
+    The function `main` runs the benchmark in a temporary directory.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="largest number of worker processes timed")
+    parser.add_argument("--changes", type=int, default=500,
+                        help="changes left in the journal")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    first_due = datetime(2026, 1, 1)
+    assigned_date = datetime(2025, 12, 1)
+    now = first_due + timedelta(days=365, hours=9)
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = TextBackend(os.path.join(directory, "tasks.txt"),
+                              os.path.join(directory, "tasks_journal.txt"),
+                              os.path.join(directory, "user.txt"))
+        write_text_tasks(backend.task_path, (
+            Task(f"user{rng.randrange(args.users)}", f"Task {number}",
+                 "Parallel report benchmark",
+                 first_due + timedelta(days=rng.randrange(730)),
+                 assigned_date, rng.random() < 0.4)
+            for number in range(args.tasks)), args.tasks)
+
+        # Leave some changes in the journal, as a running system would
+        tasks = backend.load_tasks()[0]
+        for _ in range(args.changes):
+            task_id = rng.randrange(len(tasks))
+            tasks[task_id].due_date = first_due + timedelta(days=730)
+            backend.update_task(task_id, tasks[task_id], ("due_date",))
+        size = os.path.getsize(backend.task_path)
+        print(f"{args.tasks:,} tasks ({size / 2 ** 20:,.1f} MiB) and "
+              f"{args.changes:,} journal records, {os.cpu_count()} CPUs")
+
+        expected = None
+        single_seconds = None
+        for workers in range(1, args.workers + 1):
+            start = time.perf_counter()
+            counts = counters(count_task_file(backend, now, workers))
+            seconds = time.perf_counter() - start
+            if expected is None:
+                expected, single_seconds = counts, seconds
+            elif counts != expected:
+                raise RuntimeError(f"Counters differ with {workers} workers")
+            print(f"{workers:>3} workers  {seconds:8.3f}s  "
+                  f"{args.tasks / seconds:>12,.0f} tasks/s  "
+                  f"speed-up {single_seconds / seconds:5.2f}x")
+        backend.lock.close()
+
+
+if __name__ == "__main__":
+    main()
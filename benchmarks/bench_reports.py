@@ -0,0 +1,111 @@
+"""
+Benchmark of report generation.
+
+Creates users and tasks in a temporary directory and times generating
+both overview reports: from scratch, again through a `ReportCache` with
+nothing changed, after a few tasks have changed, and on the next day,
+when only the users with tasks falling due that day need their sections
+worked out again. The number of sections rebuilt each time is shown.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_reports --users 10000 --tasks 300000
+"""
+
+# =====Importing Libraries=====
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from task_engine import (PasswordHasher, ReportCache,  # noqa: E402
+                         TaskStore, UserStore, gen_reports)
+from task_storage import TextBackend  # noqa: E402
+
+
+def timed(label, function, cache=None):
+    """
+    The function `timed` runs a function once and prints the time taken,
+    with the number of sections rebuilt if a cache is given.
+    """
+
+    start = time.perf_counter()
+    function()
+    line = f"{label:<28} {(time.perf_counter() - start) * 1000:9.2f} ms"
+    if cache is not None:
+        line += f"   {cache.sections_built:,} sections rebuilt"
+    print(line)
+
+
+def main():
+    """
+    The function `main` runs the benchmark in a temporary directory.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--tasks", type=int, default=300000)
+    parser.add_argument("--changes", type=int, default=10,
+                        help="tasks changed between reports")
+    args = parser.parse_args()
+
+    # The reports are written to the current directory
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        backend = TextBackend()
+        user_store = UserStore(backend,
+                               PasswordHasher.from_spec("pbkdf2:iterations=1"))
+        user_store.load()
+        backend.save_users({f"user{number}": "password"
+                            for number in range(args.users)})
+        user_store.load()
+        usernames = sorted(user_store)
+
+        task_store = TaskStore(backend, users=user_store)
+        task_store.load()
+        rng = random.Random(0)
+        first_due = datetime(2026, 1, 1)
+        task_store.add_many(
+            {"username": rng.choice(usernames), "title": f"Task {number}",
+             "description": "Report benchmark",
+             "due_date": first_due + timedelta(days=rng.randrange(730)),
+             "completed": rng.random() < 0.4}
+            for number in range(args.tasks))
+
+        now = first_due + timedelta(days=365, hours=9)
+        cache = ReportCache()
+        timed("From scratch", lambda: gen_reports(task_store, user_store,
+                                                  now=now))
+        timed("Cached, first run",
+              lambda: gen_reports(task_store, user_store, now=now,
+                                  cache=cache), cache)
+        timed("Cached, nothing changed",
+              lambda: gen_reports(task_store, user_store, now=now,
+                                  cache=cache), cache)
+
+        # Change the due dates of a few tasks
+        for _ in range(args.changes):
+            task_store.set_due_date(rng.randrange(args.tasks),
+                                    first_due + timedelta(days=730))
+        timed(f"Cached, {args.changes} tasks changed",
+              lambda: gen_reports(task_store, user_store, now=now,
+                                  cache=cache), cache)
+
+        now += timedelta(days=1)
+        timed("Cached, next day",
+              lambda: gen_reports(task_store, user_store, now=now,
+                                  cache=cache), cache)
+        print(f"Writes skipped: {cache.writes_skipped}")
+        task_store.close()
+        os.chdir(working_directory)
+
+
+if __name__ == "__main__":
+    main()
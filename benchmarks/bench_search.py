@@ -0,0 +1,109 @@
+"""
+Benchmark of full-text search over task titles and descriptions.
+
+Writes a synthetic task file to a temporary directory, with titles and
+descriptions drawn from a vocabulary in which a few words are common
+and most are rare, loads it, and times building the text index (done by
+the first search) and a set of queries: common and rare words, several
+words together, alternatives, prefixes and queries combined with user
+and completion filters. A scan of every task for the same query is
+timed for comparison.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search --tasks 1000000
+"""
+
+# =====Importing Libraries=====
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from task_engine import TaskStore, TextIndex  # noqa: E402
+from task_storage import Task, TextBackend, write_text_tasks  # noqa: E402
+
+QUERIES = [
+    ("Common word", "word0", {}),
+    ("Rare word", "word4000", {}),
+    ("Two words", "word1 word2", {}),
+    ("Alternatives", "word10 OR word4000", {}),
+    ("Prefix", "word12*", {}),
+    ("Common word, one user", "word0", {"username": "user7"}),
+    ("Two words, uncompleted", "word1 word2", {"completed": False}),
+]
+
+
+def main():
+    """
+    The function `main` runs the benchmark in a temporary directory.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="times each query is run")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = [f"word{number}" for number in range(args.vocabulary)]
+    cum_weights = list(accumulate(1 / (rank + 1)
+                                  for rank in range(args.vocabulary)))
+    due_date = datetime(2026, 1, 1)
+
+    def text(count):
+        return " ".join(rng.choices(words, cum_weights=cum_weights,
+                                    k=count))
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = TextBackend(os.path.join(directory, "tasks.txt"),
+                              os.path.join(directory, "tasks_journal.txt"),
+                              os.path.join(directory, "user.txt"))
+        write_text_tasks(backend.task_path, (
+            Task(f"user{rng.randrange(args.users)}", text(4), text(12),
+                 due_date + timedelta(days=rng.randrange(365)), due_date,
+                 rng.random() < 0.4)
+            for _ in range(args.tasks)), args.tasks)
+
+        task_store = TaskStore(backend)
+        task_store.load()
+        print(f"Loaded {len(task_store):,} tasks in "
+              f"{task_store.load_stats.seconds:.2f}s")
+
+        start = time.perf_counter()
+        task_store.search("word0")
+        num_words = len(task_store.text_index.postings)
+        print(f"Built the text index of {num_words:,} words in "
+              f"{time.perf_counter() - start:.2f}s")
+
+        for label, query, filters in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                total, _ = task_store.search(query, limit=10, **filters)
+                timings.append(time.perf_counter() - start)
+            print(f"{label:<26} {total:>9,} tasks   "
+                  f"{statistics.median(timings) * 1000:9.2f} ms")
+
+        # The same query answered by reading every task
+        start = time.perf_counter()
+        total = sum(1 for task in task_store.tasks
+                    if {"word1", "word2"} <= set(TextIndex.words(
+                        task.title + " " + task.description)))
+        print(f"{'Two words, scanning':<26} {total:>9,} tasks   "
+              f"{(time.perf_counter() - start) * 1000:9.2f} ms")
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark of user registration and login.
+
+Registers a number of users through `UserStore.add`, which hashes each
+password and appends it to user.txt, then times logins for a sample of
+them, both the first check of each password and repeated checks which
+take the cached path. Hashing 100,000 passwords at the default cost
+takes a long time, so the registration run uses its own, by default
+cheap, cost parameters and the cost of a single hash at the chosen
+login parameters is timed separately.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_users --users 100000
+"""
+
+# =====Importing Libraries=====
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from task_engine import PasswordHasher, UserStore  # noqa: E402
+from task_storage import SqliteBackend, TextBackend  # noqa: E402
+
+
+def percentile(values, fraction):
+    """
+    The function `percentile` returns the value below which the given
+    fraction of the sorted values fall.
+    """
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def time_logins(user_store, usernames, password):
+    """
+    The function `time_logins` checks the password of each user and
+    returns the time taken by each check in seconds.
+    """
+
+    timings = []
+    for username in usernames:
+        start = time.perf_counter()
+        if not user_store.check_password(username, password):
+            raise RuntimeError(f"Login failed for {username}")
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings):
+    """
+    The function `report` prints the median and 99th percentile of a
+    list of timings in milliseconds.
+    """
+
+    print(f"{label:<32} p50 {statistics.median(timings) * 1000:9.3f} ms"
+          f"   p99 {percentile(timings, 0.99) * 1000:9.3f} ms")
+
+
+def main():
+    """
+    The function `main` runs the benchmark in a temporary directory.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--logins", type=int, default=200,
+                        help="number of users whose logins are timed")
+    parser.add_argument("--storage", choices=["text", "sqlite"],
+                        default="text")
+    parser.add_argument("--register-hash", default="pbkdf2:iterations=1",
+                        help="cost parameters used while registering")
+    parser.add_argument("--password-hash", default="scrypt",
+                        help="cost parameters timed for login")
+    args = parser.parse_args()
+
+    register_hasher = PasswordHasher.from_spec(args.register_hash)
+    login_hasher = PasswordHasher.from_spec(args.password_hash)
+    password = "correct horse battery staple"
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.storage == "sqlite":
+            backend = SqliteBackend(os.path.join(directory, "tasks.db"))
+        else:
+            backend = TextBackend(
+                os.path.join(directory, "tasks.txt"),
+                os.path.join(directory, "tasks_journal.txt"),
+                os.path.join(directory, "user.txt"))
+        user_store = UserStore(backend, register_hasher)
+        user_store.load()
+
+        # Registration throughput
+        start = time.perf_counter()
+        for number in range(args.users):
+            user_store.add(f"user{number}", password)
+        seconds = time.perf_counter() - start
+        print(f"Registered {args.users:,} users with {args.register_hash} "
+              f"in {seconds:.2f}s ({args.users / seconds:,.0f} users/s)")
+
+        # Loading the users back
+        start = time.perf_counter()
+        user_store = UserStore(backend, register_hasher)
+        user_store.load()
+        print(f"Loaded {len(user_store):,} users in "
+              f"{time.perf_counter() - start:.3f}s")
+
+        # First and cached logins for a sample of the users
+        step = max(1, args.users // args.logins)
+        sample = [f"user{number}" for number in range(0, args.users, step)]
+        sample = sample[:args.logins]
+        report(f"Login, {args.register_hash}",
+               time_logins(user_store, sample, password))
+        report("Login, cached", time_logins(user_store, sample, password))
+
+        # Cost of checking a password at the login parameters
+        password_hash = login_hasher.hash(password)
+        timings = []
+        for _ in range(min(args.logins, 20)):
+            start = time.perf_counter()
+            login_hasher.verify(password, password_hash)
+            timings.append(time.perf_counter() - start)
+        report(f"Verify, {args.password_hash}", timings)
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Synthetic data generator for the benchmarks.
+
+Writes tasks.txt and user.txt of a chosen size and shape to a
+directory: the number of users, the average number of tasks per user,
+how unevenly tasks are spread across users (a Zipf exponent, where 0
+gives every user about the same number), the fraction of tasks which
+are completed and the fraction of the uncompleted tasks which are
+overdue. Every user's password is "password", stored as a cheap PBKDF2
+hash so that loading the users does not dominate a benchmark.
+
+Run from the repository root:
+
+    python -m benchmarks.generate data --users 1000 --tasks-per-user 100
+"""
+
+# =====Importing Libraries=====
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from task_engine import PasswordHasher  # noqa: E402
+from task_storage import Task, TextBackend, write_text_tasks  # noqa: E402
+
+# Cost parameters of the generated password hashes, which a benchmark
+# must also use to avoid re-hashing every password on load
+PASSWORD_HASH = "pbkdf2:iterations=1"
+PASSWORD = "password"
+
+WORDS = ("review", "update", "prepare", "send", "check", "fix", "plan",
+         "report", "invoice", "budget", "meeting", "client", "release",
+         "design", "notes", "schedule", "training", "audit", "backup",
+         "website")
+
+
+def generate(directory, users=1000, tasks_per_user=100, skew=1.0,
+             completed_ratio=0.4, overdue_ratio=0.3, seed=0, now=None):
+    """
+    The function `generate` writes tasks.txt and user.txt to a
+    directory, replacing any already there.
+
+    :param directory: The `directory` parameter is where the files are
+    written
+    :type directory: str
+    :param users: The optional `users` parameter is the number of users,
+    including admin
+    :type users: int
+    :param tasks_per_user: The optional `tasks_per_user` parameter is
+    the average number of tasks assigned to each user
+    :type tasks_per_user: int
+    :param skew: The optional `skew` parameter is the Zipf exponent of
+    the number of tasks by user, from 0 for an even spread upwards
+    :type skew: float
+    :param completed_ratio: The optional `completed_ratio` parameter is
+    the fraction of tasks which are completed
+    :type completed_ratio: float
+    :param overdue_ratio: The optional `overdue_ratio` parameter is the
+    fraction of uncompleted tasks which are overdue at `now`
+    :type overdue_ratio: float
+    :param seed: The optional `seed` parameter seeds the random choices
+    :type seed: int
+    :param now: The optional `now` parameter is the time against which
+    tasks are made overdue, defaulting to the current time
+    :type now: datetime
+    :return: The function `generate` returns the number of tasks
+    written.
+    """
+
+    if now is None:
+        now = datetime.today()
+    today = datetime(now.year, now.month, now.day)
+    rng = random.Random(seed)
+
+    usernames = ["admin"] + [f"user{number}" for number in range(1, users)]
+    password_hash = PasswordHasher.from_spec(PASSWORD_HASH).hash(PASSWORD)
+    backend = TextBackend(os.path.join(directory, "tasks.txt"),
+                          os.path.join(directory, "tasks_journal.txt"),
+                          os.path.join(directory, "user.txt"))
+    backend.save_users({username: password_hash for username in usernames})
+
+    cum_weights = list(accumulate(1 / (rank + 1) ** skew
+                                  for rank in range(users)))
+    num_tasks = users * tasks_per_user
+
+    def task(number):
+        if rng.random() < completed_ratio:
+            completed = True
+            due_date = today + timedelta(days=rng.randint(-365, 365))
+        elif rng.random() < overdue_ratio:
+            completed = False
+            due_date = today - timedelta(days=rng.randint(0, 365))
+        else:
+            completed = False
+            due_date = today + timedelta(days=rng.randint(1, 365))
+        return Task(rng.choices(usernames, cum_weights=cum_weights)[0],
+                    f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} "
+                    f"{number}",
+                    " ".join(rng.choices(WORDS, k=rng.randint(3, 12))),
+                    due_date, due_date - timedelta(days=rng.randint(0, 60)),
+                    completed)
+
+    write_text_tasks(backend.task_path,
+                     (task(number) for number in range(num_tasks)),
+                     num_tasks)
+    with open(backend.journal_path, "w", encoding="utf-8"):
+        pass
+    backend.lock.close()
+    return num_tasks
+
+
+def add_arguments(parser):
+    """
+    The function `add_arguments` adds the options of `generate` to an
+    argument parser.
+    """
+
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks-per-user", type=int, default=100)
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="Zipf exponent of tasks by user (0 for even)")
+    parser.add_argument("--completed-ratio", type=float, default=0.4)
+    parser.add_argument("--overdue-ratio", type=float, default=0.3,
+                        help="fraction of uncompleted tasks overdue")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    """
+    The function `main` writes the files to the directory given on the
+    command line.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    num_tasks = generate(args.directory, args.users, args.tasks_per_user,
+                         args.skew, args.completed_ratio, args.overdue_ratio,
+                         args.seed)
+    print(f"Wrote {num_tasks:,} tasks for {args.users:,} users to "
+          f"{args.directory}")
+
+
+if __name__ == "__main__":
+    main()
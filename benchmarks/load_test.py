@@ -0,0 +1,225 @@
+"""
+Load test of the HTTP server.
+
+Creates users and tasks in a temporary directory, starts
+`task_manager.py serve` on it in a separate process, and drives it
+with a local asyncio client holding many keep-alive connections. Each
+connection logs in as one user and sends a mix of reads (listing the
+user's tasks, fetching a task) and changes (adding, completing and
+re-dating tasks) on that user's own tasks. The requests per second and
+the latency of each kind of request are reported, along with how many
+changes the server wrote per batch. The run exits with status 1 if any
+request failed unexpectedly.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --connections 50 --requests 400
+"""
+
+# =====Importing Libraries=====
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from task_engine import PasswordHasher, TaskStore, UserStore  # noqa: E402
+from task_storage import SqliteBackend, TextBackend  # noqa: E402
+
+PASSWORD_HASH = "pbkdf2:iterations=1000"
+
+
+def create_data(directory, storage, num_users, num_tasks):
+    """
+    The function `create_data` registers users and adds tasks in the
+    directory the server will use.
+
+    :return: The function `create_data` returns a dictionary mapping
+    each username to the IDs of the tasks assigned to them.
+    """
+
+    if storage == "sqlite":
+        backend = SqliteBackend(os.path.join(directory, "tasks.db"))
+    else:
+        backend = TextBackend(os.path.join(directory, "tasks.txt"),
+                              os.path.join(directory, "tasks_journal.txt"),
+                              os.path.join(directory, "user.txt"))
+    user_store = UserStore(backend, PasswordHasher.from_spec(PASSWORD_HASH))
+    user_store.load()
+    for number in range(num_users):
+        user_store.add(f"user{number}", "password")
+
+    task_store = TaskStore(backend, users=user_store)
+    task_store.load()
+    rng = random.Random(0)
+    task_ids, _ = task_store.add_many(
+        {"username": f"user{rng.randrange(num_users)}",
+         "title": f"Task {number}", "description": "Load test",
+         "due_date": datetime(2024, 1, 1) +
+         timedelta(days=rng.randrange(365))}
+        for number in range(num_tasks))
+    owned = {f"user{number}": [] for number in range(num_users)}
+    for task_id in task_ids:
+        owned[task_store.get(task_id).username].append(task_id)
+    task_store.close()
+    return owned
+
+
+async def request(reader, writer, method, path, auth, data=None):
+    """
+    The function `request` sends one request on a keep-alive connection
+    and reads the response.
+
+    :return: The function `request` returns the status code and the
+    decoded JSON body.
+    """
+
+    body = json.dumps(data).encode("utf-8") if data is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\n"
+                 "Host: localhost\r\n"
+                 f"Authorization: Basic {auth}\r\n"
+                 f"Content-Length: {len(body)}\r\n"
+                 "\r\n".encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(port, number, num_requests, owned, write_ratio, timings,
+                 failures):
+    """
+    The function `client` sends requests on one connection, recording
+    the time taken by each kind of request. Each connection logs in as
+    one user and only reads and changes that user's tasks, which the
+    server refuses to anyone else.
+    """
+
+    rng = random.Random(number)
+    usernames = sorted(owned)
+    username = usernames[number % len(usernames)]
+    task_ids = owned[username]
+    auth = base64.b64encode(f"{username}:password".encode()).decode()
+    new_task = {"username": username, "title": "New task",
+                "description": "Added by load test", "due_date": "2024-12-31"}
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    for _ in range(num_requests):
+        task_id = rng.choice(task_ids) if task_ids else None
+        if task_id is None:
+            kind, method, path, data = "add", "POST", "/tasks", new_task
+        elif rng.random() >= write_ratio:
+            kind, method, data = rng.choice([
+                ("list", "GET", None), ("get", "GET", None)])
+            path = (f"/tasks?username={username}&limit=10"
+                    if kind == "list" else f"/tasks/{task_id}")
+        else:
+            kind, method, path, data = rng.choice([
+                ("add", "POST", "/tasks", new_task),
+                ("complete", "POST", f"/tasks/{task_id}/complete", None),
+                ("edit", "PATCH", f"/tasks/{task_id}",
+                 {"due_date": f"2024-{rng.randrange(1, 13):02d}-01"}),
+            ])
+
+        start_time = time.perf_counter()
+        status, result = await request(reader, writer, method, path, auth,
+                                       data)
+        timings.setdefault(kind, []).append(time.perf_counter() - start_time)
+        if kind == "add" and status == 201:
+            task_ids.append(result["id"])
+
+        # Editing a task which has been completed is refused; any other
+        # error means the server or the load test is wrong
+        if status >= 400 and not (kind == "edit" and status == 409):
+            failures.append((kind, status))
+
+    writer.close()
+
+
+async def drive(port, args, owned):
+    """
+    The function `drive` runs every client connection at once.
+
+    :return: The function `drive` returns the timings by kind of
+    request, the failed requests and the time taken.
+    """
+
+    timings = {}
+    failures = []
+    start_time = time.perf_counter()
+    await asyncio.gather(*(
+        client(port, number, args.requests, owned, args.write_ratio,
+               timings, failures)
+        for number in range(args.connections)))
+    return timings, failures, time.perf_counter() - start_time
+
+
+def main():
+    """
+    The function `main` sets up the data, starts the server, runs the
+    load and prints the results.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=400,
+                        help="requests per connection")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--write-ratio", type=float, default=0.2,
+                        help="fraction of requests which change tasks")
+    parser.add_argument("--storage", choices=["text", "sqlite"],
+                        default="text")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        owned = create_data(directory, args.storage, args.users,
+                            args.tasks)
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "task_manager.py"),
+             "--storage", args.storage, "--password-hash", PASSWORD_HASH,
+             "serve", "--port", "0"],
+            cwd=directory, stdout=subprocess.PIPE, text=True)
+        try:
+            port = int(server.stdout.readline().rsplit(":", 1)[1])
+            timings, failures, seconds = asyncio.run(drive(port, args,
+                                                           owned))
+        finally:
+            server.send_signal(signal.SIGINT)
+            batches = server.communicate()[0].strip()
+
+    total = sum(len(values) for values in timings.values())
+    print(f"{total:,} requests over {args.connections} connections in "
+          f"{seconds:.2f}s: {total / seconds:,.0f} requests/s")
+    for kind, values in sorted(timings.items()):
+        values.sort()
+        print(f"  {kind:<9} {len(values):>7,}  "
+              f"p50 {statistics.median(values) * 1000:7.2f} ms  "
+              f"p99 {values[int(0.99 * (len(values) - 1))] * 1000:7.2f} ms")
+    print(f"Server: {batches}")
+    if failures:
+        print(f"{len(failures)} requests failed, e.g. {failures[:5]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Multi-process stress test of shared task storage.
+
+Starts several processes working on the same task files at once. Each
+process adds tasks, marks random tasks as complete and reassigns them,
+passing the version it read so that changes made by other processes in
+between are refused and retried. The throughput, the number of
+conflicts and the time spent waiting for the lock are reported for each
+number of processes, and the final files are checked: every task added
+must be present and the counters must match a recount.
+
+Run from the repository root:
+
+    python -m benchmarks.stress_concurrency --processes 1 2 4 8
+"""
+
+# =====Importing Libraries=====
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from task_engine import (ConflictError, PasswordHasher, TaskStore,  # noqa
+                         UserStore)
+from task_storage import BinaryBackend, SqliteBackend, TextBackend  # noqa
+
+USERNAMES = ["admin", "alice", "bob", "carol"]
+
+
+def open_stores(directory, storage):
+    """
+    The function `open_stores` loads the user and task stores kept in a
+    directory.
+    """
+
+    if storage == "sqlite":
+        backend = SqliteBackend(os.path.join(directory, "tasks.db"))
+    else:
+        backend_class = BinaryBackend if storage == "binary" else TextBackend
+        backend = backend_class(
+            os.path.join(directory, "tasks." +
+                         ("bin" if storage == "binary" else "txt")),
+            journal_path=os.path.join(directory, "tasks_journal.txt"),
+            user_path=os.path.join(directory, "user.txt"))
+
+    user_store = UserStore(backend,
+                           PasswordHasher.from_spec("pbkdf2:iterations=1"))
+    user_store.load()
+    task_store = TaskStore(backend, users=user_store)
+    task_store.load()
+    return user_store, task_store
+
+
+def worker(directory, storage, operations, seed, results):
+    """
+    The function `worker` runs one process's share of the operations and
+    puts its counts and timings on the results queue.
+    """
+
+    _, task_store = open_stores(directory, storage)
+    rng = random.Random(seed)
+    added = conflicts = 0
+    start_time = time.perf_counter()
+
+    for _ in range(operations):
+        choice = rng.random()
+        if choice < 0.4 or not len(task_store):
+            task_store.add(rng.choice(USERNAMES), "Stress", "Stress test",
+                           datetime(2024, 1, 1) +
+                           timedelta(days=rng.randrange(365)))
+            added += 1
+            continue
+
+        # Read a task, then change it, retrying if it changed meanwhile
+        task_store.refresh()
+        task_id = rng.randrange(len(task_store))
+        while True:
+            version = task_store.version(task_id)
+            try:
+                if choice < 0.7:
+                    task_store.complete(task_id, version)
+                else:
+                    task_store.reassign(task_id, rng.choice(USERNAMES),
+                                        version)
+                break
+            except ConflictError:
+                conflicts += 1
+
+    task_store.close()
+    lock = task_store.backend.lock
+    results.put((added, conflicts, time.perf_counter() - start_time,
+                 lock.wait_seconds, lock.acquisitions))
+
+
+def check(directory, storage, expected_tasks):
+    """
+    The function `check` reloads the tasks and compares the number of
+    tasks and the counters with a recount.
+    """
+
+    _, task_store = open_stores(directory, storage)
+    if len(task_store) != expected_tasks:
+        raise AssertionError(f"Expected {expected_tasks} tasks, found "
+                             f"{len(task_store)}")
+
+    now = datetime(2024, 7, 1)
+    totals, user_counts = task_store.counts(now)
+    recount = {}
+    for task in task_store.tasks:
+        counts = recount.setdefault(task.username, [0, 0, 0])
+        counts[0] += 1
+        counts[1] += task.completed
+        counts[2] += not task.completed and now > task.due_date
+    for username, counts in recount.items():
+        found = user_counts[username]
+        if [found.total, found.completed, found.overdue] != counts:
+            raise AssertionError(f"Counters for {username} are wrong")
+    if totals.total != expected_tasks:
+        raise AssertionError("Total counter is wrong")
+    task_store.close()
+
+
+def run(storage, processes, operations):
+    """
+    The function `run` starts the given number of processes on a fresh
+    directory and prints a line of results.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        user_store, task_store = open_stores(directory, storage)
+        for username in USERNAMES[1:]:
+            user_store.add(username, "password")
+        task_store.close()
+
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(
+            target=worker,
+            args=(directory, storage, operations, seed, results))
+            for seed in range(processes)]
+        start_time = time.perf_counter()
+        for process in workers:
+            process.start()
+        outcomes = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+        seconds = time.perf_counter() - start_time
+
+        added = sum(outcome[0] for outcome in outcomes)
+        conflicts = sum(outcome[1] for outcome in outcomes)
+        busy = sum(outcome[2] for outcome in outcomes)
+        waiting = sum(outcome[3] for outcome in outcomes)
+        acquisitions = sum(outcome[4] for outcome in outcomes)
+        check(directory, storage, added)
+
+        total = processes * operations
+        print(f"{processes:>9} {total / seconds:>10,.0f} {conflicts:>9} "
+              f"{100 * waiting / busy:>9.1f}% "
+              f"{1e6 * waiting / acquisitions:>11.1f}")
+
+
+def main():
+    """
+    The function `main` runs the stress test for each number of
+    processes given.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=[1, 2, 4, 8])
+    parser.add_argument("--operations", type=int, default=2000,
+                        help="operations per process")
+    parser.add_argument("--storage", choices=["text", "binary", "sqlite"],
+                        default="text")
+    args = parser.parse_args()
+
+    print(f"Storage: {args.storage}, {args.operations} operations per "
+          "process")
+    print("Processes      ops/s Conflicts  Lock wait  Wait/lock us")
+    for processes in args.processes:
+        run(args.storage, processes, args.operations)
+    print("All tasks present and counters match a recount.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Benchmark suite of the task manager's hot paths.
+
+Generates a synthetic data set with `benchmarks.generate` in a temporary
+directory and times, each several times: loading the users and tasks,
+listing the tasks of individual users, generating the task and user
+overview reports, displaying the statistics, counting the task file for
+the reports without loading it, changing tasks and compacting the
+journal into the task file. The median time of each is written as JSON,
+and compared with a baseline written by an earlier run, if one is
+given, to catch regressions: the exit status is 1 if any case is slower
+than the baseline by more than both the tolerance and the minimum
+difference.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+"""
+
+# =====Importing Libraries=====
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from benchmarks.generate import (PASSWORD_HASH, add_arguments,  # noqa
+                                 generate)
+from task_engine import (PasswordHasher, TaskStore, UserStore,  # noqa
+                         count_task_file, gen_task_overview,
+                         gen_user_overview)
+from task_manager import display_stats, render_task  # noqa: E402
+from task_storage import BinaryBackend, TextBackend, import_text  # noqa
+
+
+def timed(function, repeat):
+    """
+    The function `timed` runs a function several times.
+
+    :return: The function `timed` returns a dictionary of the median
+    time in seconds and the time of each run.
+    """
+
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return {"seconds": statistics.median(runs), "runs": runs}
+
+
+def run_cases(directory, args):
+    """
+    The function `run_cases` times each case on the data set in a
+    directory.
+
+    :return: The function `run_cases` returns a dictionary mapping the
+    name of each case to its timings.
+    """
+
+    paths = {name: os.path.join(directory, name)
+             for name in ("tasks.txt", "tasks.bin", "tasks_journal.txt",
+                          "user.txt", "task_overview.txt",
+                          "user_overview.txt")}
+    if args.storage == "binary":
+        import_text(paths["tasks.txt"], paths["tasks.bin"])
+        backend = BinaryBackend(paths["tasks.bin"],
+                                journal_path=paths["tasks_journal.txt"],
+                                user_path=paths["user.txt"])
+    else:
+        backend = TextBackend(paths["tasks.txt"], paths["tasks_journal.txt"],
+                              paths["user.txt"])
+    hasher = PasswordHasher.from_spec(PASSWORD_HASH)
+    results = {}
+
+    # Startup: loading the users and parsing the tasks
+    user_store = UserStore(backend, hasher)
+    results["load_users"] = timed(user_store.load, args.repeat)
+    task_store = TaskStore(backend, users=user_store)
+    results["load_tasks"] = timed(task_store.load, args.repeat)
+
+    # Listing the tasks of the users with most tasks and of a sample of
+    # the others, as "vm - View my tasks" does
+    usernames = sorted(user_store, key=lambda username: -len(
+        task_store.task_ids_for(username)))
+    usernames = usernames[:10] + random.Random(0).sample(
+        usernames[10:], min(args.list_users, len(usernames) - 10))
+
+    def list_tasks():
+        for username in usernames:
+            "".join(render_task(task_id, task) for task_id, task in
+                    task_store.query(username=username))
+
+    results["user_listing"] = timed(list_tasks, args.repeat)
+
+    # Reports and statistics
+    results["gen_task_overview"] = timed(
+        lambda: gen_task_overview(task_store, paths["task_overview.txt"]),
+        args.repeat)
+    results["gen_user_overview"] = timed(
+        lambda: gen_user_overview(task_store, user_store,
+                                  paths["user_overview.txt"]),
+        args.repeat)
+
+    def show_stats():
+        with contextlib.redirect_stdout(io.StringIO()):
+            display_stats(task_store, user_store)
+
+    results["display_stats"] = timed(show_stats, args.repeat)
+    if args.storage == "text":
+        results["count_task_file"] = timed(
+            lambda: count_task_file(backend, datetime.today()),
+            args.repeat)
+
+    # Changing tasks, which appends to the journal, and then folding the
+    # journal back into the task file
+    rng = random.Random(1)
+    today = datetime.today()
+
+    def update_tasks():
+        for _ in range(args.updates):
+            task_id = rng.randrange(len(task_store))
+            change = rng.randrange(3)
+            if change == 0:
+                task_store.complete(task_id)
+            elif change == 1:
+                task_store.reassign(task_id, rng.choice(usernames))
+            else:
+                task_store.set_due_date(
+                    task_id, today + timedelta(days=rng.randint(-30, 30)))
+
+    update_runs = []
+    compact_runs = []
+    for _ in range(args.repeat):
+        update_runs.append(timed(update_tasks, 1)["seconds"])
+        compact_runs.append(timed(task_store.compact, 1)["seconds"])
+    results["update_tasks"] = {"seconds": statistics.median(update_runs),
+                               "runs": update_runs}
+    results["compact"] = {"seconds": statistics.median(compact_runs),
+                          "runs": compact_runs}
+
+    task_store.close()
+    return results
+
+
+def compare(results, baseline, tolerance, min_difference):
+    """
+    The function `compare` prints each case's time beside the baseline.
+
+    :return: The function `compare` returns the names of the cases which
+    are slower than the baseline by more than the tolerance and by more
+    than the minimum difference, below which timings are mostly noise.
+    """
+
+    if baseline["parameters"] != results["parameters"]:
+        print("Warning: the baseline was run with different parameters",
+              file=sys.stderr)
+
+    regressions = []
+    print(f"\n{'Case':<20} {'Baseline':>10} {'Now':>10} {'Change':>8}",
+          file=sys.stderr)
+    for name, timing in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["seconds"]
+        change = timing["seconds"] / before - 1 if before else 0.0
+        flag = ""
+        if change > tolerance and \
+                timing["seconds"] - before > min_difference:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<20} {before * 1000:8.2f}ms "
+              f"{timing['seconds'] * 1000:8.2f}ms {change:+8.1%}{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main():
+    """
+    The function `main` runs the suite, writes the results and compares
+    them with the baseline.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    parser.add_argument("--storage", choices=["text", "binary"],
+                        default="text")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs of each case, of which the median is "
+                             "taken")
+    parser.add_argument("--list-users", type=int, default=100,
+                        help="users whose tasks are listed, besides the "
+                             "10 with most tasks")
+    parser.add_argument("--updates", type=int, default=500,
+                        help="tasks changed before each compaction")
+    parser.add_argument("--output", help="file to write the results to, "
+                                         "by default the terminal")
+    parser.add_argument("--baseline", help="results of an earlier run to "
+                                           "compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="slowdown allowed before a case counts as a "
+                             "regression")
+    parser.add_argument("--min-difference", type=float, default=0.001,
+                        help="seconds by which a case must be slower to "
+                             "count as a regression")
+    args = parser.parse_args()
+
+    parameters = {name: getattr(args, name) for name in (
+        "users", "tasks_per_user", "skew", "completed_ratio",
+        "overdue_ratio", "seed", "storage", "repeat", "list_users",
+        "updates")}
+    with tempfile.TemporaryDirectory() as directory:
+        num_tasks = generate(directory, args.users, args.tasks_per_user,
+                             args.skew, args.completed_ratio,
+                             args.overdue_ratio, args.seed)
+        print(f"Generated {num_tasks:,} tasks for {args.users:,} users",
+              file=sys.stderr)
+        results = {
+            "parameters": parameters,
+            "environment": {"python": platform.python_version(),
+                            "platform": platform.platform(),
+                            "cpus": os.cpu_count()},
+            "results": run_cases(directory, args),
+        }
+
+    for name, timing in results["results"].items():
+        print(f"{name:<20} {timing['seconds'] * 1000:10.2f} ms",
+              file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as out_file:
+            out_file.write(output + "\n")
+
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(results, baseline, args.tolerance,
+                   args.min_difference):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2472 @@
+"""
+The module provides the task management engine used by the task manager
+application. It holds tasks and users in memory, persists every change
+through a storage backend and generates the task and user overview
+reports, without any interactive input, so it can be imported as a
+library.
+"""
+
+# =====Importing Libraries=====
+import csv
+import hashlib
+import hmac
+import io
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from itertools import accumulate, chain, islice, repeat
+
+from task_storage import (DATETIME_STRING_FORMAT, TEXT_HEADER_PREFIX,
+                          TEXT_SEPARATORS, BinaryBackend, SqliteBackend,
+                          Task, TextBackend, parse_date, read_journal)
+
+# Default cost parameters for password hashing
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600000
+
+# Words indexed for searching task titles and descriptions
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Formats in which the reports can be written, with their file
+# extensions
+REPORT_EXTENSIONS = {"text": "txt", "json": "json", "csv": "csv"}
+
+# Fields of the task overview, and of each user in the user overview,
+# in the JSON and CSV formats
+TASK_OVERVIEW_FIELDS = ("generated", "tasks", "completed", "uncompleted",
+                        "overdue", "percent_completed",
+                        "percent_uncompleted", "percent_overdue")
+USER_OVERVIEW_FIELDS = ("username", "tasks", "percent_assigned",
+                        "completed", "percent_completed", "uncompleted",
+                        "percent_uncompleted", "overdue", "percent_overdue")
+
+# Reports are written through a buffer of this many bytes, so that even
+# a large report reaches the disk in a few large writes
+REPORT_BUFFER_SIZE = 1 << 20
+
+
+class ConflictError(Exception):
+    """
+    The exception `ConflictError` is raised when a task is changed on
+    the strength of a version which another process has since replaced.
+    """
+
+
+class LoadStats:
+    """
+    The class `LoadStats` records how many rows the last load of the
+    task store read and how long it took.
+    """
+
+    __slots__ = ("rows", "seconds")
+
+    def __init__(self, rows=0, seconds=0.0):
+        self.rows = rows
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self):
+        """
+        The property `rows_per_second` is the load throughput, or 0 if
+        nothing has been loaded.
+        """
+
+        if not self.seconds:
+            return 0
+        return self.rows / self.seconds
+
+
+class PasswordHasher:
+    """
+    The class `PasswordHasher` hashes passwords with a random salt using
+    `hashlib.scrypt` or `hashlib.pbkdf2_hmac`, and checks passwords
+    against stored hashes. Hashes record their own algorithm and cost
+    parameters, so hashes made with different settings can still be
+    checked.
+
+    :param algorithm: The optional `algorithm` parameter is "scrypt" or
+    "pbkdf2"
+    :type algorithm: str
+    :param n: The optional `n` parameter is the scrypt CPU/memory cost
+    :type n: int
+    :param r: The optional `r` parameter is the scrypt block size
+    :type r: int
+    :param p: The optional `p` parameter is the scrypt parallelism
+    :type p: int
+    :param iterations: The optional `iterations` parameter is the number
+    of PBKDF2 iterations
+    :type iterations: int
+    """
+
+    def __init__(self, algorithm="scrypt", n=SCRYPT_N, r=SCRYPT_R,
+                 p=SCRYPT_P, iterations=PBKDF2_ITERATIONS):
+        if algorithm not in ("scrypt", "pbkdf2"):
+            raise ValueError(f"Unknown password hash algorithm {algorithm}")
+
+        self.algorithm = algorithm
+        self.n = n
+        self.r = r
+        self.p = p
+        self.iterations = iterations
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        The method `from_spec` creates a hasher from a short description
+        such as "scrypt:n=16384,r=8,p=1" or "pbkdf2:iterations=600000".
+        Parameters which are left out keep their defaults.
+
+        :param spec: The `spec` parameter is the description
+        :type spec: str
+        :return: The method `from_spec` returns a `PasswordHasher`.
+        """
+
+        algorithm, _, params = spec.partition(":")
+        kwargs = {}
+        for param in filter(None, params.split(",")):
+            name, _, value = param.partition("=")
+            if name not in ("n", "r", "p", "iterations"):
+                raise ValueError(f"Unknown password hash parameter {name}")
+            kwargs[name] = int(value)
+        return cls(algorithm, **kwargs)
+
+    def hash(self, password):
+        """
+        The method `hash` hashes a password with a new random salt.
+
+        :param password: The `password` parameter is the password
+        :type password: str
+        :return: The method `hash` returns the hash as a string holding
+        the algorithm, cost parameters, salt and derived key.
+        """
+
+        salt = secrets.token_bytes(16)
+        if self.algorithm == "scrypt":
+            params = (self.n, self.r, self.p)
+        else:
+            params = (self.iterations,)
+        key = self._derive(self.algorithm, params, password, salt)
+        return "$".join([self.algorithm, *map(str, params), salt.hex(),
+                         key.hex()])
+
+    def verify(self, password, password_hash):
+        """
+        The method `verify` checks a password against a stored hash.
+
+        :param password: The `password` parameter is the password
+        :type password: str
+        :param password_hash: The `password_hash` parameter is a hash
+        returned by `hash`
+        :type password_hash: str
+        :return: The method `verify` returns True if the password
+        matches, otherwise False.
+        """
+
+        algorithm, *params, salt, key = password_hash.split("$")
+        derived = self._derive(algorithm, tuple(map(int, params)), password,
+                               bytes.fromhex(salt))
+        return hmac.compare_digest(derived, bytes.fromhex(key))
+
+    def needs_rehash(self, password_hash):
+        """
+        The method `needs_rehash` checks whether a stored hash was made
+        with different settings from this hasher's.
+
+        :param password_hash: The `password_hash` parameter is a hash
+        returned by `hash`
+        :type password_hash: str
+        :return: The method `needs_rehash` returns True if the password
+        should be hashed again.
+        """
+
+        if self.algorithm == "scrypt":
+            current = f"scrypt${self.n}${self.r}${self.p}$"
+        else:
+            current = f"pbkdf2${self.iterations}$"
+        return not password_hash.startswith(current)
+
+    @staticmethod
+    def is_hash(value):
+        """
+        The method `is_hash` tells a stored hash apart from a plain text
+        password written by earlier versions of the application.
+
+        :param value: The `value` parameter is the stored password
+        :type value: str
+        :return: The method `is_hash` returns True if the value is a
+        hash.
+        """
+
+        return value.startswith(("scrypt$", "pbkdf2$"))
+
+    @staticmethod
+    def _derive(algorithm, params, password, salt):
+        if algorithm == "scrypt":
+            n, r, p = params
+            return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n,
+                                  r=r, p=p, maxmem=256 * n * r * p,
+                                  dklen=32)
+        (iterations,) = params
+        return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt,
+                                   iterations)
+
+
+class UserStore:
+    """
+    The class `UserStore` holds the usernames and password hashes of the
+    registered users and records new users through a storage backend.
+    Plain text passwords left by earlier versions are hashed when the
+    users are loaded.
+
+    Checking a password means hashing it, which is deliberately slow.
+    Once a user's password has been checked, a keyed digest of it is
+    kept in memory so that later logins with the same password skip the
+    slow hash. Wrong passwords always take the slow path.
+
+    Other processes may register users in the same storage; `refresh`
+    reloads the users if the backend reports that they have changed.
+
+    :param backend: The optional `backend` parameter is the storage
+    backend holding the users, by default a `TextBackend` using user.txt
+    :type backend: TextBackend
+    :param hasher: The optional `hasher` parameter is the
+    `PasswordHasher` used for new and migrated passwords
+    :type hasher: PasswordHasher
+    """
+
+    def __init__(self, backend=None, hasher=None):
+        self.backend = backend if backend is not None else TextBackend()
+        self.hasher = hasher if hasher is not None else PasswordHasher()
+        self.username_password = {}
+        self._login_key = secrets.token_bytes(32)
+        self._verified = {}
+        self._stamp = None
+
+    def load(self):
+        """
+        The method `load` reads the users from the backend, which adds a
+        default admin account if there are none, and hashes any plain
+        text passwords, saving all users again if there were any.
+        """
+
+        with self.backend.locked():
+            self.username_password = self.backend.load_users()
+
+            # Hash any passwords stored as plain text
+            plain_text = [
+                username
+                for username, password in self.username_password.items()
+                if not PasswordHasher.is_hash(password)]
+            for username in plain_text:
+                self.username_password[username] = \
+                    self.hasher.hash(self.username_password[username])
+            if plain_text:
+                self.backend.save_users(self.username_password)
+
+            self._stamp = self.backend.users_stamp()
+
+    def refresh(self):
+        """
+        The method `refresh` reloads the users if another process has
+        changed them since they were loaded.
+        """
+
+        if self.backend.users_stamp() != self._stamp:
+            self.load()
+
+    def __contains__(self, username):
+        return username in self.username_password
+
+    def __iter__(self):
+        return iter(self.username_password)
+
+    def __len__(self):
+        return len(self.username_password)
+
+    @staticmethod
+    def check_username(username):
+        """
+        The method `check_username` checks that a username can be stored
+        in the user and task files, which separate their fields with ';'
+        and their lines with line breaks, raising `ValueError` if it is
+        empty or contains either.
+
+        :param username: The `username` parameter is the username
+        :type username: str
+        """
+
+        if not username or \
+                any(separator in username for separator in TEXT_SEPARATORS):
+            raise ValueError("A username must not be empty or contain ';' "
+                             "or line breaks")
+
+    def add(self, username, password):
+        """
+        The method `add` registers a new user and records it in the
+        backend.
+
+        :param username: The `username` parameter is the new username,
+        which must not already be registered and must pass
+        `check_username`
+        :type username: str
+        :param password: The `password` parameter is the password for
+        the new user
+        :type password: str
+        """
+
+        self.check_username(username)
+        password_hash = self.hasher.hash(password)
+        with self.backend.locked():
+            self.refresh()
+            if username in self.username_password:
+                raise ValueError(f"User {username} already exists")
+            self._save_user(username, password_hash)
+
+    def check_password(self, username, password):
+        """
+        The method `check_password` checks a password against the hash
+        stored for a user. A password hashed with out of date settings
+        is hashed again once it has been checked.
+
+        :return: The method `check_password` returns True if the user
+        exists and the password matches, otherwise False.
+        """
+
+        password_hash = self.password_hash(username)
+        if password_hash is None:
+            return False
+        if self.recently_checked(username, password, password_hash):
+            return True
+        if not self.hasher.verify(password, password_hash):
+            return False
+        self.accept_password(username, password, password_hash)
+        return True
+
+    def password_hash(self, username):
+        """
+        The method `password_hash` returns the hash stored for a user,
+        reading the users again if the user is not known yet.
+
+        :param username: The `username` parameter is the user whose
+        hash is returned.
+        :return: The method `password_hash` returns the stored hash, or
+        None if the user does not exist.
+        """
+
+        password_hash = self.username_password.get(username)
+        if password_hash is None:
+
+            # The user may have been registered by another process
+            self.refresh()
+            password_hash = self.username_password.get(username)
+        return password_hash
+
+    def recently_checked(self, username, password, password_hash):
+        """
+        The method `recently_checked` tells whether a password has
+        already been checked against a hash, without the slow hash.
+
+        :param username: The `username` parameter is the user whose
+        password is checked.
+        :param password: The `password` parameter is the password given.
+        :param password_hash: The `password_hash` parameter is the hash
+        stored for the user.
+        :return: The method `recently_checked` returns True if the
+        password matched the same hash before, otherwise False.
+        """
+
+        verified = self._verified.get(username)
+        return verified is not None and verified[0] == password_hash and \
+            hmac.compare_digest(verified[1], self._login_digest(password))
+
+    def accept_password(self, username, password, password_hash):
+        """
+        The method `accept_password` remembers a password which the
+        hasher has verified against a user's hash, so that it is not
+        hashed again, and hashes it again if its settings are out of
+        date. Callers which verify passwords in another thread call
+        this method once the check has passed.
+
+        :param username: The `username` parameter is the user whose
+        password was verified.
+        :param password: The `password` parameter is the password given.
+        :param password_hash: The `password_hash` parameter is the hash
+        the password was verified against.
+        """
+
+        if self.hasher.needs_rehash(password_hash):
+            password_hash = self.hasher.hash(password)
+            with self.backend.locked():
+                self.refresh()
+                self._save_user(username, password_hash)
+
+        self._verified[username] = (password_hash,
+                                    self._login_digest(password))
+
+    def _login_digest(self, password):
+        return hmac.new(self._login_key, password.encode("utf-8"),
+                        hashlib.sha256).digest()
+
+    def _save_user(self, username, password_hash):
+
+        # The caller holds the lock and has refreshed, so this write is
+        # the only change since the users were read
+        self.username_password[username] = password_hash
+        self.backend.save_user(username, password_hash)
+        self._stamp = self.backend.users_stamp()
+
+
+class TaskCounts:
+    """
+    The class `TaskCounts` holds the number of tasks, completed tasks,
+    uncompleted tasks and overdue tasks for the whole task list or for
+    a single user, as read from `TaskStats` at a given moment.
+    """
+
+    __slots__ = ("total", "completed", "uncompleted", "overdue")
+
+    def __init__(self):
+        self.total = 0
+        self.completed = 0
+        self.uncompleted = 0
+        self.overdue = 0
+
+
+class TaskStats:
+    """
+    The class `TaskStats` holds live counters for a set of tasks: the
+    number of tasks, the number completed and the due dates of the
+    uncompleted tasks in order, so that the number of overdue tasks at
+    any moment can be found with a binary search. The IDs of the
+    uncompleted tasks are kept in the same order, as a due date index
+    from which the tasks overdue or due within a period can be read
+    without examining any others. Archived tasks are included in the
+    number of tasks and completed tasks, and also counted in `archived`.
+    """
+
+    __slots__ = ("total", "completed", "archived", "open_due_dates",
+                 "open_task_ids")
+
+    def __init__(self):
+        self.total = 0
+        self.completed = 0
+        self.archived = 0
+        self.open_due_dates = []
+        self.open_task_ids = []
+
+    def add(self, task_id, due_date, completed, in_order=True):
+        """
+        The method `add` includes a task in the counters.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param due_date: The `due_date` parameter is the task's due date
+        :type due_date: datetime
+        :param completed: The `completed` parameter is whether the task
+        has been completed
+        :type completed: bool
+        :param in_order: The optional `in_order` parameter can be set to
+        False when adding many tasks at once in order of task ID, in
+        which case `sort` must be called afterwards
+        :type in_order: bool
+        """
+
+        self.total += 1
+        if completed:
+            self.completed += 1
+        elif in_order:
+            position = self._position(task_id, due_date)
+            self.open_due_dates.insert(position, due_date)
+            self.open_task_ids.insert(position, task_id)
+        else:
+            self.open_due_dates.append(due_date)
+            self.open_task_ids.append(task_id)
+
+    def add_archived(self, count):
+        """
+        The method `add_archived` includes archived tasks, which are
+        always completed, in the counters.
+
+        :param count: The `count` parameter is the number of tasks
+        :type count: int
+        """
+
+        self.total += count
+        self.completed += count
+        self.archived += count
+
+    def sort(self):
+        """
+        The method `sort` puts the due dates back in order after tasks
+        have been added with `in_order` set to False. Tasks due on the
+        same date stay in order of task ID, as the sort is stable.
+        """
+
+        due_dates = self.open_due_dates
+        order = sorted(range(len(due_dates)), key=due_dates.__getitem__)
+        self.open_due_dates = [due_dates[index] for index in order]
+        self.open_task_ids = [self.open_task_ids[index] for index in order]
+
+    def remove(self, task_id, due_date, completed):
+        """
+        The method `remove` takes a task, as previously passed to `add`,
+        back out of the counters.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param due_date: The `due_date` parameter is the task's due date
+        :type due_date: datetime
+        :param completed: The `completed` parameter is whether the task
+        has been completed
+        :type completed: bool
+        """
+
+        self.total -= 1
+        if completed:
+            self.completed -= 1
+        else:
+            position = self._position(task_id, due_date)
+            del self.open_due_dates[position]
+            del self.open_task_ids[position]
+
+    def counts(self, now):
+        """
+        The method `counts` reads the counters as of a given moment.
+
+        :param now: The `now` parameter is the moment against which due
+        dates are compared
+        :type now: datetime
+        :return: The method `counts` returns a `TaskCounts`.
+        """
+
+        counts = TaskCounts()
+        counts.total = self.total
+        counts.completed = self.completed
+        counts.uncompleted = self.total - self.completed
+        counts.overdue = bisect_left(self.open_due_dates, now)
+        return counts
+
+    def overdue_task_ids(self, now):
+        """
+        The method `overdue_task_ids` finds the uncompleted tasks which
+        are overdue at a given moment.
+
+        :param now: The `now` parameter is the moment against which due
+        dates are compared
+        :type now: datetime
+        :return: The method `overdue_task_ids` returns a list of task
+        IDs in order of due date.
+        """
+
+        return self.open_task_ids[:bisect_left(self.open_due_dates, now)]
+
+    def due_task_ids(self, start, end):
+        """
+        The method `due_task_ids` finds the uncompleted tasks due within
+        a period.
+
+        :param start: The `start` parameter is the earliest due date
+        included
+        :type start: datetime
+        :param end: The `end` parameter is the latest due date included
+        :type end: datetime
+        :return: The method `due_task_ids` returns a list of task IDs in
+        order of due date.
+        """
+
+        return self.open_task_ids[bisect_left(self.open_due_dates, start):
+                                  bisect_right(self.open_due_dates, end)]
+
+    def _position(self, task_id, due_date):
+
+        # Tasks due on the same date are ordered by task ID
+        low = bisect_left(self.open_due_dates, due_date)
+        high = bisect_right(self.open_due_dates, due_date, low)
+        return bisect_left(self.open_task_ids, task_id, low, high)
+
+
+class TextIndex:
+    """
+    The class `TextIndex` is an inverted index of the words in task
+    titles and descriptions: for each word, in lower case, it holds the
+    IDs of the tasks containing it in order. The words themselves are
+    also kept in order, on demand, so that words starting with a prefix
+    can be found with a binary search. Deleted tasks are left in the
+    lists and held in `removed` instead, which is quicker than taking
+    them out of long lists.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.removed = set()
+        self._words = None
+
+    def add(self, task_id, task):
+        """
+        The method `add` indexes the title and description of a task.
+
+        :param task_id: The `task_id` parameter is the ID of the task,
+        which must be higher than that of any task already indexed
+        :type task_id: int
+        :param task: The `task` parameter is the task
+        :type task: Task
+        """
+
+        postings = self.postings
+        for word in set(self.words(task.title + " " + task.description)):
+            task_ids = postings.get(word)
+            if task_ids is None:
+                postings[word] = [task_id]
+                self._words = None
+            else:
+                task_ids.append(task_id)
+
+    def remove(self, task_id):
+        """
+        The method `remove` leaves a deleted task out of search results.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        """
+
+        self.removed.add(task_id)
+
+    def search(self, query, within=None):
+        """
+        The method `search` finds the tasks matching a query. The query
+        is made of words, all of which must appear in a task (they may
+        also be joined by "AND"), and a word ending with "*" matches any
+        word starting with it. Alternatives are separated by "OR", so
+        "monthly report OR invoice*" finds the tasks containing both
+        "monthly" and "report" or a word starting with "invoice".
+
+        :param query: The `query` parameter is the text searched for
+        :type query: str
+        :param within: The optional `within` parameter is a set of task
+        IDs to which the results are restricted
+        :type within: set
+        :return: The method `search` returns a set of task IDs.
+        """
+
+        alternatives = [[]]
+        for term in query.split():
+            if term == "OR":
+                alternatives.append([])
+            elif term != "AND":
+                alternatives[-1].append(term)
+
+        task_ids = set()
+        for alternative in alternatives:
+            terms = []
+            for term in alternative:
+                words = self.words(term)
+                terms.extend((word, False) for word in words)
+                if words and term.endswith("*"):
+                    terms[-1] = (words[-1], True)
+            if not terms:
+                continue
+
+            # Start from the term matching fewest tasks
+            matches = [self._matches(word, prefix) for word, prefix in terms]
+            if within is not None:
+                matches.append(within)
+            matches.sort(key=len)
+            found = set(matches[0])
+            for other in matches[1:]:
+                if not found:
+                    break
+                found = _intersect(found, other)
+            task_ids |= found
+        return task_ids - self.removed if self.removed else task_ids
+
+    @staticmethod
+    def words(text):
+        """
+        The method `words` splits text into the lower case words which
+        are indexed.
+
+        :param text: The `text` parameter is the text to split
+        :type text: str
+        :return: The method `words` returns a list of strings.
+        """
+
+        return SEARCH_TOKEN_PATTERN.findall(text.lower())
+
+    def _matches(self, word, prefix):
+        if not prefix:
+            return self.postings.get(word, ())
+
+        if self._words is None:
+            self._words = sorted(self.postings)
+        words = self._words
+        position = bisect_left(words, word)
+        task_ids = set()
+        while position < len(words) and words[position].startswith(word):
+            task_ids.update(self.postings[words[position]])
+            position += 1
+        return task_ids
+
+
+def _intersect(found, task_ids):
+
+    # A few task IDs are looked up in a long list of them, which is in
+    # order, with a binary search rather than by building a set
+    if isinstance(task_ids, list) and len(found) * 32 < len(task_ids):
+        kept = set()
+        for task_id in found:
+            position = bisect_left(task_ids, task_id)
+            if position < len(task_ids) and task_ids[position] == task_id:
+                kept.add(task_id)
+        return kept
+    found.intersection_update(task_ids)
+    return found
+
+
+class Subscription:
+    """
+    The class `Subscription` passes the change events of a `TaskStore`
+    to a callback in batches, in order. With a delay, events are held
+    until no more have arrived for that long (debouncing), so that a
+    burst of changes reaches the callback together, unless a full batch
+    builds up first.
+
+    :param callback: The `callback` parameter is called with a list of
+    events, as returned by `ChangeFeed.read`. With a delay it is called
+    from a timer thread, so it should not change the task store.
+    :type callback: callable
+    :param max_batch: The optional `max_batch` parameter is the most
+    events passed to one call
+    :type max_batch: int
+    :param delay: The optional `delay` parameter is the number of
+    seconds to wait for further events, or 0 to pass events on as soon
+    as the change which made them has been written
+    :type delay: float
+    """
+
+    def __init__(self, callback, max_batch=100, delay=0.0):
+        self.callback = callback
+        self.max_batch = max_batch
+        self.delay = delay
+        self.pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self._delivering = threading.Lock()
+
+    def push(self, events):
+        """
+        The method `push` passes events to the callback, or holds them
+        until the delay has passed.
+
+        :param events: The `events` parameter is a list of events
+        :type events: list
+        """
+
+        with self._lock:
+            self.pending.extend(events)
+            if self.delay and len(self.pending) < self.max_batch:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """
+        The method `flush` passes any events being held to the callback
+        straight away.
+        """
+
+        # Only one batch is delivered at a time, so that events arrive in
+        # order even when a timer fires during a delivery
+        with self._delivering:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                events, self.pending = self.pending, []
+            for start in range(0, len(events), self.max_batch):
+                self.callback(events[start:start + self.max_batch])
+
+
+class TaskStore:
+    """
+    The class `TaskStore` holds the list of tasks and records changes
+    to them through a storage backend. Overall and per-user
+    `TaskStats`, and the set of task IDs assigned to each user, are kept
+    up to date as tasks change.
+
+    Each task keeps the ID it was given when added, which is its index
+    in `tasks`. A deleted task leaves None in its place, so that no
+    other task is renumbered, and its ID is never given to another.
+
+    Completed tasks can be moved to a `TaskArchive` with
+    `archive_tasks`. They are then no longer held in `tasks`, but are
+    still counted as completed tasks of their users, from the archive's
+    summary, so the reports do not change.
+
+    Several processes may share the same storage. Each change is made
+    while holding the backend's lock, after picking up other processes'
+    changes with `refresh`, and each task has a version number, counting
+    the changes this store has seen, which a caller can pass back to
+    have a change refused with `ConflictError` if the task has changed
+    since the caller read it.
+
+    Every change to the counters is numbered by `change_seq`, and
+    `user_changes` records the number of the latest change to each
+    user's tasks, so that a `ReportCache` can tell which users' report
+    sections are out of date. `loaded_seq` is the number at which the
+    tasks were last loaded, before which nothing can be reused.
+
+    A `TextIndex` of task titles and descriptions is built the first
+    time `search` is used, so loading does not have to read every title
+    and description, and is kept up to date as tasks are added from
+    then on.
+
+    Adding, completing, reassigning, re-dating, deleting and archiving
+    tasks each make an event, which is written to the `ChangeFeed`, if
+    there is one, while the lock is still held, so events are numbered
+    in the order the changes were made by every process. Callbacks
+    registered with `subscribe` are passed the events once the lock has
+    been released, including the events of other processes' changes
+    picked up by `refresh`, so that caches and other copies of the tasks
+    can be kept up to date without reading every task again.
+
+    :param backend: The optional `backend` parameter is the storage
+    backend holding the tasks, by default a `TextBackend` using
+    tasks.txt
+    :type backend: TextBackend
+    :param users: The optional `users` parameter is a `UserStore` used
+    to check that tasks are only assigned to registered users
+    :type users: UserStore
+    :param archive: The optional `archive` parameter is the
+    `TaskArchive` to which completed tasks are moved
+    :type archive: TaskArchive
+    :param feed: The optional `feed` parameter is the `ChangeFeed` to
+    which change events are written
+    :type feed: ChangeFeed
+    """
+
+    def __init__(self, backend=None, users=None, archive=None, feed=None):
+        self.backend = backend if backend is not None else TextBackend()
+        self.users = users
+        self.archive = archive
+        self.feed = feed
+        self.subscriptions = []
+        self.event_seq = 0
+        self.tasks = []
+        self.live_ids = []
+        self.stats = TaskStats()
+        self.user_stats = {}
+        self.user_task_ids = {}
+        self.versions = {}
+        self.change_seq = 0
+        self.loaded_seq = 0
+        self.user_changes = {}
+        self.text_index = None
+        self.load_stats = LoadStats()
+        self._events = []
+        self._undelivered = []
+        self._write_depth = 0
+
+    def load(self):
+        """
+        The method `load` reads the tasks from the backend and builds the
+        counters and user index. The number of rows read and the time
+        taken are recorded in `load_stats`.
+        """
+
+        start_time = time.perf_counter()
+        if self.feed is not None:
+            self.event_seq = self.feed.last_seq()
+        self.tasks, num_rows = self.backend.load_tasks()
+
+        # Build the counters and user index from the loaded tasks
+        self.stats = TaskStats()
+        self.user_stats = {}
+        self.user_task_ids = {}
+        self.versions = {}
+        self.user_changes = {}
+        self.text_index = None
+        self.change_seq += 1
+        self.loaded_seq = self.change_seq
+        self.live_ids = []
+        rows = self.backend.index_rows(self.tasks)
+        for task_id, row in enumerate(rows):
+            if row is not None:
+                self.live_ids.append(task_id)
+                self._index_row(task_id, *row, in_order=False)
+        self.stats.sort()
+        for user_stats in self.user_stats.values():
+            user_stats.sort()
+
+        # Count the archived tasks, first finishing an archive run which
+        # was interrupted before deleting the tasks it archived
+        if self.archive is not None:
+            self.archive.refresh()
+            self._add_archived(self.archive.user_counts())
+            if self.archive.pending:
+                with self._writing():
+                    self._finish_archive()
+
+        self.load_stats = LoadStats(num_rows,
+                                    time.perf_counter() - start_time)
+
+    def refresh(self):
+        """
+        The method `refresh` picks up changes written by other processes
+        since the tasks were loaded or last refreshed, updating the
+        counters, user index and versions of just the changed and
+        deleted tasks.
+
+        :return: The method `refresh` returns the number of tasks which
+        changed.
+        """
+
+        with self.backend.locked(exclusive=False):
+            self.tasks, changes = self.backend.refresh()
+            if self.archive is not None:
+                old_counts = self.archive.user_counts()
+                if self.archive.refresh():
+                    self._add_archived({
+                        username: count - old_counts.get(username, 0)
+                        for username, count in
+                        self.archive.user_counts().items()})
+            if self.feed is not None:
+                if self.subscriptions:
+                    self._undelivered.extend(self.feed.read(self.event_seq))
+                self.event_seq = self.feed.last_seq()
+
+        for task_id, old_row in sorted(changes.items()):
+            task = self.tasks[task_id]
+            if old_row is not None:
+                self._unindex_row(task_id, *old_row)
+            if task is None:
+                if old_row is not None:
+                    self._drop_live_ids([task_id])
+                if self.text_index is not None:
+                    self.text_index.remove(task_id)
+            else:
+                if old_row is None:
+                    insort(self.live_ids, task_id)
+                    if self.text_index is not None:
+                        self.text_index.add(task_id, task)
+                self._index_task(task_id, task)
+            self.versions[task_id] = self.version(task_id) + 1
+
+        if not self._write_depth:
+            self._deliver()
+        return len(changes)
+
+    @contextmanager
+    def batch(self):
+        """
+        The method `batch` groups the changes made in a `with` block so
+        that the backend writes them together, holding the lock and
+        refreshing only once rather than for every change.
+        """
+
+        with self._writing(), self.backend.batch():
+            yield
+
+    def version(self, task_id):
+        """
+        The method `version` returns the version number of a task, which
+        goes up each time the task changes.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :return: The method `version` returns the version as an int.
+        """
+
+        return self.versions.get(task_id, 0)
+
+    def __len__(self):
+        return self.stats.total - self.stats.archived
+
+    @property
+    def next_id(self):
+        """
+        The property `next_id` is the ID the next task added will be
+        given.
+        """
+
+        return len(self.tasks)
+
+    def counts(self, now):
+        """
+        The method `counts` reads the overall and per-user counters as
+        of a given moment, without scanning the tasks.
+
+        :param now: The `now` parameter is the moment against which due
+        dates are compared
+        :type now: datetime
+        :return: The method `counts` returns a tuple of the overall
+        `TaskCounts` and a dictionary mapping each username with tasks
+        to its `TaskCounts`.
+        """
+
+        return (self.stats.counts(now),
+                {username: stats.counts(now)
+                 for username, stats in self.user_stats.items()})
+
+    def get(self, task_id):
+        """
+        The method `get` returns the task with the given ID.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :return: The method `get` returns the `Task`.
+        """
+
+        if not 0 <= task_id < len(self.tasks) or \
+                self.tasks[task_id] is None:
+            raise KeyError(f"No task with ID {task_id}")
+        return self.tasks[task_id]
+
+    def iter_query(self, username=None, completed=None, overdue_as_of=None,
+                   due_from=None, due_to=None):
+        """
+        The method `iter_query` finds the tasks matching the given
+        filters one at a time, so callers which only need the first few
+        matches do not examine every task.
+
+        :param username: The optional `username` parameter restricts the
+        results to tasks assigned to that user
+        :type username: str
+        :param completed: The optional `completed` parameter restricts
+        the results to completed (True) or uncompleted (False) tasks
+        :type completed: bool
+        :param overdue_as_of: The optional `overdue_as_of` parameter
+        restricts the results to uncompleted tasks which are overdue at
+        that moment
+        :type overdue_as_of: datetime
+        :param due_from: The optional `due_from` parameter restricts the
+        results to tasks due on or after that date
+        :type due_from: datetime
+        :param due_to: The optional `due_to` parameter restricts the
+        results to tasks due on or before that date
+        :type due_to: datetime
+        :return: The method `iter_query` yields `(task_id, task)` pairs
+        in task ID order.
+        """
+
+        # Read overdue tasks from the due date index, and otherwise use
+        # the user's own task IDs rather than scanning every task
+        if overdue_as_of is not None:
+            task_ids = sorted(self._overdue_task_ids(overdue_as_of,
+                                                     username))
+        elif username is not None:
+            task_ids = sorted(self.task_ids_for(username))
+        else:
+            task_ids = range(len(self.tasks))
+
+        tasks = self.tasks
+        for task_id in task_ids:
+            task = tasks[task_id]
+            if task is None:
+                continue
+            if completed is not None and task.completed != completed:
+                continue
+            if overdue_as_of is not None and \
+                    (task.completed or not overdue_as_of > task.due_date):
+                continue
+            if due_from is not None and task.due_date < due_from:
+                continue
+            if due_to is not None and task.due_date > due_to:
+                continue
+            yield task_id, task
+
+    def query(self, username=None, completed=None, overdue_as_of=None,
+              due_from=None, due_to=None, offset=0, limit=None):
+        """
+        The method `query` finds the tasks matching the given filters,
+        optionally returning only one page of them. The filters are
+        those of `iter_query`.
+
+        :param offset: The optional `offset` parameter is the number of
+        matching tasks to skip
+        :type offset: int
+        :param limit: The optional `limit` parameter is the most tasks
+        to return
+        :type limit: int
+        :return: The method `query` returns a list of `(task_id, task)`
+        pairs in task ID order.
+        """
+
+        # Without filters, a page can be sliced from the IDs of the
+        # tasks which have not been deleted or archived
+        if username is None and completed is None and \
+                overdue_as_of is None and due_from is None and \
+                due_to is None:
+            stop = None if limit is None else offset + limit
+            return [(task_id, self.tasks[task_id])
+                    for task_id in self.live_ids[offset:stop]]
+
+        stop = None if limit is None else offset + limit
+        return list(islice(self.iter_query(username, completed,
+                                           overdue_as_of, due_from, due_to),
+                           offset, stop))
+
+    def overdue(self, as_of=None, username=None):
+        """
+        The method `overdue` finds the uncompleted tasks which are
+        overdue, using the due date index rather than examining every
+        task.
+
+        :param as_of: The optional `as_of` parameter is the moment
+        against which due dates are compared, defaulting to the current
+        time
+        :type as_of: datetime
+        :param username: The optional `username` parameter restricts the
+        results to tasks assigned to that user
+        :type username: str
+        :return: The method `overdue` returns a list of `(task_id, task)`
+        pairs in order of due date.
+        """
+
+        if as_of is None:
+            as_of = datetime.today()
+        return [(task_id, self.tasks[task_id])
+                for task_id in self._overdue_task_ids(as_of, username)]
+
+    def due_within(self, days, as_of=None, username=None):
+        """
+        The method `due_within` finds the uncompleted tasks which are not
+        yet overdue but will be due within a number of days, using the
+        due date index.
+
+        :param days: The `days` parameter is the number of days ahead to
+        look
+        :type days: int
+        :param as_of: The optional `as_of` parameter is the moment from
+        which to look ahead, defaulting to the current time
+        :type as_of: datetime
+        :param username: The optional `username` parameter restricts the
+        results to tasks assigned to that user
+        :type username: str
+        :return: The method `due_within` returns a list of `(task_id,
+        task)` pairs in order of due date.
+        """
+
+        if as_of is None:
+            as_of = datetime.today()
+        stats = self.stats if username is None \
+            else self.user_stats.get(username)
+        if stats is None:
+            return []
+        try:
+            end = as_of + timedelta(days=days)
+        except OverflowError:
+            end = datetime.max
+        return [(task_id, self.tasks[task_id])
+                for task_id in stats.due_task_ids(as_of, end)]
+
+    def search(self, query, username=None, completed=None, offset=0,
+               limit=None):
+        """
+        The method `search` finds the tasks whose title or description
+        matches a query, as described in `TextIndex.search`, using the
+        text index rather than reading every task.
+
+        :param query: The `query` parameter is the text searched for
+        :type query: str
+        :param username: The optional `username` parameter restricts the
+        results to tasks assigned to that user
+        :type username: str
+        :param completed: The optional `completed` parameter restricts
+        the results to completed (True) or uncompleted (False) tasks
+        :type completed: bool
+        :param offset: The optional `offset` parameter is the number of
+        matching tasks to skip
+        :type offset: int
+        :param limit: The optional `limit` parameter is the most tasks
+        to return
+        :type limit: int
+        :return: The method `search` returns a tuple of the number of
+        matching tasks and a list of `(task_id, task)` pairs for the
+        requested page of them, in task ID order.
+        """
+
+        if self.text_index is None:
+            self.text_index = TextIndex()
+            for task_id, task in enumerate(self.tasks):
+                if task is not None:
+                    self.text_index.add(task_id, task)
+
+        task_ids = sorted(self.text_index.search(
+            query, None if username is None else self.task_ids_for(username)))
+        if completed is not None:
+            task_ids = [task_id for task_id in task_ids
+                        if self.tasks[task_id].completed == completed]
+
+        stop = None if limit is None else offset + limit
+        return len(task_ids), [(task_id, self.tasks[task_id])
+                               for task_id in task_ids[offset:stop]]
+
+    def task_ids_for(self, username):
+        """
+        The method `task_ids_for` returns the IDs of the tasks assigned
+        to a user.
+
+        :param username: The `username` parameter is the user whose
+        tasks are wanted
+        :type username: str
+        :return: The method `task_ids_for` returns a set of task IDs,
+        which must not be modified by the caller.
+        """
+
+        return self.user_task_ids.get(username, set())
+
+    def add(self, username, title, description, due_date,
+            assigned_date=None):
+        """
+        The method `add` adds a new, uncompleted task.
+
+        :param username: The `username` parameter is the user to whom
+        the task is assigned
+        :type username: str
+        :param due_date: The `due_date` parameter is the date by which
+        the task must be completed
+        :type due_date: datetime
+        :param assigned_date: The optional `assigned_date` parameter
+        defaults to today's date
+        :type assigned_date: date
+        :return: The method `add` returns the ID of the new task.
+        """
+
+        if assigned_date is None:
+            assigned_date = date.today()
+        self._check_text(title, description)
+
+        with self._writing():
+            self._check_user(username)
+            task_id = len(self.tasks)
+            task = Task(username, title, description, due_date,
+                        assigned_date)
+            self.tasks.append(task)
+            self.live_ids.append(task_id)
+            self._index_task(task_id, task)
+            if self.text_index is not None:
+                self.text_index.add(task_id, task)
+            self._record_added(task_id, task)
+            self.backend.add_task(task_id, task)
+        return task_id
+
+    def add_many(self, rows):
+        """
+        The method `add_many` adds a batch of tasks, such as rows read
+        from an import file, and records them all with a single write.
+        Rows which fail validation are reported rather than stopping the
+        rest of the batch.
+
+        :param rows: The `rows` parameter is an iterable of dictionaries
+        with "username", "title", "description" and "due_date" keys, and
+        optional "assigned_date" and "completed" keys. Dates may be
+        strings in `DATETIME_STRING_FORMAT`. A row may instead be an
+        error message string, which is reported as it is.
+        :return: The method `add_many` returns a tuple of the list of
+        new task IDs and a list of `(row_number, message)` pairs for the
+        rows which were rejected, numbering rows from 1.
+        """
+
+        valid_tasks = []
+        errors = []
+        today = date.today()
+
+        for row_number, row in enumerate(rows, 1):
+            if isinstance(row, str):
+                errors.append((row_number, row))
+                continue
+
+            try:
+                valid_tasks.append(self._task_from_row(row, today))
+            except ValueError as error:
+                errors.append((row_number, str(error)))
+
+        # Number the tasks once no other process can add any
+        new_tasks = []
+        with self._writing():
+            for task in valid_tasks:
+                task_id = len(self.tasks)
+                self.tasks.append(task)
+                self.live_ids.append(task_id)
+                self._index_task(task_id, task, in_order=False)
+                if self.text_index is not None:
+                    self.text_index.add(task_id, task)
+                self._record_added(task_id, task)
+                new_tasks.append((task_id, task))
+
+            # Put the due dates back in order once, rather than per task
+            self.stats.sort()
+            for username in {task.username for _, task in new_tasks}:
+                self.user_stats[username].sort()
+
+            if new_tasks:
+                self.backend.add_tasks(new_tasks)
+        return [task_id for task_id, _ in new_tasks], errors
+
+    def complete(self, task_id, version=None):
+        """
+        The method `complete` marks a task as complete.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param version: The optional `version` parameter is the version
+        of the task the caller last read, if the change should be
+        refused once another process has changed the task
+        :type version: int
+        """
+
+        self._update(task_id, "completed", True, version)
+
+    def reassign(self, task_id, username, version=None):
+        """
+        The method `reassign` assigns a task to a different user.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param username: The `username` parameter is the user to whom
+        the task is reassigned
+        :type username: str
+        :param version: The optional `version` parameter is as for
+        `complete`
+        :type version: int
+        """
+
+        self._update(task_id, "username", username, version)
+
+    def set_due_date(self, task_id, due_date, version=None):
+        """
+        The method `set_due_date` changes the due date of a task.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param due_date: The `due_date` parameter is the new due date
+        :type due_date: datetime
+        :param version: The optional `version` parameter is as for
+        `complete`
+        :type version: int
+        """
+
+        self._update(task_id, "due_date", due_date, version)
+
+    def delete(self, task_id, version=None):
+        """
+        The method `delete` deletes a task, without renumbering any
+        other.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param version: The optional `version` parameter is as for
+        `complete`
+        :type version: int
+        """
+
+        with self._writing():
+            self._check_version(task_id, version)
+            self.get(task_id)
+            self._remove([task_id], "delete")
+            self.backend.delete_task(task_id)
+
+    def archive_tasks(self, before):
+        """
+        The method `archive_tasks` moves the completed tasks due before a
+        date from the task store to the archive, after which the backend
+        only has to hold and rewrite the remaining tasks. The tasks are
+        written to the archive before they are deleted, so an
+        interrupted run can leave a task in both, which is put right on
+        the next load or run, but never in neither.
+
+        :param before: The `before` parameter is the date before which
+        completed tasks must have been due to be archived
+        :type before: datetime
+        :return: The method `archive_tasks` returns the number of tasks
+        archived.
+        """
+
+        if self.archive is None:
+            raise ValueError("The task store has no archive")
+
+        with self._writing():
+            self._finish_archive()
+
+            # Find the tasks from the index rows, so that only those
+            # archived need to be decoded from a binary snapshot
+            task_ids = [
+                task_id for task_id, row in enumerate(
+                    self.backend.index_rows(self.tasks))
+                if row is not None and row[2] and row[1] < before]
+            if not task_ids:
+                return 0
+
+            archived = [(task_id, self.tasks[task_id])
+                        for task_id in task_ids]
+            self.archive.append(archived)
+            user_counts = {}
+            for _, task in archived:
+                user_counts[task.username] = \
+                    user_counts.get(task.username, 0) + 1
+            self._remove(task_ids, "archive")
+            self._add_archived(user_counts)
+            self.backend.delete_tasks(task_ids)
+            self.archive.clear_pending()
+        return len(task_ids)
+
+    def compact(self):
+        """
+        The method `compact` asks the backend to fold any changes it has
+        logged back into its main storage.
+        """
+
+        with self._writing():
+            self.backend.compact()
+
+    def close(self):
+        """
+        The method `close` leaves the backend's storage complete for
+        other readers, and passes any events being held to their
+        callbacks.
+        """
+
+        self.refresh()
+        self.backend.close()
+        for subscription in self.subscriptions:
+            subscription.flush()
+
+    def subscribe(self, callback, max_batch=100, delay=0.0, since=None):
+        """
+        The method `subscribe` registers a callback to be passed the
+        events of changes to tasks, made by this or any other process,
+        from now on.
+
+        :param callback: The `callback` parameter is called with a list
+        of events
+        :type callback: callable
+        :param max_batch: The optional `max_batch` parameter is as for
+        `Subscription`
+        :type max_batch: int
+        :param delay: The optional `delay` parameter is as for
+        `Subscription`
+        :type delay: float
+        :param since: The optional `since` parameter is a sequence
+        number in the change feed, after which earlier events are first
+        passed to the callback
+        :type since: int
+        :return: The method `subscribe` returns the `Subscription`.
+        """
+
+        subscription = Subscription(callback, max_batch, delay)
+        if since is not None and since < self.event_seq:
+            subscription.push(self.events(since, self.event_seq - since))
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        The method `unsubscribe` stops passing events to a subscription,
+        after passing on any it is holding.
+
+        :param subscription: The `subscription` parameter is as returned
+        by `subscribe`
+        :type subscription: Subscription
+        """
+
+        self.subscriptions.remove(subscription)
+        subscription.flush()
+
+    def events(self, since=0, limit=None):
+        """
+        The method `events` reads the change feed after a sequence
+        number, as `ChangeFeed.read` does.
+
+        :return: The method `events` returns a list of events in order.
+        """
+
+        if self.feed is None:
+            raise ValueError("The task store has no change feed")
+        return self.feed.read(since, limit)
+
+    def _overdue_task_ids(self, as_of, username):
+        stats = self.stats if username is None \
+            else self.user_stats.get(username)
+        if stats is None:
+            return []
+        return stats.overdue_task_ids(as_of)
+
+    def _task_from_row(self, row, today):
+        for field in ("username", "title", "description", "due_date"):
+            if row.get(field) is None:
+                raise ValueError(f"Missing {field}")
+
+        username = sys.intern(str(row["username"]))
+        self._check_user(username)
+
+        due_date = self._date_from_row(row["due_date"], "due date")
+        assigned_date = self._date_from_row(
+            row.get("assigned_date") or today, "assigned date")
+
+        completed = row.get("completed", False)
+        if isinstance(completed, str):
+            if completed.lower() not in ("yes", "no", "true", "false", ""):
+                raise ValueError(f"Invalid completed value {completed}")
+            completed = completed.lower() in ("yes", "true")
+
+        title = str(row["title"])
+        description = str(row["description"])
+        self._check_text(title, description)
+        return Task(username, title, description, due_date, assigned_date,
+                    bool(completed))
+
+    def _check_text(self, title, description):
+
+        # The text task file has no escaping, and the binary backend
+        # shares its format through import and export
+        if not isinstance(self.backend, TextBackend):
+            return
+        for name, value in (("title", title), ("description", description)):
+            if any(separator in value for separator in TEXT_SEPARATORS):
+                raise ValueError(f"The {name} must not contain ';' or line "
+                                 "breaks")
+
+    @staticmethod
+    def _date_from_row(value, name):
+
+        # Dates without a time are taken as midnight, so that they can
+        # be compared with the due dates of other tasks
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        try:
+            return parse_date(str(value))
+        except ValueError:
+            raise ValueError(f"Invalid {name} {value}") from None
+
+    def _remove(self, task_ids, op):
+        for task_id in task_ids:
+            self._record(op, task_id, self.tasks[task_id])
+            self._unindex_task(task_id, self.tasks[task_id])
+            self.tasks[task_id] = None
+            if self.text_index is not None:
+                self.text_index.remove(task_id)
+            self.versions[task_id] = self.version(task_id) + 1
+        self._drop_live_ids(task_ids)
+
+    def _drop_live_ids(self, task_ids):
+
+        # A few IDs are found by bisection, but removing many at once,
+        # as archiving does, is quicker in one pass over the list
+        if len(task_ids) > 16:
+            removed = set(task_ids)
+            self.live_ids = [task_id for task_id in self.live_ids
+                             if task_id not in removed]
+            return
+        for task_id in task_ids:
+            index = bisect_left(self.live_ids, task_id)
+            if index < len(self.live_ids) and \
+                    self.live_ids[index] == task_id:
+                del self.live_ids[index]
+
+    def _finish_archive(self):
+        if not self.archive.pending:
+            return
+
+        # The tasks are already counted as archived
+        task_ids = [task_id for task_id in self.archive.pending
+                    if task_id < len(self.tasks) and
+                    self.tasks[task_id] is not None]
+        self._remove(task_ids, "archive")
+        if task_ids:
+            self.backend.delete_tasks(task_ids)
+        self.archive.clear_pending()
+
+    def _add_archived(self, user_counts):
+        for username, count in user_counts.items():
+            if not count:
+                continue
+            self.stats.add_archived(count)
+            self._user_stats(username).add_archived(count)
+            self.change_seq += 1
+            self.user_changes[username] = self.change_seq
+
+    def _user_stats(self, username):
+        user_stats = self.user_stats.get(username)
+        if user_stats is None:
+            user_stats = self.user_stats[username] = TaskStats()
+            self.user_task_ids[username] = set()
+        return user_stats
+
+    def _check_version(self, task_id, version):
+        if version is not None and self.version(task_id) != version:
+            raise ConflictError(
+                f"Task {task_id} was changed by another user")
+
+    def _update(self, task_id, field, value, version):
+        with self._writing():
+            self._check_version(task_id, version)
+            if field == "username":
+                self._check_user(value)
+
+            task = self.get(task_id)
+            old_value = getattr(task, field)
+            self._unindex_task(task_id, task)
+            setattr(task, field, value)
+            self._index_task(task_id, task)
+            self.versions[task_id] = self.version(task_id) + 1
+            if field == "completed":
+                self._record("complete", task_id, task)
+            elif field == "username":
+                self._record("reassign", task_id, task,
+                             old_username=old_value)
+            else:
+                self._record("set_due_date", task_id, task,
+                             due_date=value.strftime(DATETIME_STRING_FORMAT),
+                             old_due_date=old_value.strftime(
+                                 DATETIME_STRING_FORMAT))
+            self.backend.update_task(task_id, task, (field,))
+
+    @contextmanager
+    def _writing(self):
+
+        # Hold the lock and pick up other processes' changes first, and
+        # only once the outermost change is finished write its events
+        # and, after releasing the lock, pass them to the subscriptions.
+        # The events of changes which failed or could not be written are
+        # dropped.
+        self._write_depth += 1
+        try:
+            with self.backend.locked():
+                self.refresh()
+                try:
+                    yield
+                except BaseException:
+                    if self._write_depth == 1:
+                        self._events = []
+                    raise
+                if self._write_depth == 1:
+                    self._write_events()
+        finally:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._deliver()
+
+    def _record(self, op, task_id, task, **fields):
+        if self.feed is None and not self.subscriptions:
+            return
+        self._events.append({"op": op, "id": task_id,
+                             "username": task.username, **fields})
+
+    def _record_added(self, task_id, task):
+        self._record("add", task_id, task, title=task.title,
+                     description=task.description,
+                     due_date=task.due_date.strftime(DATETIME_STRING_FORMAT),
+                     assigned_date=task.assigned_date.strftime(
+                         DATETIME_STRING_FORMAT),
+                     completed=task.completed)
+
+    def _write_events(self):
+        events, self._events = self._events, []
+        if not events:
+            return
+
+        # Without a change feed the events are numbered by this store
+        if self.feed is not None:
+            events = self.feed.append(events)
+        else:
+            events = [{"seq": seq, **event}
+                      for seq, event in enumerate(events, self.event_seq + 1)]
+        self.event_seq = events[-1]["seq"]
+        if self.subscriptions:
+            self._undelivered.extend(events)
+
+    def _deliver(self):
+        events, self._undelivered = self._undelivered, []
+        if events:
+            for subscription in self.subscriptions:
+                subscription.push(events)
+
+    def _index_task(self, task_id, task, in_order=True):
+        self._index_row(task_id, task.username, task.due_date, task.completed,
+                        in_order)
+
+    def _index_row(self, task_id, username, due_date, completed,
+                   in_order=True):
+        self.stats.add(task_id, due_date, completed, in_order)
+        self._user_stats(username).add(task_id, due_date, completed,
+                                       in_order)
+        self.user_task_ids[username].add(task_id)
+        self.change_seq += 1
+        self.user_changes[username] = self.change_seq
+
+    def _unindex_task(self, task_id, task):
+        self._unindex_row(task_id, task.username, task.due_date,
+                          task.completed)
+
+    def _unindex_row(self, task_id, username, due_date, completed):
+        self.stats.remove(task_id, due_date, completed)
+        self.user_stats[username].remove(task_id, due_date, completed)
+        self.user_task_ids[username].discard(task_id)
+        self.change_seq += 1
+        self.user_changes[username] = self.change_seq
+
+    def _check_user(self, username):
+        UserStore.check_username(username)
+        if self.users is None or username in self.users:
+            return
+
+        # The user may have been registered by another process
+        self.users.refresh()
+        if username not in self.users:
+            raise ValueError(f"User {username} does not exist")
+
+
+def count_task_file(backend, now, workers=1, archive=None):
+    """
+    The function `count_task_file` reads the overall and per-user
+    counters as of a given moment straight from the task file and
+    journal of a `TextBackend`, without loading the tasks. The task file
+    is split into ranges of whole lines, which are counted by a pool of
+    worker processes and the partial counters merged.
+
+    :param backend: The `backend` parameter is the `TextBackend` whose
+    files are counted
+    :type backend: TextBackend
+    :param now: The `now` parameter is the moment against which due
+    dates are compared
+    :type now: datetime
+    :param workers: The optional `workers` parameter is the number of
+    processes counting the task file, which is counted in this process
+    if it is 1
+    :type workers: int
+    :param archive: The optional `archive` parameter is a `TaskArchive`
+    whose tasks are counted from its summary
+    :type archive: TaskArchive
+    :return: The function `count_task_file` returns the same as
+    `TaskStore.counts`.
+    """
+
+    if not isinstance(backend, TextBackend) or \
+            isinstance(backend, BinaryBackend):
+        raise ValueError("Only text task files can be counted")
+    if workers < 1:
+        raise ValueError("At least one worker is needed")
+
+    # The lock keeps the task file from being replaced while it is read
+    with backend.locked(exclusive=False):
+        records = list(read_journal(backend.journal_path))
+        pending = set()
+        if archive is not None:
+            archive.refresh()
+            pending.update(archive.pending)
+
+        # Tasks changed by the journal are counted separately, as are
+        # tasks which an interrupted archive run has already archived
+        changed_ids = {record["id"] for record in records
+                       if record["op"] != "add"} | pending
+        next_id, ranges = _line_ranges(backend.task_path, workers)
+        if workers == 1:
+            results = _count_ranges(map, backend.task_path, ranges, now,
+                                    changed_ids, next_id is None)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = _count_ranges(executor.map, backend.task_path,
+                                        ranges, now, changed_ids,
+                                        next_id is None)
+
+    # Merge the counters of each range
+    user_counts = {}
+    rows = {}
+    num_tasks = 0
+    for range_counts, range_rows, range_tasks in results:
+        for username, (total, completed, overdue) in range_counts.items():
+            username = username.decode("utf-8")
+            counts = user_counts.get(username)
+            if counts is None:
+                counts = user_counts[username] = TaskCounts()
+            counts.total += total
+            counts.completed += completed
+            counts.overdue += overdue
+        rows.update(range_rows)
+        num_tasks += range_tasks
+    if next_id is not None:
+        num_tasks = next_id
+
+    # Apply the journal to the tasks it changes, which were left out of
+    # the counters, in the same way as `TextBackend`
+    for record in records:
+        task_id = record["id"]
+        if record["op"] == "add":
+            if task_id < num_tasks:
+                continue
+            rows[task_id] = [record["username"],
+                             parse_date(record["due_date"]),
+                             record["completed"]]
+            num_tasks = task_id + 1
+            continue
+
+        row = rows.get(task_id)
+        if row is None:
+            continue
+        if record["op"] == "delete":
+            del rows[task_id]
+        elif record["op"] == "complete":
+            row[2] = True
+        elif record["op"] == "edit":
+            if "username" in record:
+                row[0] = record["username"]
+            if "due_date" in record:
+                row[1] = parse_date(record["due_date"])
+            if "completed" in record:
+                row[2] = record["completed"]
+
+    # Tasks pending deletion are counted with the archive
+    for task_id in pending:
+        rows.pop(task_id, None)
+
+    for username, due_date, completed in rows.values():
+        counts = user_counts.get(username)
+        if counts is None:
+            counts = user_counts[username] = TaskCounts()
+        counts.total += 1
+        if completed:
+            counts.completed += 1
+        elif now > due_date:
+            counts.overdue += 1
+
+    return _total_counts(user_counts, archive)
+
+
+def count_task_database(backend, now, archive=None):
+    """
+    The function `count_task_database` reads the overall and per-user
+    counters as of a given moment from a `SqliteBackend` with an indexed
+    aggregate query, without loading the tasks.
+
+    :param backend: The `backend` parameter is the `SqliteBackend` whose
+    tasks are counted
+    :type backend: SqliteBackend
+    :param now: The `now` parameter is the moment against which due
+    dates are compared
+    :type now: datetime
+    :param archive: The optional `archive` parameter is a `TaskArchive`
+    whose tasks are counted from its summary
+    :type archive: TaskArchive
+    :return: The function `count_task_database` returns the same as
+    `TaskStore.counts`.
+    """
+
+    if not isinstance(backend, SqliteBackend):
+        raise ValueError("Only SQLite databases can be counted")
+
+    # The lock keeps an archive run from moving tasks while they are
+    # counted, and tasks pending deletion are counted with the archive
+    with backend.locked(exclusive=False):
+        pending = ()
+        if archive is not None:
+            archive.refresh()
+            pending = archive.pending
+        user_counts = {}
+        for username, (total, completed, overdue) in \
+                backend.task_counts(now, pending).items():
+            counts = user_counts[username] = TaskCounts()
+            counts.total = total
+            counts.completed = completed
+            counts.overdue = overdue
+
+    return _total_counts(user_counts, archive)
+
+
+def _total_counts(user_counts, archive):
+
+    # Archived tasks are all completed, and are added to the counters of
+    # their users before the totals are summed
+    if archive is not None:
+        for username, count in archive.user_counts().items():
+            counts = user_counts.get(username)
+            if counts is None:
+                counts = user_counts[username] = TaskCounts()
+            counts.total += count
+            counts.completed += count
+
+    totals = TaskCounts()
+    for counts in user_counts.values():
+        counts.uncompleted = counts.total - counts.completed
+        totals.total += counts.total
+        totals.completed += counts.completed
+        totals.overdue += counts.overdue
+    totals.uncompleted = totals.total - totals.completed
+    return totals, user_counts
+
+
+def _line_ranges(path, workers):
+
+    # The ranges start after the header, if the file has one, and each
+    # starts at the beginning of a line
+    size = os.path.getsize(path)
+    with open(path, "rb") as task_file:
+        header = task_file.readline()
+        prefix = TEXT_HEADER_PREFIX.encode("ascii")
+        if header.startswith(prefix):
+            next_id = int(header[len(prefix):])
+            boundaries = [len(header)]
+        else:
+            next_id = None
+            boundaries = [0]
+
+        for number in range(1, workers):
+            position = size * number // workers
+            if position <= boundaries[-1]:
+                continue
+            task_file.seek(position - 1)
+            task_file.readline()
+            if boundaries[-1] < task_file.tell() < size:
+                boundaries.append(task_file.tell())
+    boundaries.append(size)
+    return next_id, list(zip(boundaries, boundaries[1:]))
+
+
+def _count_ranges(map_function, path, ranges, now, changed_ids,
+                  unnumbered):
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+
+    # Unless the file gives each task's ID, the ID of the first task in
+    # each range is needed to pick out the changed tasks
+    first_ids = repeat(None)
+    if changed_ids and unnumbered:
+        first_ids = accumulate(
+            map_function(_count_range_tasks, repeat(path), starts,
+                         ends[:-1]), initial=0)
+
+    return list(map_function(_count_range, repeat(path), starts, ends,
+                             repeat(now), first_ids, repeat(changed_ids)))
+
+
+def _range_lines(path, start, end):
+    with open(path, "rb") as task_file:
+        task_file.seek(start)
+        remaining = end - start
+        for line in task_file:
+            if remaining <= 0:
+                break
+            remaining -= len(line)
+            line = line.rstrip(b"\r\n")
+            if line:
+                yield line
+
+
+def _count_range_tasks(path, start, end):
+    return sum(1 for _ in _range_lines(path, start, end))
+
+
+def _count_range(path, start, end, now, first_id, changed_ids):
+
+    # Counters are kept by the username's bytes, and whether each due
+    # date is overdue is only worked out once
+    user_counts = {}
+    overdue_dates = {}
+    changed_rows = {}
+    num_tasks = 0
+
+    for line in _range_lines(path, start, end):
+        fields = line.split(b";")
+        num_tasks += 1
+        if changed_ids:
+            task_id = int(fields[6]) if first_id is None \
+                else first_id + num_tasks - 1
+            if task_id in changed_ids:
+                changed_rows[task_id] = [
+                    fields[0].decode("utf-8"),
+                    parse_date(fields[3].decode("utf-8")),
+                    fields[5] == b"Yes"]
+                continue
+
+        counts = user_counts.get(fields[0])
+        if counts is None:
+            counts = user_counts[fields[0]] = [0, 0, 0]
+        counts[0] += 1
+        if fields[5] == b"Yes":
+            counts[1] += 1
+            continue
+
+        overdue = overdue_dates.get(fields[3])
+        if overdue is None:
+            overdue = overdue_dates[fields[3]] = \
+                now > parse_date(fields[3].decode("utf-8"))
+        if overdue:
+            counts[2] += 1
+
+    return user_counts, changed_rows, num_tasks
+
+
+class ReportCache:
+    """
+    The class `ReportCache` keeps the sections of the user overview from
+    one report to the next, along with what was last written to each
+    report file. Only the sections of users whose tasks have changed, or
+    whose tasks have become overdue since the last report, are worked
+    out again, and a report which would be unchanged is not written.
+    A `ReportCache` should only be used with one `TaskStore`.
+    """
+
+    def __init__(self):
+        self.now = None
+        self.seq = 0
+        self.total_tasks = None
+        self.sections = {}
+        self.written = {}
+        self.sections_built = 0
+        self.writes_skipped = 0
+
+    def user_sections(self, task_store, user_store, now, total_tasks,
+                      usernames=None):
+        """
+        The method `user_sections` returns the text section of the user
+        overview for each user, in order of username, reusing the
+        sections which are still up to date.
+
+        :param task_store: The `task_store` parameter is the `TaskStore`
+        holding the tasks to summarise
+        :type task_store: TaskStore
+        :param user_store: The `user_store` parameter is the `UserStore`
+        holding the users to report on
+        :type user_store: UserStore
+        :param now: The `now` parameter is the time the report is
+        generated for
+        :type now: datetime
+        :param total_tasks: The `total_tasks` parameter is the number of
+        tasks, against which each user's share is given
+        :type total_tasks: int
+        :param usernames: The optional `usernames` parameter is a sorted
+        list of the users to report on, by default every user
+        :type usernames: list
+        :return: The method `user_sections` returns a list of strings.
+        """
+
+        stale = self._stale_users(task_store, now)
+        no_tasks = TaskCounts()
+        sections = []
+        self.sections_built = 0
+
+        if usernames is None:
+            usernames = sorted(user_store)
+        else:
+
+            # Sections of users left out of this report are not worked
+            # out again, so any which are out of date, including their
+            # share of the tasks, are dropped
+            dropped = set(self.sections) if stale is None or \
+                total_tasks != self.total_tasks else stale
+            for username in dropped.difference(usernames):
+                self.sections.pop(username, None)
+
+        for username in usernames:
+            cached = self.sections.get(username)
+            if cached is None or stale is None or username in stale:
+                user_stats = task_store.user_stats.get(username)
+                counts = no_tasks if user_stats is None \
+                    else user_stats.counts(now)
+                self.sections_built += 1
+            elif total_tasks != self.total_tasks:
+
+                # Each user's share of the tasks has changed
+                counts = cached[0]
+            else:
+                sections.append(cached[1])
+                continue
+
+            section = _user_section(username, counts, total_tasks)
+            self.sections[username] = (counts, section)
+            sections.append(section)
+
+        self.now = now
+        self.seq = task_store.change_seq
+        self.total_tasks = total_tasks
+        return sections
+
+    def write(self, path, parts):
+        """
+        The method `write` writes a report unless the file already holds
+        exactly the same content, as last written through this cache.
+
+        :param path: The `path` parameter is the location of the report
+        :type path: str
+        :param parts: The `parts` parameter is an iterable of the strings
+        which make up the report, in order
+        :return: The method `write` returns True if the file was written.
+        """
+
+        # The parts are compared rather than joined, and sections reused
+        # from the cache are the same strings, which compare at once
+        parts = list(parts)
+        if self.written.get(path) == (parts, _report_stamp(path)):
+            self.writes_skipped += 1
+            return False
+
+        _write_report(path, parts)
+        self.written[path] = (parts, _report_stamp(path))
+        return True
+
+    def _stale_users(self, task_store, now):
+
+        # Nothing can be reused from before the tasks were last loaded
+        if self.now is None or self.seq < task_store.loaded_seq:
+            return None
+
+        stale = {username
+                 for username, seq in task_store.user_changes.items()
+                 if seq > self.seq}
+
+        # Tasks due between the last report and this one have become
+        # overdue, or stopped being overdue if going back in time
+        if now != self.now:
+            start, end = sorted((self.now, now))
+            for task_id in task_store.stats.due_task_ids(start, end):
+                stale.add(task_store.tasks[task_id].username)
+        return stale
+
+
+def gen_reports(task_store, user_store, now=None, cache=None,
+                counts=None, file_format="text", usernames=None):
+    """
+    The function `gen_reports` writes both the task overview and the
+    user overview from one reading of the task store's counters, to
+    task_overview and user_overview files with the extension of the
+    format.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks to summarise
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    holding the users to report on
+    :type user_store: UserStore
+    :param now: The optional `now` parameter is the time the reports
+    are generated for, defaulting to the current time
+    :type now: datetime
+    :param cache: The optional `cache` parameter is a `ReportCache`
+    holding the reports last generated, from which the unchanged parts
+    are reused
+    :type cache: ReportCache
+    :param counts: The optional `counts` parameter is the result of
+    `TaskStore.counts` or `count_task_file` for `now`, in which case
+    `task_store` is not used and may be None
+    :type counts: tuple
+    :param file_format: The optional `file_format` parameter is "text",
+    "json" or "csv"
+    :type file_format: str
+    :param usernames: The optional `usernames` parameter is as for
+    `gen_user_overview`
+    :return: The function `gen_reports` returns the paths of the two
+    reports.
+    """
+
+    if file_format not in REPORT_EXTENSIONS:
+        raise ValueError(f"Unknown report format {file_format}")
+    if now is None:
+        now = datetime.today()
+
+    # Unknown users are refused before either report is written
+    usernames = _report_usernames(user_store, usernames)
+
+    # With a cache, only the overall counters and those of users whose
+    # sections are out of date are read
+    if counts is None:
+        counts = task_store.counts(now) if cache is None \
+            else (task_store.stats.counts(now), None)
+    extension = REPORT_EXTENSIONS[file_format]
+    paths = (f"task_overview.{extension}", f"user_overview.{extension}")
+    gen_task_overview(task_store, paths[0], now=now, counts=counts,
+                      cache=cache, file_format=file_format)
+    gen_user_overview(task_store, user_store, paths[1], now=now,
+                      counts=counts, cache=cache, file_format=file_format,
+                      usernames=usernames)
+    return paths
+
+
+def gen_task_overview(task_store, path="task_overview.txt", now=None,
+                      counts=None, cache=None, file_format="text"):
+    """
+    The function `gen_task_overview` generates a summary of task
+    completion status and writes it to a text, JSON or CSV file.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks to summarise
+    :type task_store: TaskStore
+    :param path: The `path` parameter is the location of the report
+    :type path: str
+    :param now: The optional `now` parameter is the time the report is
+    generated for, defaulting to the current time
+    :type now: datetime
+    :param counts: The optional `counts` parameter is the result of
+    `TaskStore.counts` for `now`, read here if not given
+    :type counts: tuple
+    :param cache: The optional `cache` parameter is a `ReportCache`,
+    through which the report is only written if it has changed
+    :type cache: ReportCache
+    :param file_format: The optional `file_format` parameter is "text",
+    "json" or "csv"
+    :type file_format: str
+    """
+
+    if file_format not in REPORT_EXTENSIONS:
+        raise ValueError(f"Unknown report format {file_format}")
+    if now is None:
+        now = datetime.today()
+    totals = counts[0] if counts is not None \
+        else task_store.stats.counts(now)
+
+    # Retrieve the overall variables
+    total_tasks = totals.total
+    completed_tasks = totals.completed
+    uncompleted_tasks = totals.uncompleted
+    overdue_tasks = totals.overdue
+
+    # Calculate percentages for each variable
+    try:
+        pc_complete = (completed_tasks / total_tasks) * 100
+        pc_incomplete = (uncompleted_tasks / total_tasks) * 100
+        pc_overdue = (overdue_tasks / total_tasks) * 100
+
+    # If there are no tasks at all, set all percentages to 0
+    except ZeroDivisionError:
+        pc_complete = pc_incomplete = pc_overdue = 0
+
+    # Write information to the file in the chosen format
+    date_time = now.strftime(DATETIME_STRING_FORMAT + " %H:%M")
+    if file_format == "text":
+        parts = [
+            "TASK OVERVIEW\n" + date_time + "\n" + "_" * 13 + "\n" +
+            f"\nTotal number of tasks = {total_tasks}" +
+            "\nTotal number of completed tasks = "
+            f"{completed_tasks} ({pc_complete:.1f}%)" +
+            "\nTotal number of uncompleted tasks = "
+            f"{uncompleted_tasks} ({pc_incomplete:.1f}%)" +
+            f"\nTotal number of overdue tasks = {overdue_tasks} "
+            f"({pc_overdue:.1f}%)"]
+    else:
+        row = (date_time, total_tasks, completed_tasks, uncompleted_tasks,
+               overdue_tasks, round(pc_complete, 1), round(pc_incomplete, 1),
+               round(pc_overdue, 1))
+        if file_format == "json":
+            parts = [json.dumps({"report": "task_overview",
+                                 **dict(zip(TASK_OVERVIEW_FIELDS, row))}) +
+                     "\n"]
+        else:
+            parts = _csv_lines([TASK_OVERVIEW_FIELDS, row])
+
+    if cache is None:
+        _write_report(path, parts)
+    else:
+        cache.write(path, parts)
+
+
+def gen_user_overview(task_store, user_store, path="user_overview.txt",
+                      now=None, counts=None, cache=None, file_format="text",
+                      usernames=None):
+    """
+    The function `gen_user_overview` generates a detailed overview of
+    tasks assigned to each user, including completion status and
+    overdue tasks, and writes this information to a text, JSON or CSV
+    file. The sections of users are written out as they are worked out,
+    rather than gathered into one string first.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks to summarise
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    holding the users to report on
+    :type user_store: UserStore
+    :param path: The `path` parameter is the location of the report
+    :type path: str
+    :param now: The optional `now` parameter is the time the report is
+    generated for, defaulting to the current time
+    :type now: datetime
+    :param counts: The optional `counts` parameter is the result of
+    `TaskStore.counts` for `now`, read here if not given
+    :type counts: tuple
+    :param cache: The optional `cache` parameter is a `ReportCache`,
+    from which the text sections of users whose tasks have not changed
+    are reused and through which the report is only written if it has
+    changed
+    :type cache: ReportCache
+    :param file_format: The optional `file_format` parameter is "text",
+    "json" or "csv"
+    :type file_format: str
+    :param usernames: The optional `usernames` parameter is an iterable
+    of the users to report on, by default every user. The totals are
+    still those of every user.
+    """
+
+    if file_format not in REPORT_EXTENSIONS:
+        raise ValueError(f"Unknown report format {file_format}")
+    if now is None:
+        now = datetime.today()
+    if counts is None:
+        counts = task_store.counts(now) if cache is None \
+            else (task_store.stats.counts(now), None)
+    totals, user_counts = counts
+    usernames = _report_usernames(user_store, usernames)
+
+    # Retrieve the total number of users and tasks
+    total_users = len(user_store)
+    total_tasks = totals.total
+    date_time = now.strftime(DATETIME_STRING_FORMAT + " %H:%M")
+
+    # Work out the section for each user, with users without any tasks
+    # sharing a set of zero counts
+    if file_format == "text":
+        if cache is None:
+            no_tasks = TaskCounts()
+            sections = (_user_section(current_user,
+                                      user_counts.get(current_user,
+                                                      no_tasks),
+                                      total_tasks)
+                        for current_user in usernames)
+        else:
+            sections = cache.user_sections(task_store, user_store, now,
+                                           total_tasks, usernames)
+
+        parts = chain([
+            "USER OVERVIEW\n" + date_time + "\n" + "_" * 13 + "\n",
+            f"\nTotal number of users = {total_users}",
+            f"\nTotal number of tasks = {total_tasks}"], sections)
+    else:
+        rows = (_user_row(current_user,
+                          _counts_for(task_store, user_counts, current_user,
+                                      now),
+                          total_tasks)
+                for current_user in usernames)
+        if file_format == "json":
+            header = {"report": "user_overview", "generated": date_time,
+                      "total_users": total_users, "total_tasks": total_tasks}
+            parts = _json_report(header, "users",
+                                 (dict(zip(USER_OVERVIEW_FIELDS, row))
+                                  for row in rows))
+        else:
+            parts = _csv_lines(chain([USER_OVERVIEW_FIELDS], rows))
+
+    if cache is None:
+        _write_report(path, parts)
+    else:
+        cache.write(path, parts)
+
+
+def _report_usernames(user_store, usernames):
+    if usernames is None:
+        return sorted(user_store)
+    usernames = sorted(set(usernames))
+    for username in usernames:
+        if username not in user_store:
+            raise ValueError(f"User {username} does not exist")
+    return usernames
+
+
+def _counts_for(task_store, user_counts, username, now):
+
+    # With a cache the per-user counters are read only as needed
+    if user_counts is not None:
+        counts = user_counts.get(username)
+    else:
+        user_stats = task_store.user_stats.get(username)
+        counts = None if user_stats is None else user_stats.counts(now)
+    return TaskCounts() if counts is None else counts
+
+
+def _user_row(current_user, counts, total_tasks):
+    user_total_tasks = counts.total
+
+    def percent(count, total):
+        return round(count / total * 100, 1) if total else 0.0
+
+    return (current_user, user_total_tasks,
+            percent(user_total_tasks, total_tasks),
+            counts.completed, percent(counts.completed, user_total_tasks),
+            counts.uncompleted,
+            percent(counts.uncompleted, user_total_tasks),
+            counts.overdue, percent(counts.overdue, user_total_tasks))
+
+
+def _user_section(current_user, counts, total_tasks):
+    user_total_tasks = counts.total
+    completed_tasks = counts.completed
+    uncompleted_tasks = counts.uncompleted
+    overdue_tasks = counts.overdue
+
+    # Calculate percentages for each variable
+    try:
+        pc_assigned = (user_total_tasks / total_tasks) * 100
+        pc_completed = (completed_tasks / user_total_tasks) * 100
+        pc_uncompleted = (uncompleted_tasks / user_total_tasks) * 100
+        pc_overdue = (overdue_tasks / user_total_tasks) * 100
+
+    # If user has no tasks assigned, set all percentages to 0
+    except ZeroDivisionError:
+        pc_assigned = pc_completed = pc_uncompleted = pc_overdue = 0
+
+    return (f"\n\n> {current_user}" +
+            "\nNumber of tasks assigned: "
+            f"{user_total_tasks} ({pc_assigned:.1f}%)" +
+            "\nNumber of assigned tasks completed: "
+            f"{completed_tasks} ({pc_completed:.1f}%)" +
+            "\nNumber of assigned tasks uncompleted: "
+            f"{uncompleted_tasks} ({pc_uncompleted:.1f}%)" +
+            "\nNumber of assigned tasks overdue: "
+            f"{overdue_tasks} ({pc_overdue:.1f}%)")
+
+
+def _write_report(path, parts):
+
+    # Write the report to a temporary file, in large blocks, and then
+    # put it in place of the old one, so that a reader sees either the
+    # old report or the new one and never a partly written report
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8",
+                  buffering=REPORT_BUFFER_SIZE) as report_file:
+            report_file.writelines(parts)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _json_report(header, rows_name, rows):
+
+    # The rows are written one at a time inside the header object
+    yield json.dumps(header)[:-1] + f", {json.dumps(rows_name)}: ["
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(row)
+        separator = ", "
+    yield "]}\n"
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _report_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
@@ -2,6 +2,9 @@
 The Python script provides functionality for task management, user 
 registration, task assignment, viewing tasks, editing tasks, generating 
 task reports, and displaying statistics.
+
+The tasks and users themselves are managed by the `task_engine` module;
+this script provides the interactive login and menu on top of it.
 """
 
 # Notes:
@@ -13,21 +16,68 @@ task reports, and displaying statistics.
 # files.
 
 # =====Importing Libraries=====
+import argparse
+import asyncio
+import builtins
+import json
 import os
-from datetime import datetime, date
-
-
-def reg_user():
+import sys
+from datetime import datetime, timedelta
+
+import task_engine
+from task_engine import (DATETIME_STRING_FORMAT, ConflictError,
+                         PasswordHasher, ReportCache, Task, TaskStore,
+                         TextIndex, UserStore, count_task_database,
+                         count_task_file, gen_reports)
+from task_profile import Profiler
+from task_server import TaskServer
+from task_storage import (BinaryBackend, ChangeFeed, SqliteBackend,
+                          TaskArchive, TextBackend, import_text,
+                          read_task_rows, write_task_rows)
+
+# Number of tasks shown on each page of "View all tasks"
+TASKS_PER_PAGE = 10
+
+# Line printed above and below each task
+TASK_SEPARATOR = "_ " * 50
+
+# Message shown when a task was changed by someone else while being
+# edited
+CONFLICT_MESSAGE = ("Task was changed by another user - please review "
+                    "it and try again.")
+
+# Completed tasks due more than this many days ago are archived by the
+# archive command, unless a date is given
+ARCHIVE_AFTER_DAYS = 90
+
+# Environment variables which turn on profiling, like --profile and
+# --profile-output, and the values of the first which turn it on
+PROFILE_ENV = "TASK_MANAGER_PROFILE"
+PROFILE_OUTPUT_ENV = "TASK_MANAGER_PROFILE_OUTPUT"
+PROFILE_ENV_ON = ("1", "true", "yes", "on")
+
+
+def reg_user(user_store: UserStore):
     """
     The function `reg_user` registers a new user by prompting for a 
     unique username and password, checking for existing usernames, and 
     storing the credentials in a file.
+
+    :param user_store: The `user_store` parameter is the `UserStore`
+    holding the registered users
+    :type user_store: UserStore
     """
 
-    # Request new username and check that it doesn't already exist
+    # Request new username and check that it can be stored and doesn't
+    # already exist
     while True:
         new_username = input("\nNew Username: ")
-        if new_username not in username_password:
+        try:
+            UserStore.check_username(new_username)
+        except ValueError as error:
+            print(f"{error}.")
+            continue
+        if new_username not in user_store:
             break
         print("Already in use! Please choose a different username.")
 
@@ -41,35 +91,38 @@ def reg_user():
         # Check if the new password and confirmed password are the same
         if new_password == confirm_password:
 
-            # If they are the same, add them to the user dictionary and
-            # .txt file
+            # If they are the same, add them to the user store, unless
+            # someone else has registered the username in the meantime
+            try:
+                user_store.add(new_username, new_password)
+            except ValueError:
+                print("Already in use! Please choose a different username.")
+                break
             print("New user added.")
-            username_password[new_username] = new_password
-
-            with open("user.txt", "w", encoding="utf-8") as out_file:
-                user_data = []
-                for key, value in username_password.items():
-                    user_data.append(f"{key};{value}")
-                out_file.write("\n".join(user_data))
-
             break
 
         # Otherwise print relevant message
         print("Passwords do not match.")
 
 
-def add_task():
+def add_task(task_store: TaskStore, user_store: UserStore):
     """
     The `add_task` function in Python prompts the user to input details 
-    of a task, validates the input, and adds the task to a list and a 
-    text file.
+    of a task, validates the input, and adds the task to the task store.
+
+    :param task_store: The `task_store` parameter is the `TaskStore` to
+    which the task is added
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    used to check the username
+    :type user_store: UserStore
     """
 
     # Request username of person to whom this task will be assigned and
     # check that it exists
     while True:
         task_username = input("\nName of person assigned to task: ")
-        if task_username in username_password:
+        if task_username in user_store:
             break
         print("User does not exist. Please enter a valid username.")
 
@@ -88,54 +141,234 @@ def add_task():
         except ValueError:
             print("Invalid datetime format. Please use the format specified.")
 
-    # Retrieve the current date
-    curr_date = date.today()
-
-    # Add the data to the task list and the .txt file
-    new_task = {
-        "username": task_username,
-        "title": task_title,
-        "description": task_description,
-        "due_date": due_date_time,
-        "assigned_date": curr_date,
-        "completed": False
-    }
-    task_list.append(new_task)
-    update_task_file()
+    # Add the task to the task store
+    try:
+        task_store.add(task_username, task_title, task_description,
+                       due_date_time)
+    except ValueError as error:
+        print(f"Task not added: {error}.")
+        return
     print("Task successfully added.")
 
 
-def view_all():
+def view_all(task_store: TaskStore, user_store: UserStore,
+             page_size=TASKS_PER_PAGE):
     """
-    The `view_all` function prints all tasks with an identifying number 
-    and a message if there are no tasks.
+    The `view_all` function prints tasks with an identifying number one
+    page at a time, optionally filtered, and a message if there are no
+    tasks. Only the tasks on the current page are formatted.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    used to check a username filter
+    :type user_store: UserStore
+    :param page_size: The optional `page_size` parameter is the number
+    of tasks shown on each page
+    :type page_size: int
     """
 
-    # Print all tasks with an identifying number
-    for task_id, task in enumerate(task_list):
-        print_task(task_id, task)
+    filters = {}
+    offset = 0
 
-    # If there are no tasks, print relevant message and break out of
-    # loop
-    if not task_list:
-        print("\nThere are no tasks currently.")
+    while True:
+        # Fetch one more task than fits on the page to find out whether
+        # there is a next page
+        page = task_store.query(offset=offset, limit=page_size + 1,
+                                **filters)
+        has_next_page = len(page) > page_size
+        page = page[:page_size]
+
+        # Print the page in one write, or a relevant message if there
+        # are no tasks
+        if page:
+            sys.stdout.write("".join(render_task(task_id, task)
+                                     for task_id, task in page))
+            print(f"\nShowing tasks {offset + 1} to {offset + len(page)}.")
+        elif filters:
+            print("\nNo tasks match the filters.")
+        else:
+            print("\nThere are no tasks currently.")
+            break
+
+        # Request a selection from the user
+        options = ""
+        if has_next_page:
+            options += "n - Next page\n"
+        if offset:
+            options += "p - Previous page\n"
+        view_choice = input("\nSelect one of the following options:\n"
+                            f"{options}f - Filter tasks\n"
+                            "-1 - Return to the main menu\n: ").lower()
+
+        if view_choice == "n" and has_next_page:
+            offset += page_size
+        elif view_choice == "p" and offset:
+            offset = max(offset - page_size, 0)
+        elif view_choice == "f":
+            filters = request_filters(user_store)
+            offset = 0
+        elif view_choice == "-1":
+            break
+        else:
+            print("Invalid input - please try again.")
 
 
-def view_mine():
+def request_filters(user_store: UserStore):
     """
-    The `view_mine` function allows a user to view and interact with 
-    tasks assigned to them, including marking tasks as complete and 
-    editing tasks if they are not already completed.
+    The function `request_filters` asks the user which tasks to show in
+    `view_all`. Leaving an answer blank leaves that filter off.
+
+    :param user_store: The `user_store` parameter is the `UserStore`
+    used to check the username
+    :type user_store: UserStore
+    :return: The function `request_filters` returns a dictionary of
+    keyword arguments for `TaskStore.query`.
     """
 
+    filters = {}
+
     while True:
-        # Print all tasks assigned to the current user and add task ids
-        # to a list
-        my_task_ids = []
-        for task_id, task in enumerate(task_list):
-            if task["username"] == curr_user:
-                print_task(task_id, task)
-                my_task_ids.append(task_id)
+        username = input("\nShow tasks for username (blank for all): ")
+        if username == "" or username in user_store:
+            break
+        print("User does not exist. Please enter a valid username.")
+    if username:
+        filters["username"] = username
+
+    completed = input("Show completed tasks only (y), uncompleted only (n) "
+                      "or both (blank): ").lower()
+    if completed in ("y", "n"):
+        filters["completed"] = completed == "y"
+
+    if input("Show overdue tasks only (y/n): ").lower() == "y":
+        filters["overdue_as_of"] = datetime.today()
+
+    # Request the due date range and ensure it is in correct format
+    for key, prompt in (("due_from", "Due on or after"),
+                        ("due_to", "Due on or before")):
+        while True:
+            due_date = input(f"{prompt} (YYYY-MM-DD, blank for any): ")
+            if due_date == "":
+                break
+            try:
+                filters[key] = datetime.strptime(due_date,
+                                                 DATETIME_STRING_FORMAT)
+                break
+            except ValueError:
+                print("Invalid datetime format. Please use the format "
+                      "specified.")
+
+    return filters
+
+
+def view_due(task_store: TaskStore, user_store: UserStore):
+    """
+    The function `view_due` shows the uncompleted tasks which are
+    overdue and those due within a chosen number of days, for one user
+    or for everyone, read from the task store's due date index.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    used to check the username
+    :type user_store: UserStore
+    """
+
+    while True:
+        username = input("\nShow tasks for username (blank for all): ")
+        if username == "" or username in user_store:
+            break
+        print("User does not exist. Please enter a valid username.")
+
+    while True:
+        days = input("Show tasks due in the next how many days: ")
+        if days.isnumeric():
+            days = int(days)
+            break
+        print("Invalid input - please enter a number of days.")
+
+    # Use one moment for both lists, so no task appears in both
+    now = datetime.today()
+    for heading, tasks in (
+            ("Overdue tasks", task_store.overdue(now, username or None)),
+            (f"Tasks due in the next {days} days",
+             task_store.due_within(days, now, username or None))):
+        print(f"\n{heading}: {len(tasks)}")
+        sys.stdout.write("".join(render_task(task_id, task)
+                                 for task_id, task in tasks))
+
+
+def search_tasks(task_store: TaskStore, user_store: UserStore,
+                 page_size=TASKS_PER_PAGE):
+    """
+    The function `search_tasks` finds tasks by words in their title or
+    description, optionally for one user or by completion, and shows
+    the first page of matches.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    used to check the username
+    :type user_store: UserStore
+    :param page_size: The optional `page_size` parameter is the most
+    tasks shown
+    :type page_size: int
+    """
+
+    while True:
+        query = input("\nSearch for (words, word* for words starting "
+                      "with it, OR between alternatives): ")
+        if TextIndex.words(query):
+            break
+        print("Please enter at least one word.")
+
+    while True:
+        username = input("Show tasks for username (blank for all): ")
+        if username == "" or username in user_store:
+            break
+        print("User does not exist. Please enter a valid username.")
+
+    completed = input("Show completed tasks only (y), uncompleted only (n) "
+                      "or both (blank): ").lower()
+    completed = completed == "y" if completed in ("y", "n") else None
+
+    total, tasks = task_store.search(query, username or None, completed,
+                                     limit=page_size)
+    print(f"\nTasks found: {total}")
+    sys.stdout.write("".join(render_task(task_id, task)
+                             for task_id, task in tasks))
+    if total > len(tasks):
+        print(f"\nShowing the first {len(tasks)} tasks found.")
+
+
+def view_mine(task_store: TaskStore, user_store: UserStore, curr_user: str):
+    """
+    The `view_mine` function allows a user to view and interact with
+    tasks assigned to them, including marking tasks as complete,
+    editing tasks if they are not already completed and deleting tasks.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    used when reassigning a task
+    :type user_store: UserStore
+    :param curr_user: The `curr_user` parameter is the username of the
+    logged in user
+    :type curr_user: str
+    """
+
+    while True:
+        # Print all tasks assigned to the current user, looked up through
+        # the store's per-user index
+        my_tasks = task_store.query(username=curr_user)
+        sys.stdout.write("".join(render_task(task_id, task)
+                                 for task_id, task in my_tasks))
+        my_task_ids = {task_id for task_id, _ in my_tasks}
 
         # If no tasks are assigned, print relevant message and break out
         # of loop
@@ -151,30 +384,37 @@ Or for the main menu, type '-1'.
         # If selection is one of the user's assigned tasks, provide
         # options for the user to choose
         if task_choice.isnumeric() and int(task_choice) in my_task_ids:
-            print_task(task_choice, task_list[int(task_choice)])
+            task_id = int(task_choice)
+
+            # Remember which version of the task was shown, so that a
+            # change is refused if someone else changes it meanwhile
+            version = task_store.version(task_id)
+            print_task(task_id, task_store.get(task_id))
             while True:
                 user_choice = input("""\nSelect one of the following options:
 m - Mark as complete
 e - Edit task
+d - Delete task
 t - Select a different task
 : """).lower()
 
                 if user_choice == "m":
 
-                    # Mark task as complete and update task file
-                    # accordingly
-                    task_list[int(task_choice)]["completed"] = True
-                    update_task_file()
+                    # Mark task as complete
+                    try:
+                        task_store.complete(task_id, version)
+                    except ConflictError:
+                        print(CONFLICT_MESSAGE)
+                        break
                     print("Task marked as complete.")
                     break
 
                 if user_choice == "e" and not \
-                        task_list[int(task_choice)]["completed"]:
+                        task_store.get(task_id).completed:
 
-                    # Run edit function and - when completed - update
-                    # task file accordingly
-                    edit_task(task_list[int(task_choice)])
-                    update_task_file()
+                    # Run edit function, which records the change in the
+                    # task store
+                    edit_task(task_store, user_store, task_id, version)
                     break
 
                 if user_choice == "e":
@@ -184,6 +424,18 @@ t - Select a different task
                     print("Task completed - unavailable for editing.")
                     break
 
+                if user_choice == "d":
+
+                    # Delete the task, leaving the IDs of the others as
+                    # they are
+                    try:
+                        task_store.delete(task_id, version)
+                    except ConflictError:
+                        print(CONFLICT_MESSAGE)
+                        break
+                    print("Task deleted.")
+                    break
+
                 if user_choice == "t":
 
                     # If user changes their mind, break out of loop
@@ -199,50 +451,68 @@ t - Select a different task
             print("Invalid input - please try again.")
 
 
-def print_task(task_id, task: dict):
+def render_task(task_id, task: Task):
     """
-    The function `print_task` takes a task ID and a dictionary 
-    representing a task, then prints formatted information about the 
-    task.
+    The function `render_task` takes a task ID and a `Task`, then builds
+    formatted information about the task, framed by separator lines.
     
     :param task_id: The `task_id` parameter is the identifier or unique 
     number associated with a specific task. It is used to distinguish 
     one task from another in a task management system or similar 
     application
-    :param task: The `task` parameter is a dictionary containing 
-    information about a specific task. It likely includes keys such as 
-    "title", "username", "assigned_date", "due_date", and "description" 
-    to store details about the task. The function `print_task` takes 
-    this dictionary along with a `task
-    :type task: dict
+    :param task: The `task` parameter is a `Task` holding the title,
+    username, assigned date, due date and description of the task
+    :type task: Task
+    :return: The function `render_task` returns the formatted text,
+    ending with a newline.
     """
 
-    # Build a string which displays all the task information
-    disp_str = f"Task: \t\t {task['title']}\n"
-    disp_str += f"Assigned to: \t {task['username']}\n"
-    disp_str += ("Date Assigned: \t "
-                 f"{task['assigned_date'].strftime(DATETIME_STRING_FORMAT)}\n")
-    disp_str += ("Due Date: \t "
-                 f"{task['due_date'].strftime(DATETIME_STRING_FORMAT)}\n")
-    disp_str += f"Task Description: \n {task['description']}"
+    return (f"{TASK_SEPARATOR}\n"
+            f"\nTask ID: {task_id}\n"
+            f"Task: \t\t {task.title}\n"
+            f"Assigned to: \t {task.username}\n"
+            "Date Assigned: \t "
+            f"{task.assigned_date.strftime(DATETIME_STRING_FORMAT)}\n"
+            "Due Date: \t "
+            f"{task.due_date.strftime(DATETIME_STRING_FORMAT)}\n"
+            f"Task Description: \n {task.description}\n"
+            f"{TASK_SEPARATOR}\n")
+
+
+def print_task(task_id, task: Task):
+    """
+    The function `print_task` takes a task ID and a `Task`, then prints
+    formatted information about the task.
+
+    :param task_id: The `task_id` parameter is the identifier of the task
+    :param task: The `task` parameter is the `Task` to print
+    :type task: Task
+    """
 
-    # Print this information along with corresponding task id
-    print("_ " * 50)
-    print(f"\nTask ID: {task_id}\n" + disp_str)
-    print("_ " * 50)
+    sys.stdout.write(render_task(task_id, task))
 
 
-def edit_task(task: dict):
+def edit_task(task_store: TaskStore, user_store: UserStore, task_id: int,
+              version: int = None):
     """
     The function `edit_task` allows the user to reassign a task to a 
     different user or edit the due date of the task.
     
-    :param task: The provided code snippet defines a function 
-    `edit_task` that allows the user to edit specific details of a task 
-    stored in a dictionary. The function prompts the user to select an 
-    editing option ('r' for reassigning the task or 'd' for editing the 
-    due date) and then performs the option.
-    :type task: dict
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the task
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    used to check the new username
+    :type user_store: UserStore
+    :param task_id: The `task_id` parameter is the ID of the task to
+    edit. The function prompts the user to select an editing option
+    ('r' for reassigning the task or 'd' for editing the due date) and
+    then performs the option.
+    :type task_id: int
+    :param version: The optional `version` parameter is the version of
+    the task shown to the user, so that the change is refused if the
+    task has since been changed by someone else
+    :type version: int
     """
 
     while True:
@@ -258,10 +528,14 @@ d - Edit due date
                 # and check that it exists
                 new_user = input("\nEnter the new username for this task: ")
 
-                if new_user in username_password:
+                if new_user in user_store:
 
-                    # Update dictionary for this task
-                    task["username"] = new_user
+                    # Update the task
+                    try:
+                        task_store.reassign(task_id, new_user, version)
+                    except ConflictError:
+                        print(CONFLICT_MESSAGE)
+                        break
                     print(f"Task reassigned to {new_user}.")
                     break
 
@@ -283,342 +557,485 @@ d - Edit due date
                     print("Invalid datetime format. Please use the format "
                           "specified.")
 
-            # Update dictionary for this task
-            task["due_date"] = new_date_time
+            # Update the task
+            try:
+                task_store.set_due_date(task_id, new_date_time, version)
+            except ConflictError:
+                print(CONFLICT_MESSAGE)
+                break
             print("Due date successfully updated.")
             break
 
         print("Invalid input - please try again.")
 
 
-def update_task_file():
+def display_stats(task_store: TaskStore, user_store: UserStore):
     """
-    The function `update_task_file` writes task information to a text 
-    file in a specific format.
+    The `display_stats` function displays the number of users and tasks
+    using the counters kept up to date by the user and task stores,
+    along with the throughput of the last task load.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    holding the users
+    :type user_store: UserStore
     """
 
-    with open("tasks.txt", "w", encoding="utf-8") as file:
-
-        # For each task, create an attributes list containing
-        # information for the .txt file
-        task_list_to_write = []
-        for task in task_list:
-            str_attrs = [
-                task["username"],
-                task["title"],
-                task["description"],
-                task["due_date"].strftime(DATETIME_STRING_FORMAT),
-                task["assigned_date"].strftime(DATETIME_STRING_FORMAT),
-                "Yes" if task["completed"] else "No"
-            ]
+    # Read the number of users and tasks from the stores
+    num_users = len(user_store)
+    num_tasks = task_store.stats.total
+    num_completed = task_store.stats.completed
+    num_archived = task_store.stats.archived
+    load_rate = task_store.load_stats.rows_per_second
 
-            # Join the attributes with semi-colons and add this string
-            # to a new list
-            task_list_to_write.append(";".join(str_attrs))
-
-        # Write the string for each task on a separate line in the .txt
-        # file
-        file.write("\n".join(task_list_to_write))
+    # Display statistics
+    print("\n-----------------------------------")
+    print(f"Number of users: \t\t {num_users}")
+    print(f"Number of tasks: \t\t {num_tasks}")
+    print(f"Number of completed tasks: \t {num_completed}")
+    print(f"Number of archived tasks: \t {num_archived}")
+    print(f"Load throughput: \t\t {load_rate:,.0f} rows/s")
+    print("-----------------------------------")
 
 
-def gen_task_overview():
+def login(user_store: UserStore):
     """
-    The function `gen_task_overview` generates a summary of task 
-    completion status and writes it to a text file.
+    The function `login` requests a username and password until a
+    registered user logs in successfully.
+
+    :param user_store: The `user_store` parameter is the `UserStore`
+    holding the registered users
+    :type user_store: UserStore
+    :return: The function `login` returns the username of the user who
+    logged in.
     """
 
-    # Set variables to 0
-    completed_tasks = 0
-    uncompleted_tasks = 0
-    overdue_tasks = 0
-
-    # For each task, update variables accordingly
-    for task in task_list:
-        if task["completed"]:
-            completed_tasks += 1
-        elif datetime.today() > task["due_date"]:
-            uncompleted_tasks += 1
-            overdue_tasks += 1
-        else:
-            uncompleted_tasks += 1
-
-    # Retrieve the total number of tasks
-    total_tasks = len(task_list)
+    while True:
+        print("\nLOGIN")
+        curr_user = input("Username: ")
+        curr_pass = input("Password: ")
 
-    # Calculate percentages for each variable
-    try:
-        pc_complete = (completed_tasks / total_tasks) * 100
-        pc_incomplete = (uncompleted_tasks / total_tasks) * 100
-        pc_overdue = (overdue_tasks / total_tasks) * 100
-
-    # If there are no tasks at all, set all percentages to 0
-    except ZeroDivisionError:
-        pc_complete = pc_incomplete = pc_overdue = 0
-
-    # Write information to .txt file
-    date_time = datetime.today().strftime(DATETIME_STRING_FORMAT + " %H:%M")
-
-    with open("task_overview.txt", "w", encoding="utf-8") as report_file:
-        report_file.write("TASK OVERVIEW\n" + date_time + "\n" + "_" * 13 +
-                          "\n")
-        report_file.write(f"\nTotal number of tasks = {total_tasks}")
-        report_file.write("\nTotal number of completed tasks = "
-                          f"{completed_tasks} ({pc_complete:.1f}%)")
-        report_file.write("\nTotal number of uncompleted tasks = "
-                          f"{uncompleted_tasks} ({pc_incomplete:.1f}%)")
-        report_file.write(f"\nTotal number of overdue tasks = {overdue_tasks} "
-                          f"({pc_overdue:.1f}%)")
-
-
-def gen_user_overview():
-    """
-    The function `gen_user_overview` generates a detailed overview of 
-    tasks assigned to each user, including completion status and 
-    overdue tasks, and writes this information to a text file.
-    """
-
-    # Retrieve the total number of users and tasks
-    total_users = len(username_password)
-    total_tasks = len(task_list)
-
-    # Write general information to .txt file
-    date_time = datetime.today().strftime(DATETIME_STRING_FORMAT + " %H:%M")
-
-    with open("user_overview.txt", "w", encoding="utf-8") as report_file:
-        report_file.write("USER OVERVIEW\n" + date_time + "\n" + "_" * 13 +
-                          "\n")
-        report_file.write(f"\nTotal number of users = {total_users}")
-        report_file.write(f"\nTotal number of tasks = {total_tasks}")
-
-        # Perform calculations for each user
-        for current_user in sorted(username_password):
-
-            # Create a list of tasks assigned to the current user in the
-            # loop
-            user_task_list = [task for task in task_list if task["username"]
-                              == current_user]
-
-            # Retrieve total number of tasks for that user
-            user_total_tasks = len(user_task_list)
-
-            # Set variables to 0
-            completed_tasks = 0
-            uncompleted_tasks = 0
-            overdue_tasks = 0
-
-            # For each task, update variables accordingly
-            for user_task in user_task_list:
-                if user_task["completed"]:
-                    completed_tasks += 1
-                elif datetime.today() > user_task["due_date"]:
-                    uncompleted_tasks += 1
-                    overdue_tasks += 1
-                else:
-                    uncompleted_tasks += 1
-
-            # Calculate percentages for each variable
-            try:
-                pc_assigned = (user_total_tasks / total_tasks) * 100
-                pc_completed = (completed_tasks / user_total_tasks) * 100
-                pc_uncompleted = (uncompleted_tasks / user_total_tasks) * 100
-                pc_overdue = (overdue_tasks / user_total_tasks) * 100
+        # Check that username exists
+        if curr_user not in user_store:
+            print("User does not exist")
+            continue
 
-            # If user has no tasks assigned, set all percentages to 0
-            except ZeroDivisionError:
-                pc_assigned = pc_completed = pc_uncompleted = pc_overdue = 0
+        # Check that password matches
+        if not user_store.check_password(curr_user, curr_pass):
+            print("Wrong password")
+            continue
 
-            # Write specific information for current user in loop to
-            # .txt file
-            report_file.write(f"\n\n> {current_user}")
-            report_file.write("\nNumber of tasks assigned: "
-                              f"{user_total_tasks} ({pc_assigned:.1f}%)")
-            report_file.write("\nNumber of assigned tasks completed: "
-                              f"{completed_tasks} ({pc_completed:.1f}%)")
-            report_file.write("\nNumber of assigned tasks uncompleted: "
-                              f"{uncompleted_tasks} ({pc_uncompleted:.1f}%)")
-            report_file.write("\nNumber of assigned tasks overdue: "
-                              f"{overdue_tasks} ({pc_overdue:.1f}%)")
+        # If checks pass, exit loop
+        print("Login Successful!")
+        return curr_user
 
 
-def create_taskfile():
+def import_tasks(task_store: TaskStore, path: str, file_format: str):
     """
-    The function `create_taskfile` creates a new file named "tasks.txt" 
-    if it does not already exist.
+    The function `import_tasks` adds every valid task in a CSV or JSON
+    lines file to the task store in one batch, and reports the rows
+    which could not be imported.
+
+    :param task_store: The `task_store` parameter is the `TaskStore` to
+    which the tasks are added
+    :type task_store: TaskStore
+    :param path: The `path` parameter is the location of the file
+    :type path: str
+    :param file_format: The `file_format` parameter is "csv" or "jsonl"
+    :type file_format: str
+    :return: The function `import_tasks` returns the number of rows
+    which could not be imported.
     """
 
-    if not os.path.exists("tasks.txt"):
-        with open("tasks.txt", "w", encoding="utf-8"):
-            pass
+    task_ids, errors = task_store.add_many(read_task_rows(path, file_format))
 
+    # Report any rows which were skipped
+    for row_number, message in errors:
+        print(f"Row {row_number}: {message}", file=sys.stderr)
+    print(f"Imported {len(task_ids)} tasks from {path}, "
+          f"{len(errors)} rows skipped.")
+    return len(errors)
 
-def create_userfile():
+
+def export_tasks(task_store: TaskStore, path: str, file_format: str):
     """
-    The function `create_userfile` creates a text file named "user.txt" 
-    with default user credentials if the file does not already exist.
+    The function `export_tasks` writes every task to a file, or to the
+    terminal if no file is given.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks
+    :type task_store: TaskStore
+    :param path: The `path` parameter is the location of the file, or
+    None to write to the terminal
+    :type path: str
+    :param file_format: The `file_format` parameter is "csv", "jsonl" or
+    "text"
+    :type file_format: str
     """
 
-    if not os.path.exists("user.txt"):
-        with open("user.txt", "w", encoding="utf-8") as default_file:
-            default_file.write("admin;password")
+    if path is None:
+        write_task_rows(sys.stdout, task_store.query(), file_format)
+        return
 
+    with open(path, "w", encoding="utf-8", newline="") as out_file:
+        write_task_rows(out_file, task_store.query(), file_format)
 
-def count_lines(file):
-    """
-    The function `count_lines` takes a file as input and returns the 
-    number of non-empty lines in the file.
-    
-    :param file: The `count_lines` function you provided takes a file 
-    object as input and counts the number of non-empty lines in the 
-    file. The function iterates over each line in the file and 
-    increments the `num_lines` counter if the line is not empty (i.e., 
-    not equal to "\n")
-    :return: The function `count_lines` returns the number of non-empty
-    lines in the file.
-    """
 
-    num_lines = 0
-    for line in file:
-        if line != "\n":
-            num_lines += 1
-    return num_lines
+def instrument(profiler: Profiler):
+    """
+    The function `instrument` has a profiler record the loaders, the
+    changes to tasks, the reports and each menu action. The time of a
+    menu action includes any time spent waiting for input, which is also
+    recorded on its own.
 
+    :param profiler: The `profiler` parameter is the `Profiler`
+    :type profiler: Profiler
+    """
 
-def display_stats():
+    module = sys.modules[__name__]
+    for owner, attribute, name in (
+            (UserStore, "load", "load users"),
+            (TaskStore, "load", "load tasks"),
+            (TaskStore, "refresh", "refresh"),
+            (TaskStore, "add", "add task"),
+            (TaskStore, "add_many", "add tasks"),
+            (TaskStore, "complete", "complete task"),
+            (TaskStore, "reassign", "reassign task"),
+            (TaskStore, "set_due_date", "change due date"),
+            (TaskStore, "delete", "delete task"),
+            (TaskStore, "archive_tasks", "archive tasks"),
+            (TaskStore, "compact", "compact"),
+            (TaskStore, "close", "close"),
+            (TaskStore, "search", "search"),
+            (task_engine, "gen_task_overview", "task overview"),
+            (task_engine, "gen_user_overview", "user overview"),
+            (module, "count_task_file", "count task file"),
+            (module, "count_task_database", "count task database"),
+            (module, "gen_reports", "generate reports"),
+            (module, "login", "login"),
+            (module, "reg_user", "menu r"),
+            (module, "add_task", "menu a"),
+            (module, "view_all", "menu va"),
+            (module, "view_mine", "menu vm"),
+            (module, "view_due", "menu dt"),
+            (module, "search_tasks", "menu s"),
+            (module, "display_stats", "menu ds"),
+            (module, "edit_task", "edit task"),
+            (builtins, "input", "waiting for input")):
+        profiler.instrument(owner, attribute, name)
+
+    # Reports are written straight to their files
+    profiler.instrument(
+        task_engine, "_write_report", "write report",
+        count_bytes=lambda path, parts: os.path.getsize(path)
+        if os.path.exists(path) else 0)
+
+
+def main():
     """
-    The `display_stats` function reads the number of users and tasks 
-    from text files and displays the statistics.
+    The function `main` reads the command line and runs the command
+    given, profiling it if asked to.
     """
 
-    # Create tasks.txt and user.txt if they don't exist
-    create_userfile()
-    create_taskfile()
+    parser = argparse.ArgumentParser(description="Task manager")
+    parser.add_argument("--storage", choices=["text", "binary", "sqlite"],
+                        default="text",
+                        help="keep tasks in tasks.txt (text), in a "
+                             "memory-mapped tasks.bin snapshot (binary) or "
+                             "in a tasks.db SQLite database (sqlite)")
+    parser.add_argument("--password-hash", default="scrypt",
+                        help="algorithm and cost parameters for hashing "
+                             "passwords, for example "
+                             "scrypt:n=16384,r=8,p=1 or "
+                             "pbkdf2:iterations=600000")
+    parser.add_argument("--profile", action="store_true",
+                        default=os.environ.get(PROFILE_ENV, "").strip()
+                        .lower() in PROFILE_ENV_ON,
+                        help="record calls, time and bytes written in the "
+                             "main operations and menu actions and print "
+                             "a summary on exit; bytes written by SQLite "
+                             f"are not counted (or set {PROFILE_ENV}=1)")
+    parser.add_argument("--profile-output",
+                        default=os.environ.get(PROFILE_OUTPUT_ENV) or None,
+                        help="also run under cProfile and write its "
+                             "statistics to this file, for the pstats "
+                             f"module (or set {PROFILE_OUTPUT_ENV})")
+    commands = parser.add_subparsers(dest="command")
+    import_parser = commands.add_parser(
+        "import", help="add tasks from a CSV or JSON lines file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"],
+                               help="file format, by default taken from "
+                                    "the file extension")
+    export_parser = commands.add_parser(
+        "export", help="write all tasks as CSV, JSON lines or text")
+    export_parser.add_argument("--format", choices=["csv", "jsonl", "text"],
+                               default="csv")
+    export_parser.add_argument("--output", help="file to write, by default "
+                                                "the terminal")
+    serve_parser = commands.add_parser(
+        "serve", help="serve the tasks as a JSON API over HTTP")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    reports_parser = commands.add_parser(
+        "reports", help="generate the overview reports and exit")
+    reports_parser.add_argument("--workers", type=int, default=1,
+                                help="number of processes counting "
+                                     "tasks.txt in parallel, with text "
+                                     "storage")
+    reports_parser.add_argument("--format", choices=["text", "json", "csv"],
+                                default="text",
+                                help="format of the reports, written to "
+                                     "task_overview and user_overview with "
+                                     "the format's extension")
+    reports_parser.add_argument("--users",
+                                help="comma separated users to include in "
+                                     "the user overview, by default all")
+    archive_parser = commands.add_parser(
+        "archive", help="move old completed tasks to compressed archive "
+                        "files in tasks_archive")
+    archive_parser.add_argument(
+        "--before", type=datetime.fromisoformat,
+        help="archive completed tasks due before this date (YYYY-MM-DD), "
+             f"by default {ARCHIVE_AFTER_DAYS} days ago")
+    events_parser = commands.add_parser(
+        "events", help="print the changes made to tasks as JSON lines, "
+                       "from the change feed in tasks_events.txt")
+    events_parser.add_argument("--since", type=int, default=0,
+                               help="sequence number of the last event "
+                                    "already read")
+    events_parser.add_argument("--limit", type=int,
+                               help="most events to print")
+    args = parser.parse_args()
+    if args.command == "events" and (
+            args.since < 0 or args.limit is not None and args.limit < 0):
+        parser.error("--since and --limit must not be negative")
+    try:
+        hasher = PasswordHasher.from_spec(args.password_hash)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.command == "reports":
+        if args.workers < 1:
+            parser.error("--workers must be at least 1")
+        if args.users is not None:
+            args.users = [username.strip()
+                          for username in args.users.split(",")
+                          if username.strip()]
+
+    # Profiling is off unless asked for, in which case the hot paths and
+    # menu actions are wrapped to record their calls
+    if not (args.profile or args.profile_output):
+        run_command(args, hasher)
+        return
+
+    profiler = Profiler()
+    instrument(profiler)
+    profiler.start(args.profile_output)
+    try:
+        run_command(args, hasher, profiler)
+    finally:
+        profiler.stop()
+        print(profiler.summary(), file=sys.stderr)
 
-    # Count number of users and tasks listed in the .txt files
-    with open("user.txt", "r", encoding="utf-8") as users:
-        num_users = count_lines(users)
 
-    with open("tasks.txt", "r", encoding="utf-8") as tasks:
-        num_tasks = count_lines(tasks)
+def run_command(args, hasher: PasswordHasher, profiler=None):
+    """
+    The function `run_command` loads the users and tasks and then
+    either runs a batch import or export, generates the reports,
+    archives old tasks, prints the change feed or runs the HTTP server
+    given on the command line, or logs a user in and presents the menu.
+
+    :param args: The `args` parameter holds the parsed command line
+    :type args: argparse.Namespace
+    :param hasher: The `hasher` parameter is the `PasswordHasher` for
+    new and changed passwords
+    :type hasher: PasswordHasher
+    :param profiler: The optional `profiler` parameter is a `Profiler`
+    which is told about the storage backend, the change feed and the
+    archive, to count bytes written
+    :type profiler: Profiler
+    """
 
-    # Display statistics
-    print("\n-----------------------------------")
-    print(f"Number of users: \t\t {num_users}")
-    print(f"Number of tasks: \t\t {num_tasks}")
-    print("-----------------------------------")
+    # The change feed is read without loading anything else
+    feed = ChangeFeed()
+    if args.command == "events":
+        for event in feed.read(args.since, args.limit):
+            print(json.dumps(event))
+        return
+
+    # Choose where users and tasks are stored
+    if args.storage == "sqlite":
+        backend = SqliteBackend()
+    elif args.storage == "binary":
+
+        # Start the binary snapshot from tasks.txt the first time, once
+        # any changes in its journal have been folded into it
+        if not os.path.exists("tasks.bin") and os.path.exists("tasks.txt"):
+            text_backend = TextBackend()
+            text_backend.load_tasks()
+            text_backend.close()
+            import_text("tasks.txt", "tasks.bin")
+        backend = BinaryBackend()
+    else:
+        backend = TextBackend()
+    archive = TaskArchive()
+    if profiler is not None:
+        profiler.writers = [backend, feed, archive]
+
+    # Read in user and task data, creating the files with default
+    # contents if they don't exist
+    user_store = UserStore(backend, hasher)
+    user_store.load()
+
+    # With text storage the reports are counted straight from the files,
+    # and with SQLite storage by the database, without loading the tasks
+    if args.command == "reports" and args.storage in ("text", "sqlite"):
+        now = datetime.today()
+        try:
+            if args.storage == "text":
+                counts = count_task_file(backend, now, args.workers,
+                                         archive)
+            else:
+                counts = count_task_database(backend, now, archive)
+            gen_reports(None, user_store, now=now, counts=counts,
+                        file_format=args.format, usernames=args.users)
+        except ValueError as error:
+            sys.exit(str(error))
+        finally:
+            backend.close()
+        return
+
+    task_store = TaskStore(backend, users=user_store, archive=archive,
+                           feed=feed)
+    task_store.load()
+
+    if args.command == "import":
+        file_format = args.format
+        if file_format is None:
+            file_format = "jsonl" if args.path.endswith(".jsonl") else "csv"
+        num_errors = import_tasks(task_store, args.path, file_format)
+        task_store.close()
+        sys.exit(1 if num_errors else 0)
+
+    if args.command == "export":
+        export_tasks(task_store, args.output, args.format)
+        task_store.close()
+        return
+
+    if args.command == "reports":
+        try:
+            gen_reports(task_store, user_store, file_format=args.format,
+                        usernames=args.users)
+        except ValueError as error:
+            sys.exit(str(error))
+        finally:
+            task_store.close()
+        return
+
+    if args.command == "archive":
+        before = args.before
+        if before is None:
+            today = datetime.today()
+            before = datetime(today.year, today.month, today.day) - \
+                timedelta(days=ARCHIVE_AFTER_DAYS)
+        num_archived = task_store.archive_tasks(before)
+        print(f"Archived {num_archived} completed tasks due before "
+              f"{before.strftime(DATETIME_STRING_FORMAT)}.")
+        task_store.close()
+        return
+
+    if args.command == "serve":
+        asyncio.run(TaskServer(task_store, user_store).serve(args.host,
+                                                             args.port))
+        task_store.close()
+        return
+
+    run_menu(task_store, user_store)
+
+
+def run_menu(task_store: TaskStore, user_store: UserStore):
+    """
+    The function `run_menu` logs a user in and then presents the menu
+    until the user exits.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    holding the users
+    :type user_store: UserStore
+    """
+
+    curr_user = login(user_store)
 
+    # Reports generated again reuse the parts which have not changed
+    report_cache = ReportCache()
 
-DATETIME_STRING_FORMAT = "%Y-%m-%d"
-
-# Create tasks.txt if it doesn't exist
-create_taskfile()
-
-# Retrieve task information from the .txt file
-with open("tasks.txt", 'r', encoding="utf-8") as task_file:
-    task_data = task_file.read().split("\n")
-    task_data = [t for t in task_data if t != ""]
-
-task_list = []
-
-# Reorganise each task string in the task data list into a dictionary
-for task_str in task_data:
-    curr_task = {}
-
-    # Split by semicolon and manually add each component
-    task_components = task_str.split(";")
-    curr_task["username"] = task_components[0]
-    curr_task["title"] = task_components[1]
-    curr_task["description"] = task_components[2]
-    curr_task["due_date"] = datetime.strptime(task_components[3],
-                                           DATETIME_STRING_FORMAT)
-    curr_task["assigned_date"] = datetime.strptime(task_components[4],
-                                                DATETIME_STRING_FORMAT)
-    curr_task["completed"] = task_components[5] == "Yes"
-
-    # Add dictionary to a task list
-    task_list.append(curr_task)
-
-# =====Login Section=====
-# This code reads usernames and password from the user.txt file to allow
-# a user to login
-
-# If no user.txt file, write one with a default account
-create_userfile()
-
-# Read in user data
-with open("user.txt", 'r', encoding="utf-8") as user_file:
-    login_data = user_file.read().split("\n")
-
-# Convert to a dictionary
-username_password = {}
-for user in login_data:
-    username, password = user.split(';')
-    username_password[username] = password
-
-# Request login information from user
-LOGGED_IN = False
-while not LOGGED_IN:
-    print("\nLOGIN")
-    curr_user = input("Username: ")
-    curr_pass = input("Password: ")
-
-    # Check that username exists
-    if curr_user not in username_password:
-        print("User does not exist")
-        continue
-
-    # Check that password matches
-    if username_password[curr_user] != curr_pass:
-        print("Wrong password")
-        continue
-
-    # If checks pass, exit loop
-    print("Login Successful!")
-    LOGGED_IN = True
-
-while True:
-    # Present the menu to the user and request selection
-    menu = input('''\nSelect one of the following options below:
+    while True:
+        # Present the menu to the user and request selection
+        menu = input('''\nSelect one of the following options below:
 r - Register a user
 a - Add a task
 va - View all tasks
 vm - View my tasks
+dt - View due tasks
+s - Search tasks
 gr - Generate reports
 ds - Display statistics
 e - Exit
 : ''').lower()
 
-    if menu == "r":
-        reg_user()
+        # Pick up changes made by anyone else using the same files
+        user_store.refresh()
+        task_store.refresh()
 
-    elif menu == "a":
-        add_task()
+        if menu == "r":
+            reg_user(user_store)
 
-    elif menu == "va":
-        view_all()
+        elif menu == "a":
+            add_task(task_store, user_store)
 
-    elif menu == "vm":
-        view_mine()
+        elif menu == "va":
+            view_all(task_store, user_store)
 
-    elif menu == "gr":
-        gen_task_overview()
-        gen_user_overview()
-        print("\nReports generated in local directory.")
+        elif menu == "vm":
+            view_mine(task_store, user_store, curr_user)
 
-    elif menu == "ds":
-        if curr_user == "admin":
+        elif menu == "dt":
+            view_due(task_store, user_store)
 
-            # If the user is an admin they can display statistics about
-            # number of users and tasks
-            display_stats()
+        elif menu == "s":
+            search_tasks(task_store, user_store)
 
-        else:
+        elif menu == "gr":
+            gen_reports(task_store, user_store, cache=report_cache)
+            print("\nReports generated in local directory.")
 
-            # Otherwise, print relevant message
-            print("\nYou must be an administrator to access statistics.")
+        elif menu == "ds":
+            if curr_user == "admin":
 
-    elif menu == "e":
-        print("\nGoodbye!\n")
-        break
+                # If the user is an admin they can display statistics
+                # about number of users and tasks
+                display_stats(task_store, user_store)
 
-    else:
-        print("Invalid input - please try again.")
+            else:
+
+                # Otherwise, print relevant message
+                print("\nYou must be an administrator to access "
+                      "statistics.")
+
+        elif menu == "e":
+
+            # Fold the journal into the task file before exiting
+            task_store.close()
+            print("\nGoodbye!\n")
+            break
+
+        else:
+            print("Invalid input - please try again.")
+
+
+if __name__ == "__main__":
+    main()
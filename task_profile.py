@@ -0,0 +1,144 @@
+"""
+The module provides opt-in profiling for the task manager application.
+A `Profiler` wraps chosen functions and methods, such as the loaders,
+the report generators and the menu actions, to count the calls to each
+and the wall time and bytes written in them, and can also run the whole
+program under `cProfile`. Nothing is wrapped until profiling is turned
+on, so the application runs exactly as before without it.
+"""
+
+# =====Importing Libraries=====
+import cProfile
+import functools
+import time
+
+
+class CallStats:
+    """
+    The class `CallStats` holds the number of calls to a profiled
+    function and the wall time and bytes written in them, including any
+    profiled functions they call.
+    """
+
+    __slots__ = ("calls", "seconds", "bytes_written")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes_written = 0
+
+
+class Profiler:
+    """
+    The class `Profiler` records `CallStats` for the functions it has
+    been asked to instrument.
+
+    Bytes written are read from the `bytes_written` counters of the
+    objects in `writers`, such as the text and binary backends, the
+    change feed and the archive, together with the bytes reported by
+    instrumented functions which write files themselves, such as the
+    report writer. Writes made by SQLite are not counted.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.writers = []
+        self.other_bytes = 0
+        self._profile = None
+
+    def instrument(self, owner, attribute, name=None, count_bytes=None):
+        """
+        The method `instrument` replaces a function or method with one
+        which records its calls.
+
+        :param owner: The `owner` parameter is the module or class which
+        holds the function
+        :param attribute: The `attribute` parameter is the name of the
+        function in `owner`
+        :type attribute: str
+        :param name: The optional `name` parameter is the name under
+        which the calls are recorded, by default the function's
+        qualified name
+        :type name: str
+        :param count_bytes: The optional `count_bytes` parameter is a
+        function given the same arguments, which returns the number of
+        bytes the call writes, for functions which write files directly
+        rather than through the storage backend
+        :type count_bytes: callable
+        """
+
+        function = getattr(owner, attribute)
+        if name is None:
+            name = function.__qualname__
+        stats = self.stats.setdefault(name, CallStats())
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start_bytes = self.bytes_written()
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.seconds += time.perf_counter() - start_time
+                if count_bytes is not None:
+                    self.other_bytes += count_bytes(*args, **kwargs)
+                stats.bytes_written += self.bytes_written() - start_bytes
+                stats.calls += 1
+
+        setattr(owner, attribute, wrapper)
+
+    def bytes_written(self):
+        """
+        The method `bytes_written` returns the number of bytes written so
+        far, as far as the profiler can tell.
+        """
+
+        return sum(getattr(writer, "bytes_written", 0)
+                   for writer in self.writers) + self.other_bytes
+
+    def start(self, pstats_path=None):
+        """
+        The method `start` starts running the whole program under
+        `cProfile`, if a file is given for its statistics.
+
+        :param pstats_path: The optional `pstats_path` parameter is the
+        file to which `stop` writes the `cProfile` statistics
+        :type pstats_path: str
+        """
+
+        if pstats_path is not None:
+            self._profile = (cProfile.Profile(), pstats_path)
+            self._profile[0].enable()
+
+    def stop(self):
+        """
+        The method `stop` stops `cProfile`, if it was started, and
+        writes its statistics, which can be read with the `pstats`
+        module.
+        """
+
+        if self._profile is not None:
+            profile, pstats_path = self._profile
+            profile.disable()
+            profile.dump_stats(pstats_path)
+            self._profile = None
+
+    def summary(self):
+        """
+        The method `summary` formats the recorded statistics of every
+        function which was called, in order of total time.
+
+        :return: The method `summary` returns the text of a table.
+        """
+
+        lines = [f"{'Profile':<24} {'Calls':>8} {'Total s':>10} "
+                 f"{'Mean ms':>10} {'Bytes written':>14}"]
+        for name, stats in sorted(self.stats.items(),
+                                  key=lambda item: -item[1].seconds):
+            if not stats.calls:
+                continue
+            lines.append(f"{name:<24} {stats.calls:>8,} "
+                         f"{stats.seconds:>10.3f} "
+                         f"{stats.seconds / stats.calls * 1000:>10.3f} "
+                         f"{stats.bytes_written:>14,}")
+        return "\n".join(lines)
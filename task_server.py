@@ -0,0 +1,585 @@
+"""
+The module provides an HTTP server which offers the operations of the
+task manager menu as JSON endpoints, so that a web frontend and many
+clients can use the task engine at once. It is built on `asyncio` and
+the standard library only.
+
+Reads are answered straight from the task store in memory. Changes are
+queued for a single writer task, which applies whatever has queued up
+as one batch and writes it with a single journal append or transaction
+(group commit), answering each request once its batch has been written.
+If a batch cannot be written, the stores are read back from storage so
+that its changes are not served.
+
+Requests are authenticated with HTTP Basic authentication against the
+registered users. A task can only be read or changed by the user to
+whom it is assigned, or by admin, as in the menu: lists, searches and
+events leave out other users' tasks. Endpoints:
+
+    GET   /tasks                  list tasks; filters username,
+                                  completed (yes/no), overdue (date),
+                                  due_from, due_to; paging offset, limit
+    POST  /tasks                  add a task: username, title,
+                                  description, due_date
+    GET   /tasks/<id>             one task, with its version
+    PATCH /tasks/<id>             reassign (username) and/or change the
+                                  due date (due_date); optional version
+    DELETE /tasks/<id>            delete; optional version
+    POST  /tasks/<id>/complete    mark as complete; optional version
+    GET   /due                    overdue tasks and tasks due within
+                                  days (default 7); optional username
+    GET   /search                 tasks whose title or description
+                                  match q (words, word*, OR); filters
+                                  username, completed; paging offset,
+                                  limit
+    GET   /events                 change events after sequence number
+                                  since (default 0), in order; limit
+    GET   /users                  registered usernames
+    POST  /users                  register a user: username, password
+    POST  /reports                generate the overview reports;
+                                  optional format (text, json, csv)
+                                  and usernames to include
+    GET   /stats                  counts of users and tasks (admin)
+"""
+
+# =====Importing Libraries=====
+import asyncio
+import base64
+import binascii
+import json
+import signal
+from datetime import datetime
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from task_engine import ConflictError, ReportCache, gen_reports
+from task_storage import DATETIME_STRING_FORMAT, TASK_ROW_FIELDS, parse_date
+
+# Most changes the writer applies and writes as one batch
+MAX_BATCH = 256
+
+# Default and largest page size for GET /tasks and GET /search
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Limits on the size of a request
+MAX_HEADERS = 100
+MAX_BODY_SIZE = 1 << 20
+
+
+class HTTPError(Exception):
+    """
+    The exception `HTTPError` ends a request with an error status and a
+    JSON body holding the message.
+    """
+
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class TaskServer:
+    """
+    The class `TaskServer` serves a task store and user store over HTTP.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    holding the tasks
+    :type task_store: TaskStore
+    :param user_store: The `user_store` parameter is the `UserStore`
+    holding the users
+    :type user_store: UserStore
+    :param max_batch: The optional `max_batch` parameter is the most
+    changes written together
+    :type max_batch: int
+    """
+
+    def __init__(self, task_store, user_store, max_batch=MAX_BATCH):
+        self.task_store = task_store
+        self.user_store = user_store
+        self.max_batch = max_batch
+        self.batches = 0
+        self.changes = 0
+        self.report_cache = ReportCache()
+        self._queue = None
+        self._stopped = None
+        self._reload_error = None
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        """
+        The method `serve` accepts connections until `stop` is called or
+        the process receives SIGINT or SIGTERM, then finishes writing
+        any queued changes.
+
+        :param host: The optional `host` parameter is the address to
+        listen on
+        :type host: str
+        :param port: The optional `port` parameter is the port to listen
+        on, or 0 for any free port
+        :type port: int
+        """
+
+        self._queue = asyncio.Queue()
+        self._stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        write_loop = asyncio.create_task(self._write_loop())
+        server = await asyncio.start_server(self._handle_connection, host,
+                                            port)
+        async with server:
+            host, port = server.sockets[0].getsockname()[:2]
+            print(f"Serving on http://{host}:{port}", flush=True)
+            await self._stopped.wait()
+
+        # Let the writer finish the changes already queued
+        await self._queue.put(None)
+        await write_loop
+        print(f"Wrote {self.changes} changes in {self.batches} batches",
+              flush=True)
+
+    def stop(self):
+        """
+        The method `stop` asks `serve` to stop accepting connections.
+        """
+
+        self._stopped.set()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+
+                try:
+                    status, result = await self._respond(method, target,
+                                                         headers, body)
+                except HTTPError as error:
+                    status, result = error.status, {"error": str(error)}
+                except Exception as error:
+                    status = HTTPStatus.INTERNAL_SERVER_ERROR
+                    result = {"error": str(error) or status.phrase}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, result, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+
+        except HTTPError as error:
+            self._write_response(writer, error.status,
+                                 {"error": str(error)}, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, version = \
+                request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST) from None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        # HTTP/1.0 clients close the connection after each request
+        if version == "HTTP/1.0" and \
+                headers.get("connection", "").lower() != "keep-alive":
+            headers["connection"] = "close"
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST) from None
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+        return method, target, headers, body
+
+    @staticmethod
+    def _write_response(writer, status, result, keep_alive):
+        body = json.dumps(result).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n".encode("latin-1") + body)
+
+    async def _respond(self, method, target, headers, body):
+        username = await self._authenticate(headers)
+        url = urlsplit(target)
+        path = [unquote(part) for part in url.path.split("/") if part]
+        query = dict(parse_qsl(url.query))
+
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                "Invalid JSON") from None
+            if not isinstance(data, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                "Expected a JSON object")
+        else:
+            data = {}
+
+        try:
+            return await self._dispatch(method, path, query, data, username)
+        except ConflictError as error:
+            raise HTTPError(HTTPStatus.CONFLICT, str(error)) from None
+        except KeyError as error:
+            raise HTTPError(HTTPStatus.NOT_FOUND, error.args[0]) from None
+        except ValueError as error:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(error)) from None
+
+    async def _authenticate(self, headers):
+
+        # Only the first check of each password is slow, and it runs in a
+        # worker thread so that other connections are served meanwhile;
+        # the user store remembers passwords it has already checked
+        scheme, _, credentials = headers.get("authorization", "").partition(
+            " ")
+        if scheme.lower() == "basic":
+            try:
+                decoded = base64.b64decode(credentials).decode("utf-8")
+            except (binascii.Error, UnicodeDecodeError):
+                decoded = ""
+            username, _, password = decoded.partition(":")
+            user_store = self.user_store
+            password_hash = user_store.password_hash(username)
+            if password_hash is not None:
+                if user_store.recently_checked(username, password,
+                                               password_hash):
+                    return username
+                if await asyncio.get_running_loop().run_in_executor(
+                        None, user_store.hasher.verify, password,
+                        password_hash):
+                    user_store.accept_password(username, password,
+                                               password_hash)
+                    return username
+
+        raise HTTPError(HTTPStatus.UNAUTHORIZED)
+
+    async def _dispatch(self, method, path, query, data, username):
+        task_store = self.task_store
+
+        if path == ["tasks"]:
+            if method == "GET":
+                offset = _int_param(query, "offset", 0)
+                limit = min(_int_param(query, "limit", DEFAULT_PAGE_SIZE),
+                            MAX_PAGE_SIZE)
+                tasks = task_store.query(offset=offset, limit=limit,
+                                         **self._owner_filters(query,
+                                                               username))
+                return HTTPStatus.OK, {
+                    "tasks": [self._task_json(task_id, task)
+                              for task_id, task in tasks]}
+            if method == "POST":
+                for field in ("username", "title", "description",
+                              "due_date"):
+                    if not isinstance(data.get(field), str):
+                        raise ValueError(f"Missing {field}")
+                task_id = await self._submit(
+                    task_store.add, data["username"], data["title"],
+                    data["description"], _date_param(data, "due_date"))
+                return HTTPStatus.CREATED, self._task_json(
+                    task_id, task_store.get(task_id))
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if len(path) in (2, 3) and path[0] == "tasks":
+            try:
+                task_id = int(path[1])
+            except ValueError:
+                raise HTTPError(HTTPStatus.NOT_FOUND) from None
+            version = data.get("version")
+            self._check_owner(task_id, username)
+
+            if len(path) == 3:
+                if path[2] != "complete":
+                    raise HTTPError(HTTPStatus.NOT_FOUND)
+                if method != "POST":
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+                await self._submit_owned(username, task_store.complete,
+                                         task_id, version)
+
+            elif method == "PATCH":
+                if task_store.get(task_id).completed:
+                    raise HTTPError(HTTPStatus.CONFLICT,
+                                    "Task completed - unavailable for "
+                                    "editing")
+                new_username = data.get("username")
+                due_date = _date_param(data, "due_date") \
+                    if "due_date" in data else None
+                await self._submit_owned(username, self._edit_task, task_id,
+                                         new_username, due_date, version)
+
+            elif method == "DELETE":
+                await self._submit_owned(username, task_store.delete,
+                                         task_id, version)
+                return HTTPStatus.OK, {"id": task_id, "deleted": True}
+
+            elif method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+            return HTTPStatus.OK, self._task_json(task_id,
+                                                  task_store.get(task_id))
+
+        if path == ["due"]:
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            now = datetime.today()
+            days = _int_param(query, "days", 7)
+            username = self._owner_filters(query, username).get("username")
+            return HTTPStatus.OK, {
+                "overdue": [self._task_json(task_id, task)
+                            for task_id, task in task_store.overdue(
+                                now, username)],
+                "due": [self._task_json(task_id, task)
+                        for task_id, task in task_store.due_within(
+                            days, now, username)]}
+
+        if path == ["search"]:
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            for name in ("overdue", "due_from", "due_to"):
+                if name in query:
+                    raise ValueError(f"Cannot search with {name}")
+            offset = _int_param(query, "offset", 0)
+            limit = min(_int_param(query, "limit", DEFAULT_PAGE_SIZE),
+                        MAX_PAGE_SIZE)
+            total, tasks = task_store.search(
+                query.get("q", ""), offset=offset, limit=limit,
+                **self._owner_filters(query, username))
+            return HTTPStatus.OK, {
+                "total": total,
+                "tasks": [self._task_json(task_id, task)
+                          for task_id, task in tasks]}
+
+        if path == ["events"]:
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            since = _int_param(query, "since", 0)
+            limit = min(_int_param(query, "limit", DEFAULT_PAGE_SIZE),
+                        MAX_PAGE_SIZE)
+            events = task_store.events(since, limit)
+
+            # The client passes "next" back as since for the next page,
+            # which continues after the events another user's tasks
+            # left out of this one
+            return HTTPStatus.OK, {
+                "events": [event for event in events
+                           if username == "admin" or
+                           username in (event["username"],
+                                        event.get("old_username"))],
+                "next": events[-1]["seq"] if events else since}
+
+        if path == ["users"]:
+            if method == "GET":
+                return HTTPStatus.OK, {"users": list(self.user_store)}
+            if method == "POST":
+                for field in ("username", "password"):
+                    if not isinstance(data.get(field), str) or \
+                            not data[field]:
+                        raise ValueError(f"Missing {field}")
+                await self._submit(self.user_store.add, data["username"],
+                                   data["password"])
+                return HTTPStatus.CREATED, {"username": data["username"]}
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if path == ["reports"]:
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            usernames = data.get("usernames")
+            if usernames is not None and (
+                    not isinstance(usernames, list) or
+                    not all(isinstance(name, str) for name in usernames)):
+                raise ValueError("Invalid usernames")
+            paths = gen_reports(task_store, self.user_store,
+                                cache=self.report_cache,
+                                file_format=str(data.get("format", "text")),
+                                usernames=usernames)
+            return HTTPStatus.OK, {"reports": list(paths)}
+
+        if path == ["stats"]:
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            if username != "admin":
+                raise HTTPError(HTTPStatus.FORBIDDEN,
+                                "You must be an administrator to access "
+                                "statistics.")
+            totals, _ = task_store.counts(datetime.today())
+            return HTTPStatus.OK, {"users": len(self.user_store),
+                                   "tasks": totals.total,
+                                   "completed": totals.completed,
+                                   "uncompleted": totals.uncompleted,
+                                   "overdue": totals.overdue}
+
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    @staticmethod
+    def _owner_filters(query, username):
+
+        # Users other than the administrator only see their own tasks
+        filters = _task_filters(query)
+        if username != "admin":
+            if filters.setdefault("username", username) != username:
+                raise HTTPError(HTTPStatus.FORBIDDEN,
+                                "You can only access your own tasks.")
+        return filters
+
+    def _check_owner(self, task_id, username):
+        if username != "admin" and \
+                self.task_store.get(task_id).username != username:
+            raise HTTPError(HTTPStatus.FORBIDDEN,
+                            "You can only access your own tasks.")
+
+    async def _submit_owned(self, username, function, task_id, *args):
+
+        # The owner is checked again by the writer, in case the task was
+        # reassigned while the change was queued
+        def change():
+            self._check_owner(task_id, username)
+            return function(task_id, *args)
+
+        return await self._submit(change)
+
+    def _edit_task(self, task_id, username, due_date, version):
+
+        # Both changes are checked against the version the client read
+        if username is not None:
+            self.task_store.reassign(task_id, str(username), version)
+            version = None if version is None else version + 1
+        if due_date is not None:
+            self.task_store.set_due_date(task_id, due_date, version)
+
+    def _task_json(self, task_id, task):
+        task_json = dict(zip(TASK_ROW_FIELDS, (
+            task_id, task.username, task.title, task.description,
+            task.due_date.strftime(DATETIME_STRING_FORMAT),
+            task.assigned_date.strftime(DATETIME_STRING_FORMAT),
+            task.completed)))
+        task_json["version"] = self.task_store.version(task_id)
+        return task_json
+
+    async def _submit(self, function, *args):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((future, function, args))
+        return await future
+
+    async def _write_loop(self):
+        while True:
+            changes = [await self._queue.get()]
+            while len(changes) < self.max_batch and not self._queue.empty():
+                changes.append(self._queue.get_nowait())
+
+            stopping = None in changes
+            changes = [change for change in changes if change is not None]
+
+            # Apply the batch, then answer once it has been written
+            outcomes = []
+            try:
+                if self._reload_error is not None:
+                    raise self._reload_error
+                with self.task_store.batch():
+                    for future, function, args in changes:
+
+                        # A failed change is reported to the request which
+                        # made it, without affecting the rest of the batch
+                        try:
+                            outcomes.append((future, function(*args), None))
+                        except Exception as error:
+                            outcomes.append((future, None, error))
+
+            # A batch which could not be written fails every change in
+            # it, and the writer carries on with the next batch
+            except Exception as error:
+                outcomes = [(future, None, error)
+                            for future, _, _ in changes]
+                if self._reload_error is None:
+                    self._reload()
+
+            for future, result, error in outcomes:
+                if future.cancelled():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+            if changes:
+                self.batches += 1
+                self.changes += len(changes)
+            if stopping:
+                return
+
+            # Give waiting connections a turn to queue more changes
+            await asyncio.sleep(0)
+
+
+    def _reload(self):
+
+        # Changes applied in memory but not written are thrown away by
+        # reading the stores back, and if even that fails the server
+        # stops rather than serve tasks which differ from the files
+        try:
+            self.user_store.load()
+            self.task_store.load()
+        except Exception as error:
+            print(f"Stopping: the tasks could not be reloaded: {error}",
+                  flush=True)
+            self._reload_error = error
+            self.stop()
+
+
+def _int_param(query, name, default):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise ValueError(f"Invalid {name}") from None
+    if value < 0:
+        raise ValueError(f"Invalid {name}")
+    return value
+
+
+def _date_param(values, name):
+    try:
+        return parse_date(str(values[name]))
+    except ValueError:
+        raise ValueError(f"Invalid {name.replace('_', ' ')}") from None
+
+
+def _task_filters(query):
+    filters = {}
+    if "username" in query:
+        filters["username"] = query["username"]
+    if "completed" in query:
+        completed = query["completed"].lower()
+        if completed not in ("yes", "no", "true", "false"):
+            raise ValueError("Invalid completed")
+        filters["completed"] = completed in ("yes", "true")
+    for name, filter_name in (("overdue", "overdue_as_of"),
+                              ("due_from", "due_from"),
+                              ("due_to", "due_to")):
+        if name in query:
+            filters[filter_name] = _date_param(query, name)
+    return filters
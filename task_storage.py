@@ -0,0 +1,1937 @@
+"""
+The module provides the storage used by the task manager application:
+the `Task` record, the semicolon separated text format of tasks.txt, a
+binary snapshot format which is memory-mapped on load so that each task
+is only decoded when it is first used, and the storage backends which
+keep tasks and users in these files or in an SQLite database. Several
+processes can share the same storage: writes are serialised by an
+advisory file lock, and each process picks up the others' changes by
+refreshing.
+
+Every task has a permanent ID, assigned in order when it is added and
+stored with it, so deleting a task never renumbers the others. Tasks
+are held in a sequence indexed by ID, with None in place of deleted
+tasks, whose length is the ID the next task will be given.
+
+Alongside the tasks, completed tasks can be moved to a compressed
+archive, and changes to tasks can be recorded in a numbered change feed
+which other processes read from where they left off.
+"""
+
+# =====Importing Libraries=====
+import csv
+import gzip
+import io
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate, repeat
+
+try:
+    import fcntl
+except ImportError:
+    # Advisory locks are not available on Windows, where a single
+    # process is assumed
+    fcntl = None
+
+DATETIME_STRING_FORMAT = "%Y-%m-%d"
+
+# First line of a text task file, giving the ID of the next task to be
+# added. Each line after it is a task followed by its ID. Files without
+# it are from before IDs were stored, and number their tasks in order.
+TEXT_HEADER_PREFIX = "next_id="
+
+# Characters which end a field or a line of a text task file, and so
+# cannot appear in a task's title or description when it is stored there
+TEXT_SEPARATORS = (";", "\r", "\n")
+
+# Changes are appended to a journal and folded back into the task file
+# once the number of records reaches this threshold
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# Binary snapshot layout, all integers little-endian:
+#   header   magic, version, task count, user count, offset of the user
+#            table, offset of the task table
+#   records  title and description of each task as length-prefixed
+#            UTF-8 strings
+#   users    each distinct username as a length-prefixed UTF-8 string
+#   tasks    one fixed-width entry per task ID: offset of its record,
+#            username index, due and assigned dates as ordinals and
+#            flags, marking a task completed or deleted. Version 1
+#            snapshots have no deleted tasks.
+SNAPSHOT_MAGIC = b"TASKSNAP"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_COMPLETED = 1
+SNAPSHOT_DELETED = 2
+SNAPSHOT_HEADER = struct.Struct("<8sIIIQQ")
+SNAPSHOT_ENTRY = struct.Struct("<QIIIB")
+SNAPSHOT_LENGTH = struct.Struct("<I")
+
+# Columns used when importing and exporting tasks as CSV or JSON lines
+TASK_ROW_FIELDS = ("id", "username", "title", "description", "due_date",
+                   "assigned_date", "completed")
+
+# Archived tasks are kept as gzip-compressed JSON lines, in one segment
+# file for each month of due date, alongside a summary of the segments
+ARCHIVE_SEGMENT_FORMAT = "tasks-{month}.jsonl.gz"
+ARCHIVE_SUMMARY = "summary.json"
+
+# Change events are appended to a file of JSON lines, alongside an index
+# holding the end offset of each event in order, so that the events
+# after any sequence number can be found with a single seek
+CHANGE_FEED_OFFSET = struct.Struct("<Q")
+
+
+@lru_cache(maxsize=65536)
+def parse_date(date_str):
+    """
+    The function `parse_date` converts a date string in
+    `DATETIME_STRING_FORMAT` into a datetime. Dates in the usual
+    zero-padded YYYY-MM-DD form are read directly rather than through
+    `datetime.strptime`, and results are cached, since task files
+    repeat the same dates many times.
+
+    :param date_str: The `date_str` parameter is the date to convert
+    :type date_str: str
+    :return: The function `parse_date` returns the datetime at midnight
+    on that date.
+    """
+
+    if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-" \
+            and date_str[:4].isdigit() and date_str[5:7].isdigit() \
+            and date_str[8:].isdigit():
+        return datetime(int(date_str[:4]), int(date_str[5:7]),
+                        int(date_str[8:]))
+
+    return datetime.strptime(date_str, DATETIME_STRING_FORMAT)
+
+
+@lru_cache(maxsize=65536)
+def date_from_ordinal(ordinal):
+    """
+    The function `date_from_ordinal` converts a proleptic Gregorian
+    ordinal, as stored in binary snapshots, into a datetime. Results are
+    cached so that equal dates share one object.
+
+    :param ordinal: The `ordinal` parameter is the day number, as
+    returned by `datetime.toordinal`
+    :type ordinal: int
+    :return: The function `date_from_ordinal` returns the datetime at
+    midnight on that day.
+    """
+
+    return datetime.fromordinal(ordinal)
+
+
+class Task:
+    """
+    The class `Task` holds the details of a single task. It uses
+    `__slots__` rather than a dictionary per task, which keeps the
+    memory used by large task lists down.
+
+    :param username: The `username` parameter is the user to whom the
+    task is assigned
+    :type username: str
+    :param title: The `title` parameter is the title of the task
+    :type title: str
+    :param description: The `description` parameter describes the task
+    :type description: str
+    :param due_date: The `due_date` parameter is the date by which the
+    task must be completed
+    :type due_date: datetime
+    :param assigned_date: The `assigned_date` parameter is the date the
+    task was assigned
+    :type assigned_date: date
+    :param completed: The optional `completed` parameter is whether the
+    task has been completed
+    :type completed: bool
+    """
+
+    __slots__ = ("username", "title", "description", "due_date",
+                 "assigned_date", "completed")
+
+    def __init__(self, username, title, description, due_date,
+                 assigned_date, completed=False):
+        self.username = username
+        self.title = title
+        self.description = description
+        self.due_date = due_date
+        self.assigned_date = assigned_date
+        self.completed = completed
+
+    @classmethod
+    def from_line(cls, task_str):
+        """
+        The method `from_line` creates a task from one line of the task
+        file. Usernames are interned, so the many tasks assigned to the
+        same user share one string.
+
+        :param task_str: The `task_str` parameter is the line, without
+        its trailing newline
+        :type task_str: str
+        :return: The method `from_line` returns a new `Task`.
+        """
+
+        task_components = task_str.split(";")
+        return cls(sys.intern(task_components[0]),
+                   task_components[1],
+                   task_components[2],
+                   parse_date(task_components[3]),
+                   parse_date(task_components[4]),
+                   task_components[5] == "Yes")
+
+    def to_line(self):
+        """
+        The method `to_line` formats the task as one line of the task
+        file, the reverse of `from_line`.
+
+        :return: The method `to_line` returns the line without a
+        trailing newline.
+        """
+
+        return ";".join([
+            self.username,
+            self.title,
+            self.description,
+            self.due_date.strftime(DATETIME_STRING_FORMAT),
+            self.assigned_date.strftime(DATETIME_STRING_FORMAT),
+            "Yes" if self.completed else "No"
+        ])
+
+
+class FileLock:
+    """
+    The class `FileLock` is an advisory lock, held with `fcntl.flock` on
+    a lock file, which the processes sharing a storage location use to
+    take turns writing. It can be taken again by a process which already
+    holds it; only the outermost hold locks and unlocks the file.
+
+    :param path: The `path` parameter is the location of the lock file
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.acquisitions = 0
+        self.wait_seconds = 0.0
+        self._depth = 0
+        self._exclusive = False
+        self._file = None
+
+    @contextmanager
+    def hold(self, exclusive=True):
+        """
+        The method `hold` holds the lock for the duration of a `with`
+        block, waiting for other processes to release it first.
+
+        :param exclusive: The optional `exclusive` parameter is True to
+        lock out every other process, for writing, or False to lock out
+        only writers, for reading
+        :type exclusive: bool
+        """
+
+        if self._depth == 0:
+            if fcntl is not None:
+                if self._file is None:
+                    self._file = open(self.path, "ab")
+                start_time = time.perf_counter()
+                fcntl.flock(self._file,
+                            fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self.wait_seconds += time.perf_counter() - start_time
+            self.acquisitions += 1
+            self._exclusive = exclusive
+        elif exclusive and not self._exclusive:
+            raise RuntimeError("Cannot write while holding a read lock")
+
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def close(self):
+        """
+        The method `close` closes the lock file.
+        """
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def changed_rows(old_rows, new_rows):
+    """
+    The function `changed_rows` compares the index rows of a task list
+    before and after it was reloaded.
+
+    :param old_rows: The `old_rows` parameter is a list of tuples of
+    username, due date and completed flag, or None for deleted tasks,
+    as from `index_rows`
+    :type old_rows: list
+    :param new_rows: The `new_rows` parameter is an iterable of the rows
+    after reloading
+    :return: The function `changed_rows` returns a dictionary mapping
+    the ID of each changed or deleted task to its row before the
+    change, or to None for tasks which were added.
+    """
+
+    changes = {}
+    for task_id, row in enumerate(new_rows):
+        if task_id >= len(old_rows):
+            changes[task_id] = None
+        elif row != old_rows[task_id]:
+            changes[task_id] = old_rows[task_id]
+    return changes
+
+
+def read_text_tasks(path):
+    """
+    The function `read_text_tasks` reads the tasks in a text task file
+    one line at a time.
+
+    :param path: The `path` parameter is the location of the task file
+    :type path: str
+    :return: The function `read_text_tasks` returns a list of the tasks
+    indexed by task ID, with None for deleted tasks, as long as the ID
+    of the next task to be added.
+    """
+
+    tasks = []
+    with open(path, "r", encoding="utf-8") as task_file:
+        header = task_file.readline().rstrip("\n")
+        if header.startswith(TEXT_HEADER_PREFIX):
+            next_id = int(header[len(TEXT_HEADER_PREFIX):])
+        else:
+            next_id = None
+            task_file.seek(0)
+
+        for task_str in task_file:
+            task_str = task_str.rstrip("\n")
+            if task_str == "":
+                continue
+            if next_id is None:
+                tasks.append(Task.from_line(task_str))
+                continue
+
+            task_str, _, task_id = task_str.rpartition(";")
+            task_id = int(task_id)
+            if task_id >= len(tasks):
+                tasks.extend(repeat(None, task_id + 1 - len(tasks)))
+            tasks[task_id] = Task.from_line(task_str)
+
+    if next_id is not None and next_id > len(tasks):
+        tasks.extend(repeat(None, next_id - len(tasks)))
+    return tasks
+
+
+def read_journal(path):
+    """
+    The function `read_journal` reads the records in a journal, leaving
+    out a trailing record which was only partly written and any line
+    which is not valid JSON, as `TextBackend` does when replaying it.
+
+    :param path: The `path` parameter is the location of the journal
+    :type path: str
+    :return: The function `read_journal` yields each record as a
+    dictionary, in the order written.
+    """
+
+    if not os.path.exists(path):
+        return
+
+    with open(path, "rb") as journal_file:
+        for line in journal_file:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def write_text_tasks(path, tasks, next_id=None):
+    """
+    The function `write_text_tasks` writes tasks to a text task file.
+    The file is written to a temporary file first and then moved into
+    place, so an interrupted write never leaves a partial file behind.
+
+    :param path: The `path` parameter is the location of the task file
+    :type path: str
+    :param tasks: The `tasks` parameter is an iterable of `Task` in
+    order of task ID, with None for deleted tasks
+    :param next_id: The optional `next_id` parameter is the ID of the
+    next task to be added, by default the length of `tasks`
+    :type next_id: int
+    """
+
+    if next_id is None:
+        next_id = len(tasks)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+
+        # Write the header, then the line for each task on a separate
+        # line in the .txt file
+        file.write(f"{TEXT_HEADER_PREFIX}{next_id}")
+        file.writelines(f"\n{task.to_line()};{task_id}"
+                        for task_id, task in enumerate(tasks)
+                        if task is not None)
+
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(path, tasks):
+    """
+    The function `write_snapshot` writes tasks to a binary snapshot.
+    Like `write_text_tasks`, it writes to a temporary file and then
+    moves it into place.
+
+    :param path: The `path` parameter is the location of the snapshot
+    :type path: str
+    :param tasks: The `tasks` parameter is an iterable of `Task` in
+    order of task ID, with None for deleted tasks
+    """
+
+    usernames = {}
+    entries = []
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "wb") as file:
+
+        # Leave room for the header, which is written once the offsets
+        # of the tables are known
+        file.write(bytes(SNAPSHOT_HEADER.size))
+        offset = SNAPSHOT_HEADER.size
+
+        # Write the strings for each task and remember where they start
+        for task in tasks:
+            if task is None:
+                entries.append(SNAPSHOT_ENTRY.pack(0, 0, 0, 0,
+                                                   SNAPSHOT_DELETED))
+                continue
+
+            user_index = usernames.setdefault(task.username, len(usernames))
+            entries.append(SNAPSHOT_ENTRY.pack(
+                offset, user_index, task.due_date.toordinal(),
+                task.assigned_date.toordinal(),
+                SNAPSHOT_COMPLETED if task.completed else 0))
+
+            record = bytearray()
+            for text in (task.title, task.description):
+                encoded = text.encode("utf-8")
+                record += SNAPSHOT_LENGTH.pack(len(encoded))
+                record += encoded
+            file.write(record)
+            offset += len(record)
+
+        # Write the table of usernames
+        user_table_offset = offset
+        for username in usernames:
+            encoded = username.encode("utf-8")
+            file.write(SNAPSHOT_LENGTH.pack(len(encoded)))
+            file.write(encoded)
+            offset += SNAPSHOT_LENGTH.size + len(encoded)
+
+        # Write the fixed-width task table, then go back for the header
+        file.write(b"".join(entries))
+        file.seek(0)
+        file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                        len(entries), len(usernames),
+                                        user_table_offset, offset))
+
+    os.replace(tmp_path, path)
+
+
+# Marks a task in a snapshot which has not been decoded yet
+_UNREAD = object()
+
+
+class SnapshotTasks:
+    """
+    The class `SnapshotTasks` is a list-like sequence of the tasks in a
+    binary snapshot. The snapshot is memory-mapped and each task is only
+    decoded the first time it is used; tasks appended later are held in
+    memory like in an ordinary list. Deleted tasks are None.
+
+    :param path: The `path` parameter is the location of the snapshot
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self._open(path)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __getitem__(self, task_id):
+        task = self._tasks[task_id]
+        if task is _UNREAD:
+            task = self._tasks[task_id] = self._decode(task_id)
+        return task
+
+    def __setitem__(self, task_id, task):
+        self._tasks[task_id] = task
+
+    def __iter__(self):
+        for task_id in range(len(self._tasks)):
+            yield self[task_id]
+
+    def append(self, task):
+        """
+        The method `append` adds a task to the end of the sequence.
+
+        :param task: The `task` parameter is the task to add
+        :type task: Task
+        """
+
+        self._tasks.append(task)
+
+    def read_all(self):
+        """
+        The method `read_all` reads every task, like iterating over the
+        sequence, but without keeping the tasks it has to decode, so
+        that writing a new snapshot does not hold every task in memory.
+
+        :return: The method `read_all` yields each task in order, or
+        None for deleted tasks.
+        """
+
+        for task_id, task in enumerate(self._tasks):
+            yield self._decode(task_id) if task is _UNREAD else task
+
+    def remap(self, path):
+        """
+        The method `remap` maps a snapshot written from this sequence in
+        place of the one it was read from, releasing the old snapshot
+        and the tasks decoded from it. Tasks are decoded again from the
+        new snapshot when they are next used.
+
+        :param path: The `path` parameter is the location of the new
+        snapshot
+        :type path: str
+        """
+
+        self._open(path)
+
+    def _open(self, path):
+        with open(path, "rb") as snapshot_file:
+            self._map = mmap.mmap(snapshot_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+
+        (magic, version, task_count, user_count, user_table_offset,
+         self._table_offset) = SNAPSHOT_HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC or not 1 <= version <= SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a task snapshot")
+
+        # Read the usernames, which are few compared to the tasks
+        self._usernames = []
+        offset = user_table_offset
+        for _ in range(user_count):
+            username, offset = self._read_string(offset)
+            self._usernames.append(sys.intern(username))
+
+        self._snapshot_count = task_count
+        self._tasks = [_UNREAD] * task_count
+
+    def index_rows(self):
+        """
+        The method `index_rows` reads the username, due date and
+        completed flag of every task without decoding any titles or
+        descriptions, for building indexes on load.
+
+        :return: The method `index_rows` yields a tuple of username,
+        due date and completed flag for each task in order, or None for
+        deleted tasks.
+        """
+
+        table = memoryview(self._map)[
+            self._table_offset:
+            self._table_offset + self._snapshot_count * SNAPSHOT_ENTRY.size]
+        for task_id, (_, user_index, due_ordinal, _, flags) in \
+                enumerate(SNAPSHOT_ENTRY.iter_unpack(table)):
+
+            # Tasks which have been decoded may have changed since the
+            # snapshot was written
+            task = self._tasks[task_id]
+            if task is not _UNREAD:
+                yield None if task is None else \
+                    (task.username, task.due_date, task.completed)
+            elif flags & SNAPSHOT_DELETED:
+                yield None
+            else:
+                yield (self._usernames[user_index],
+                       date_from_ordinal(due_ordinal),
+                       bool(flags & SNAPSHOT_COMPLETED))
+        table.release()
+
+        for task in self._tasks[self._snapshot_count:]:
+            yield None if task is None else \
+                (task.username, task.due_date, task.completed)
+
+    def _read_string(self, offset):
+        (length,) = SNAPSHOT_LENGTH.unpack_from(self._map, offset)
+        offset += SNAPSHOT_LENGTH.size
+        return (str(self._map[offset:offset + length], "utf-8"),
+                offset + length)
+
+    def _decode(self, task_id):
+        (offset, user_index, due_ordinal, assigned_ordinal,
+         flags) = SNAPSHOT_ENTRY.unpack_from(
+             self._map, self._table_offset + task_id * SNAPSHOT_ENTRY.size)
+        if flags & SNAPSHOT_DELETED:
+            return None
+        title, offset = self._read_string(offset)
+        description, _ = self._read_string(offset)
+        return Task(self._usernames[user_index], title, description,
+                    date_from_ordinal(due_ordinal),
+                    date_from_ordinal(assigned_ordinal),
+                    bool(flags & SNAPSHOT_COMPLETED))
+
+
+class TextBackend:
+    """
+    The class `TextBackend` stores tasks in a semicolon separated text
+    file and users in user.txt. Each change to a task is appended to a
+    journal, which is replayed on load and folded back into the task
+    file by `compact`.
+
+    :param task_path: The `task_path` parameter is the location of the
+    task file
+    :type task_path: str
+    :param journal_path: The `journal_path` parameter is the location of
+    the journal holding changes made since the task file was written
+    :type journal_path: str
+    :param user_path: The `user_path` parameter is the location of the
+    user file, which holds one `username;password` pair per line. New
+    lines are appended, and a later line for a username replaces an
+    earlier one.
+    :type user_path: str
+    :param compact_threshold: The optional `compact_threshold` parameter
+    is the number of journal records which triggers a compaction
+    :type compact_threshold: int
+    :param sync: The optional `sync` parameter can be set to True to
+    flush each journal write to disk with `os.fsync` before returning,
+    which is best combined with `batch`
+    :type sync: bool
+
+    Processes sharing the files hold `lock`, a `FileLock` on the task
+    file's path with ".lock" added, while reading or writing them. Each
+    process remembers how far into the journal it has read and which
+    version of the task file it loaded, so that `refresh` only has to
+    read the records written since.
+
+    `bytes_written` counts the bytes this backend has written to the
+    task, journal and user files.
+    """
+
+    def __init__(self, task_path="tasks.txt",
+                 journal_path="tasks_journal.txt", user_path="user.txt",
+                 compact_threshold=JOURNAL_COMPACT_THRESHOLD, sync=False):
+        self.task_path = task_path
+        self.journal_path = journal_path
+        self.user_path = user_path
+        self.compact_threshold = compact_threshold
+        self.sync = sync
+        self.journal_record_count = 0
+        self.bytes_written = 0
+        self.lock = FileLock(task_path + ".lock")
+        self._tasks = []
+        self._snapshot_stamp = None
+        self._journal_offset = 0
+        self._pending_changes = {}
+        self._batch = None
+
+    def locked(self, exclusive=True):
+        """
+        The method `locked` holds the storage lock for the duration of a
+        `with` block, so that a change can be checked against the latest
+        tasks and written without another process writing in between.
+
+        :param exclusive: The optional `exclusive` parameter is False
+        when only reading
+        :type exclusive: bool
+        """
+
+        return self.lock.hold(exclusive)
+
+    @contextmanager
+    def batch(self):
+        """
+        The method `batch` holds the lock for the duration of a `with`
+        block and collects the journal records written in it, appending
+        them all with a single write at the end of the block.
+        """
+
+        with self.locked():
+            if self._batch is not None:
+                yield
+                return
+
+            self._batch = []
+            try:
+                yield
+            finally:
+                records, self._batch = self._batch, None
+                if records:
+                    self._append_journal_records(records)
+
+    def users_stamp(self):
+        """
+        The method `users_stamp` returns a value which changes whenever
+        the user file is written.
+        """
+
+        return _file_stamp(self.user_path)
+
+    def load_users(self):
+        """
+        The method `load_users` reads the user file, writing one with a
+        default admin account first if it does not exist.
+
+        :return: The method `load_users` returns a dictionary mapping
+        each username to its stored password.
+        """
+
+        with self.locked():
+            if not os.path.exists(self.user_path):
+                with open(self.user_path, "w",
+                          encoding="utf-8") as default_file:
+                    default_file.write("admin;password")
+
+            with open(self.user_path, "r", encoding="utf-8") as user_file:
+                login_data = user_file.read().split("\n")
+
+        username_password = {}
+        for user in login_data:
+            if user == "":
+                continue
+            username, password = user.split(";")
+            username_password[username] = password
+        return username_password
+
+    def save_user(self, username, password):
+        """
+        The method `save_user` records a new or changed user by
+        appending one line to the user file.
+
+        :param username: The `username` parameter is the username
+        :type username: str
+        :param password: The `password` parameter is the stored password
+        :type password: str
+        """
+
+        # Lines are separated rather than terminated by newlines
+        with self.locked():
+            separator = "\n" if os.path.getsize(self.user_path) else ""
+            line = f"{separator}{username};{password}"
+            with open(self.user_path, "a", encoding="utf-8") as out_file:
+                out_file.write(line)
+            self.bytes_written += len(line.encode("utf-8"))
+
+    def save_users(self, username_password):
+        """
+        The method `save_users` rewrites the user file with every user.
+
+        :param username_password: The `username_password` parameter is a
+        dictionary mapping each username to its stored password
+        :type username_password: dict
+        """
+
+        tmp_path = self.user_path + ".tmp"
+        with self.locked():
+            with open(tmp_path, "w", encoding="utf-8") as out_file:
+                user_data = []
+                for key, value in username_password.items():
+                    user_data.append(f"{key};{value}")
+                out_file.write("\n".join(user_data))
+            os.replace(tmp_path, self.user_path)
+            self.bytes_written += os.path.getsize(self.user_path)
+
+    def load_tasks(self):
+        """
+        The method `load_tasks` reads the task file, creating it first
+        if it does not exist, and then replays the journal.
+
+        :return: The method `load_tasks` returns a tuple of the list of
+        tasks and the number of rows read from the file and journal.
+        """
+
+        with self.locked(exclusive=not os.path.exists(self.task_path)):
+            if not os.path.exists(self.task_path):
+                self._write_snapshot([])
+
+            self._snapshot_stamp = _file_stamp(self.task_path)
+            self._tasks = self._read_snapshot()
+            num_rows = len(self._tasks)
+
+            # Apply any changes recorded in the journal since the task
+            # file was last written
+            self._journal_offset = 0
+            self.journal_record_count = 0
+            self._replay_journal()
+            return self._tasks, num_rows + self.journal_record_count
+
+    def refresh(self):
+        """
+        The method `refresh` brings the tasks up to date with changes
+        written by other processes since they were loaded or last
+        refreshed. If the journal has only grown, just the new records
+        are read; if another process has rewritten the task file, the
+        tasks are reloaded and compared with those held before.
+
+        :return: The method `refresh` returns a tuple of the tasks, which
+        may be a new sequence, and a dictionary mapping the ID of each
+        task changed or deleted by another process to a tuple of its
+        username, due date and completed flag before the change, or to
+        None for tasks which were added.
+        """
+
+        with self.locked(exclusive=False):
+            changes = self._pending_changes
+            self._pending_changes = {}
+
+            journal_size = _file_stamp(self.journal_path)[1]
+            if _file_stamp(self.task_path) != self._snapshot_stamp or \
+                    journal_size < self._journal_offset:
+                old_rows = list(self.index_rows(self._tasks))
+                self.load_tasks()
+                for task_id, row in changed_rows(
+                        old_rows, self.index_rows(self._tasks)).items():
+                    changes.setdefault(task_id, row)
+
+            elif journal_size > self._journal_offset:
+                self._replay_journal(changes)
+
+            return self._tasks, changes
+
+    def index_rows(self, tasks):
+        """
+        The method `index_rows` reads the fields needed to build the
+        task store's indexes.
+
+        :param tasks: The `tasks` parameter is the list returned by
+        `load_tasks`
+        :return: The method `index_rows` yields a tuple of username,
+        due date and completed flag for each task in order, or None for
+        deleted tasks.
+        """
+
+        return (None if task is None else
+                (task.username, task.due_date, task.completed)
+                for task in tasks)
+
+    def add_task(self, task_id, task):
+        """
+        The method `add_task` records a newly added task.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param task: The `task` parameter is the new task
+        :type task: Task
+        """
+
+        self._append_journal_record(self._add_record(task_id, task))
+
+    def add_tasks(self, new_tasks):
+        """
+        The method `add_tasks` records a batch of newly added tasks with
+        a single write: either one append to the journal or, if the
+        batch would take the journal past its threshold, one compaction.
+
+        :param new_tasks: The `new_tasks` parameter is a list of
+        `(task_id, task)` pairs
+        :type new_tasks: list
+        """
+
+        if self.journal_record_count + len(new_tasks) >= \
+                self.compact_threshold:
+            self.compact()
+            return
+
+        self._append_journal_records([self._add_record(task_id, task)
+                                      for task_id, task in new_tasks])
+
+    def update_task(self, task_id, task, fields):
+        """
+        The method `update_task` records a change to a task.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param task: The `task` parameter is the task, already changed
+        :type task: Task
+        :param fields: The `fields` parameter names the attributes which
+        changed, out of "username", "due_date" and "completed"
+        :type fields: tuple
+        """
+
+        if fields == ("completed",) and task.completed:
+            self._append_journal_record({"op": "complete", "id": task_id})
+            return
+
+        record = {"op": "edit", "id": task_id}
+        for field in fields:
+            value = getattr(task, field)
+            if field == "due_date":
+                value = value.strftime(DATETIME_STRING_FORMAT)
+            record[field] = value
+        self._append_journal_record(record)
+
+    def delete_task(self, task_id):
+        """
+        The method `delete_task` records that a task was deleted. Its ID
+        is not used again.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        """
+
+        self._append_journal_record({"op": "delete", "id": task_id})
+
+    def delete_tasks(self, task_ids):
+        """
+        The method `delete_tasks` records that a batch of tasks was
+        deleted with a single write, like `add_tasks`.
+
+        :param task_ids: The `task_ids` parameter is a list of task IDs
+        :type task_ids: list
+        """
+
+        if self.journal_record_count + len(task_ids) >= \
+                self.compact_threshold:
+            self.compact()
+            return
+
+        self._append_journal_records([{"op": "delete", "id": task_id}
+                                      for task_id in task_ids])
+
+    def compact(self):
+        """
+        The method `compact` folds the journal back into the task file
+        by writing a full snapshot of the tasks and then emptying the
+        journal.
+        """
+
+        with self.locked():
+
+            # Never write a snapshot missing another process's changes,
+            # which are kept for the next refresh
+            tasks, self._pending_changes = self.refresh()
+
+            # The snapshot includes the changes of any batch in progress
+            if self._batch:
+                self._batch.clear()
+
+            self._write_snapshot(tasks)
+            with open(self.journal_path, "w", encoding="utf-8"):
+                pass
+            self._snapshot_stamp = _file_stamp(self.task_path)
+            self.bytes_written += self._snapshot_stamp[1]
+            self._journal_offset = 0
+            self.journal_record_count = 0
+
+    def close(self):
+        """
+        The method `close` folds any outstanding journal records into
+        the task file, leaving it complete for other readers.
+        """
+
+        if self.journal_record_count:
+            self.compact()
+        self.lock.close()
+
+    def _read_snapshot(self):
+        return list(read_text_tasks(self.task_path))
+
+    def _write_snapshot(self, tasks):
+        write_text_tasks(self.task_path, tasks)
+
+    def _add_record(self, task_id, task):
+        return {
+            "op": "add",
+            "id": task_id,
+            "username": task.username,
+            "title": task.title,
+            "description": task.description,
+            "due_date": task.due_date.strftime(DATETIME_STRING_FORMAT),
+            "assigned_date":
+                task.assigned_date.strftime(DATETIME_STRING_FORMAT),
+            "completed": task.completed
+        }
+
+    def _append_journal_record(self, record):
+        self._append_journal_records([record])
+
+    def _append_journal_records(self, records):
+        if self._batch is not None:
+            self._batch.extend(records)
+            return
+
+        data = "".join(json.dumps(record) + "\n"
+                       for record in records).encode("utf-8")
+        with self.locked():
+            with open(self.journal_path, "ab") as journal_file:
+                start = journal_file.seek(0, os.SEEK_END)
+
+                # Finish off a record left partly written by a process
+                # which stopped, so that it cannot run into this one
+                if start != self._journal_offset and \
+                        not self._journal_ends_line(start):
+                    data = b"\n" + data
+                journal_file.write(data)
+                self.bytes_written += len(data)
+                if self.sync:
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+
+            # Only skip over these records on the next refresh if every
+            # record before them has already been read
+            if start == self._journal_offset:
+                self._journal_offset += len(data)
+
+            self.journal_record_count += len(records)
+            if self.journal_record_count >= self.compact_threshold:
+                self.compact()
+
+    def _journal_ends_line(self, size):
+        if size == 0:
+            return True
+        with open(self.journal_path, "rb") as journal_file:
+            journal_file.seek(size - 1)
+            return journal_file.read(1) == b"\n"
+
+    def _apply_journal_record(self, record, changes=None):
+        tasks = self._tasks
+        task_id = record["id"]
+
+        # Records are idempotent, so a journal which has already been
+        # folded into the task file can be replayed safely
+        if record["op"] == "add":
+
+            # Skip tasks which are already present in the snapshot, or
+            # which were deleted before it was written
+            if task_id < len(tasks):
+                return
+            while len(tasks) < task_id:
+                tasks.append(None)
+            tasks.append(Task(sys.intern(record["username"]),
+                              record["title"],
+                              record["description"],
+                              parse_date(record["due_date"]),
+                              parse_date(record["assigned_date"]),
+                              record["completed"]))
+            if changes is not None:
+                changes.setdefault(task_id, None)
+            return
+
+        # Skip changes to tasks deleted before the snapshot was written
+        task = tasks[task_id]
+        if task is None:
+            return
+        if changes is not None:
+            changes.setdefault(task_id, (task.username, task.due_date,
+                                         task.completed))
+
+        if record["op"] == "delete":
+            tasks[task_id] = None
+
+        elif record["op"] == "complete":
+            task.completed = True
+
+        elif record["op"] == "edit":
+            if "username" in record:
+                task.username = sys.intern(record["username"])
+            if "due_date" in record:
+                task.due_date = parse_date(record["due_date"])
+            if "completed" in record:
+                task.completed = record["completed"]
+
+    def _replay_journal(self, changes=None):
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, "rb") as journal_file:
+            journal_file.seek(self._journal_offset)
+            for line in journal_file:
+
+                # Leave a trailing record which was only partly written
+                if not line.endswith(b"\n"):
+                    break
+                self._journal_offset += len(line)
+
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+
+                self._apply_journal_record(record, changes)
+                self.journal_record_count += 1
+
+
+def _file_stamp(path):
+    # Files are replaced rather than rewritten in place, so the inode
+    # changes as well as the size and modification time
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None, 0, 0
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class BinaryBackend(TextBackend):
+    """
+    The class `BinaryBackend` works like `TextBackend`, but keeps the
+    tasks in a memory-mapped binary snapshot, in which tasks are only
+    decoded when they are first used.
+
+    Its journal is kept apart from a `TextBackend`'s, by default in the
+    snapshot's path with ".journal" added, so that records written
+    against one task file are never replayed against the other.
+    """
+
+    def __init__(self, task_path="tasks.bin", journal_path=None, **kwargs):
+        if journal_path is None:
+            journal_path = task_path + ".journal"
+        super().__init__(task_path, journal_path, **kwargs)
+
+    def index_rows(self, tasks):
+        return tasks.index_rows()
+
+    def _read_snapshot(self):
+        return SnapshotTasks(self.task_path)
+
+    def _write_snapshot(self, tasks):
+        if not isinstance(tasks, SnapshotTasks):
+            write_snapshot(self.task_path, tasks)
+            return
+
+        # The tasks are read from the new snapshot from now on, rather
+        # than kept decoded in memory alongside the old one
+        write_snapshot(self.task_path, tasks.read_all())
+        tasks.remap(self.task_path)
+
+
+class SqliteBackend:
+    """
+    The class `SqliteBackend` stores tasks and users in an SQLite
+    database. Every change is written as a single-row INSERT or UPDATE,
+    and the tasks table is indexed on username, due date and completed
+    so that reporting queries do not need to scan it.
+
+    Triggers record the ID of every inserted, updated or deleted task in
+    the task_changes table, so that `refresh` can read back just the
+    tasks changed by other processes, and keep the ID of the next task
+    to be added in the task_ids table, so that the IDs of deleted tasks
+    are not used again. Like `TextBackend`, writes are made while
+    holding `lock`.
+
+    :param path: The `path` parameter is the location of the database
+    :type path: str
+    :param change_log_size: The optional `change_log_size` parameter is
+    the number of changes kept in task_changes after a compaction;
+    processes further behind than this reload every task
+    :type change_log_size: int
+    """
+
+    def __init__(self, path="tasks.db",
+                 change_log_size=JOURNAL_COMPACT_THRESHOLD):
+        self.path = path
+        self.change_log_size = change_log_size
+        self.lock = FileLock(path + ".lock")
+        self._tasks = []
+        self._change_seq = 0
+        self._batch_depth = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                password TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                due_date TEXT NOT NULL,
+                assigned_date TEXT NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS tasks_username ON tasks (username);
+            CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date);
+            CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+            CREATE TABLE IF NOT EXISTS task_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER NOT NULL
+            );
+            CREATE TRIGGER IF NOT EXISTS tasks_inserted
+            AFTER INSERT ON tasks BEGIN
+                INSERT INTO task_changes (task_id) VALUES (new.id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_updated
+            AFTER UPDATE ON tasks BEGIN
+                INSERT INTO task_changes (task_id) VALUES (new.id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_deleted
+            AFTER DELETE ON tasks BEGIN
+                INSERT INTO task_changes (task_id) VALUES (old.id);
+            END;
+            CREATE TABLE IF NOT EXISTS task_ids (
+                next_id INTEGER NOT NULL
+            );
+            INSERT INTO task_ids (next_id)
+                SELECT COALESCE(MAX(id) + 1, 0) FROM tasks
+                WHERE NOT EXISTS (SELECT 1 FROM task_ids);
+            CREATE TRIGGER IF NOT EXISTS tasks_numbered
+            AFTER INSERT ON tasks BEGIN
+                UPDATE task_ids SET next_id = MAX(next_id, new.id + 1);
+            END;
+        """)
+
+    def locked(self, exclusive=True):
+        """
+        The method `locked` holds the storage lock for the duration of a
+        `with` block, like `TextBackend.locked`.
+        """
+
+        return self.lock.hold(exclusive)
+
+    @contextmanager
+    def batch(self):
+        """
+        The method `batch` holds the lock for the duration of a `with`
+        block and makes the changes written in it in one transaction.
+        """
+
+        with self._writing():
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+
+    def users_stamp(self):
+        """
+        The method `users_stamp` returns a value which changes whenever
+        another connection writes to the database.
+        """
+
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def load_users(self):
+        """
+        The method `load_users` reads the users table, adding a default
+        admin account first if it is empty.
+
+        :return: The method `load_users` returns a dictionary mapping
+        each username to its stored password.
+        """
+
+        with self.locked(), self.connection:
+            self.connection.execute(
+                "INSERT INTO users (username, password) "
+                "SELECT 'admin', 'password' "
+                "WHERE NOT EXISTS (SELECT 1 FROM users)")
+
+        return dict(self.connection.execute(
+            "SELECT username, password FROM users ORDER BY rowid"))
+
+    def save_user(self, username, password):
+        """
+        The method `save_user` inserts or updates a single user.
+
+        :param username: The `username` parameter is the username
+        :type username: str
+        :param password: The `password` parameter is the stored password
+        :type password: str
+        """
+
+        self.save_users({username: password})
+
+    def save_users(self, username_password):
+        """
+        The method `save_users` inserts or updates users in a single
+        transaction.
+
+        :param username_password: The `username_password` parameter is a
+        dictionary mapping each username to its stored password
+        :type username_password: dict
+        """
+
+        with self.locked(), self.connection:
+            self.connection.executemany(
+                "INSERT INTO users (username, password) VALUES (?, ?) "
+                "ON CONFLICT (username) DO UPDATE SET password = "
+                "excluded.password",
+                username_password.items())
+
+    def load_tasks(self):
+        """
+        The method `load_tasks` reads every task from the database.
+
+        :return: The method `load_tasks` returns a tuple of the list of
+        tasks, indexed by task ID, and the number of rows read.
+        """
+
+        with self.locked(exclusive=False):
+            self._change_seq = self._last_change_seq()
+            (next_id,) = self.connection.execute(
+                "SELECT next_id FROM task_ids").fetchone()
+            self._tasks = [None] * next_id
+            num_rows = 0
+            for row in self.connection.execute(
+                    "SELECT id, username, title, description, due_date, "
+                    "assigned_date, completed FROM tasks ORDER BY id"):
+                self._tasks[row[0]] = self._task_from_row(row)
+                num_rows += 1
+        return self._tasks, num_rows
+
+    def refresh(self):
+        """
+        The method `refresh` brings the tasks up to date with changes
+        written by other processes, reading back only the changed rows
+        unless this process has fallen so far behind that the changes
+        have been pruned, in which case every task is reloaded.
+
+        :return: The method `refresh` returns a tuple of the tasks and a
+        dictionary of the changed task IDs, as for
+        `TextBackend.refresh`.
+        """
+
+        with self.locked(exclusive=False):
+            last_seq = self._last_change_seq()
+            if last_seq == self._change_seq:
+                return self._tasks, {}
+
+            (first_seq,) = self.connection.execute(
+                "SELECT MIN(seq) FROM task_changes").fetchone()
+            if first_seq is None or first_seq > self._change_seq + 1:
+                old_rows = list(self.index_rows(self._tasks))
+                self.load_tasks()
+                return self._tasks, changed_rows(
+                    old_rows, self.index_rows(self._tasks))
+
+            # Deleted tasks have no row to join
+            changes = {}
+            tasks = self._tasks
+            for row in self.connection.execute(
+                    "SELECT changed.task_id, username, title, description, "
+                    "due_date, assigned_date, completed FROM "
+                    "(SELECT DISTINCT task_id FROM task_changes "
+                    "WHERE seq > ?) AS changed "
+                    "LEFT JOIN tasks ON tasks.id = changed.task_id "
+                    "ORDER BY changed.task_id", (self._change_seq,)):
+                task_id = row[0]
+                new_task = None if row[1] is None \
+                    else self._task_from_row(row)
+                if task_id >= len(tasks):
+                    tasks.extend(repeat(None, task_id - len(tasks)))
+                    tasks.append(new_task)
+                    changes[task_id] = None
+                    continue
+
+                task = tasks[task_id]
+                if task is None:
+                    continue
+                changes[task_id] = (task.username, task.due_date,
+                                    task.completed)
+                if new_task is None:
+                    tasks[task_id] = None
+                    continue
+                task.username = new_task.username
+                task.due_date = new_task.due_date
+                task.completed = new_task.completed
+
+            self._change_seq = last_seq
+            return tasks, changes
+
+    def index_rows(self, tasks):
+        """
+        The method `index_rows` reads the fields needed to build the
+        task store's indexes.
+
+        :param tasks: The `tasks` parameter is the list returned by
+        `load_tasks`
+        :return: The method `index_rows` yields a tuple of username,
+        due date and completed flag for each task in order, or None for
+        deleted tasks.
+        """
+
+        return (None if task is None else
+                (task.username, task.due_date, task.completed)
+                for task in tasks)
+
+    def add_task(self, task_id, task):
+        """
+        The method `add_task` inserts a newly added task.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param task: The `task` parameter is the new task
+        :type task: Task
+        """
+
+        self.add_tasks([(task_id, task)])
+
+    def add_tasks(self, new_tasks):
+        """
+        The method `add_tasks` inserts a batch of newly added tasks in a
+        single transaction.
+
+        :param new_tasks: The `new_tasks` parameter is a list of
+        `(task_id, task)` pairs
+        :type new_tasks: list
+        """
+
+        with self._writing():
+            self.connection.executemany(
+                "INSERT INTO tasks (id, username, title, description, "
+                "due_date, assigned_date, completed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(task_id, task.username, task.title, task.description,
+                  task.due_date.strftime(DATETIME_STRING_FORMAT),
+                  task.assigned_date.strftime(DATETIME_STRING_FORMAT),
+                  task.completed)
+                 for task_id, task in new_tasks])
+
+    def update_task(self, task_id, task, fields):
+        """
+        The method `update_task` updates the changed columns of a task.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        :param task: The `task` parameter is the task, already changed
+        :type task: Task
+        :param fields: The `fields` parameter names the attributes which
+        changed, out of "username", "due_date" and "completed"
+        :type fields: tuple
+        """
+
+        values = []
+        for field in fields:
+            value = getattr(task, field)
+            if field == "due_date":
+                value = value.strftime(DATETIME_STRING_FORMAT)
+            values.append(value)
+
+        # The field names come from the task store, never from input
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self._writing():
+            self.connection.execute(
+                f"UPDATE tasks SET {assignments} WHERE id = ?",
+                (*values, task_id))
+
+    def delete_task(self, task_id):
+        """
+        The method `delete_task` deletes a task. Its ID is not used
+        again.
+
+        :param task_id: The `task_id` parameter is the ID of the task
+        :type task_id: int
+        """
+
+        self.delete_tasks([task_id])
+
+    def delete_tasks(self, task_ids):
+        """
+        The method `delete_tasks` deletes a batch of tasks in a single
+        transaction.
+
+        :param task_ids: The `task_ids` parameter is a list of task IDs
+        :type task_ids: list
+        """
+
+        with self._writing():
+            self.connection.executemany("DELETE FROM tasks WHERE id = ?",
+                                        [(task_id,) for task_id in task_ids])
+
+    def task_counts(self, now, exclude_ids=()):
+        """
+        The method `task_counts` counts tasks for each user with an
+        indexed aggregate query, without loading any tasks.
+
+        :param now: The `now` parameter is the moment against which due
+        dates are compared
+        :type now: datetime
+        :param exclude_ids: The optional `exclude_ids` parameter holds
+        the IDs of tasks which are left out of the counts
+        :type exclude_ids: Iterable[int]
+        :return: The method `task_counts` returns a dictionary mapping
+        each username to a tuple of its total, completed and overdue
+        task counts.
+        """
+
+        # A task is overdue once `now` is past midnight on its due date
+        if now == datetime(now.year, now.month, now.day):
+            cutoff = now
+        else:
+            cutoff = now + timedelta(days=1)
+
+        return {
+            username: (total, completed, overdue)
+            for username, total, completed, overdue in self.connection.execute(
+                "SELECT username, COUNT(*), SUM(completed), "
+                "SUM(NOT completed AND due_date < ?) "
+                "FROM tasks WHERE id NOT IN (SELECT value FROM json_each(?)) "
+                "GROUP BY username",
+                (cutoff.strftime(DATETIME_STRING_FORMAT),
+                 json.dumps(list(exclude_ids))))}
+
+    def compact(self):
+        """
+        The method `compact` prunes old entries from the change log and
+        checkpoints the write-ahead log into the database file.
+        """
+
+        with self.locked():
+            with self.connection:
+                self.connection.execute(
+                    "DELETE FROM task_changes WHERE seq <= ?",
+                    (self._last_change_seq() - self.change_log_size,))
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """
+        The method `close` checkpoints and closes the database.
+        """
+
+        self.compact()
+        self.connection.close()
+        self.lock.close()
+
+    @contextmanager
+    def _writing(self):
+
+        # Changes made in a batch join the batch's transaction
+        if self._batch_depth:
+            yield
+            return
+
+        # Write in a transaction while holding the lock, and skip over
+        # the changes written if every earlier change has been read
+        with self.locked():
+            caught_up = self._last_change_seq() == self._change_seq
+            with self.connection:
+                yield
+            if caught_up:
+                self._change_seq = self._last_change_seq()
+
+    def _last_change_seq(self):
+        row = self.connection.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _task_from_row(row):
+        _, username, title, description, due_date, assigned_date, \
+            completed = row
+        return Task(sys.intern(username), title, description,
+                    parse_date(due_date), parse_date(assigned_date),
+                    bool(completed))
+
+
+class TaskArchive:
+    """
+    The class `TaskArchive` keeps tasks which have been moved out of the
+    task store in compressed, append-only segment files in a directory,
+    one for each month in which tasks were due. Each archive run appends
+    one gzip member to the segments it adds tasks to, and the segments
+    are never rewritten.
+
+    The summary file records how many bytes of each segment have been
+    written in full and how many tasks of each user it holds, so the
+    archived tasks can be counted without reading the segments. Bytes
+    past that size, left by an interrupted run, are ignored and written
+    over by the next. The summary also lists the IDs of the tasks added
+    by the last run until they have been deleted from the task store, so
+    that a run which was interrupted in between can be finished.
+
+    Archive runs are made while holding the storage backend's lock.
+
+    :param directory: The optional `directory` parameter is the location
+    of the archive, which is created when tasks are first archived
+    :type directory: str
+    """
+
+    def __init__(self, directory="tasks_archive"):
+        self.directory = directory
+        self.summary_path = os.path.join(directory, ARCHIVE_SUMMARY)
+        self.segments = {}
+        self.pending = []
+        self.bytes_written = 0
+        self._summary_stamp = None
+
+    def refresh(self):
+        """
+        The method `refresh` reads the summary if it has changed since it
+        was last read or written.
+
+        :return: The method `refresh` returns True if the summary was
+        read.
+        """
+
+        stamp = _file_stamp(self.summary_path)
+        if stamp == self._summary_stamp:
+            return False
+
+        self._summary_stamp = stamp
+        if stamp[0] is None:
+            self.segments = {}
+            self.pending = []
+        else:
+            with open(self.summary_path, "r", encoding="utf-8") as in_file:
+                summary = json.load(in_file)
+            self.segments = summary["segments"]
+            self.pending = summary["pending"]
+        return True
+
+    def user_counts(self):
+        """
+        The method `user_counts` counts the archived tasks of each user
+        from the summary.
+
+        :return: The method `user_counts` returns a dictionary mapping
+        each username to its number of archived tasks.
+        """
+
+        user_counts = {}
+        for segment in self.segments.values():
+            for username, count in segment["counts"].items():
+                user_counts[username] = user_counts.get(username, 0) + count
+        return user_counts
+
+    def append(self, tasks):
+        """
+        The method `append` adds tasks to the segments of the months in
+        which they are due and records them as pending deletion from the
+        task store.
+
+        :param tasks: The `tasks` parameter is a list of `(task_id,
+        task)` pairs
+        :type tasks: list
+        """
+
+        months = {}
+        for task_id, task in tasks:
+            months.setdefault(task.due_date.strftime("%Y-%m"), []).append(
+                (task_id, task))
+
+        os.makedirs(self.directory, exist_ok=True)
+        segments = {month: {"size": segment["size"],
+                            "counts": dict(segment["counts"])}
+                    for month, segment in self.segments.items()}
+        for month, month_tasks in sorted(months.items()):
+            segment = segments.setdefault(month, {"size": 0, "counts": {}})
+            rows = io.StringIO()
+            write_task_rows(rows, month_tasks, "jsonl")
+            data = gzip.compress(rows.getvalue().encode("utf-8"))
+
+            with open(self._segment_path(month), "ab") as segment_file:
+                segment_file.truncate(segment["size"])
+                segment_file.write(data)
+                segment_file.flush()
+                os.fsync(segment_file.fileno())
+
+            segment["size"] += len(data)
+            self.bytes_written += len(data)
+            counts = segment["counts"]
+            for _, task in month_tasks:
+                counts[task.username] = counts.get(task.username, 0) + 1
+
+        self.segments = segments
+        self.pending = [task_id for task_id, _ in tasks]
+        self._write_summary()
+
+    def clear_pending(self):
+        """
+        The method `clear_pending` records that the tasks added by the
+        last run have been deleted from the task store.
+        """
+
+        self.pending = []
+        self._write_summary()
+
+    def read(self, month=None):
+        """
+        The method `read` reads archived tasks back from the segments.
+
+        :param month: The optional `month` parameter is the segment to
+        read, as "YYYY-MM", by default every segment in order
+        :type month: str
+        :return: The method `read` yields a `(task_id, task)` pair for
+        each archived task.
+        """
+
+        months = sorted(self.segments) if month is None else [month]
+        for month in months:
+            with open(self._segment_path(month), "rb") as segment_file:
+                data = segment_file.read(self.segments[month]["size"])
+            for line in gzip.decompress(data).splitlines():
+                row = json.loads(line)
+                yield row["id"], Task(sys.intern(row["username"]),
+                                      row["title"], row["description"],
+                                      parse_date(row["due_date"]),
+                                      parse_date(row["assigned_date"]),
+                                      row["completed"])
+
+    def _segment_path(self, month):
+        return os.path.join(self.directory,
+                            ARCHIVE_SEGMENT_FORMAT.format(month=month))
+
+    def _write_summary(self):
+        tmp_path = self.summary_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out_file:
+            json.dump({"segments": self.segments, "pending": self.pending},
+                      out_file)
+        os.replace(tmp_path, self.summary_path)
+        self._summary_stamp = _file_stamp(self.summary_path)
+        self.bytes_written += self._summary_stamp[1]
+
+
+class ChangeFeed:
+    """
+    The class `ChangeFeed` is an append-only log of the changes made to
+    tasks, numbered in order from 1, which other processes can read from
+    any sequence number onwards without reading the events before it.
+
+    Each event is a dictionary with "seq", "op" and "id" keys and the
+    fields of the change, written as one JSON line. The index file holds
+    the end offset of each event as a fixed-width integer, so the number
+    of events is the size of the index and the events after sequence
+    number N start at the N-th offset. Bytes past the last indexed
+    event, left by an interrupted write, are ignored and written over by
+    the next.
+
+    Events are appended while holding the storage backend's lock, and
+    can be read at any time.
+
+    :param path: The optional `path` parameter is the location of the
+    event file
+    :type path: str
+    :param index_path: The optional `index_path` parameter is the
+    location of the index file
+    :type index_path: str
+    :param sync: The optional `sync` parameter can be set to True to
+    flush each write to disk with `os.fsync` before returning
+    :type sync: bool
+    """
+
+    def __init__(self, path="tasks_events.txt",
+                 index_path="tasks_events.idx", sync=False):
+        self.path = path
+        self.index_path = index_path
+        self.sync = sync
+        self.bytes_written = 0
+
+    def last_seq(self):
+        """
+        The method `last_seq` returns the sequence number of the latest
+        event, or 0 if there are none.
+        """
+
+        return _file_stamp(self.index_path)[1] // CHANGE_FEED_OFFSET.size
+
+    def append(self, events):
+        """
+        The method `append` numbers events and writes them, with a
+        single write to each file.
+
+        :param events: The `events` parameter is a list of dictionaries
+        with "op" and "id" keys and the fields of each change
+        :type events: list
+        :return: The method `append` returns the events as written, each
+        with its "seq" key added.
+        """
+
+        seq = self.last_seq()
+        end = self._end_offsets(seq - 1, seq)[0] if seq else 0
+        events = [{"seq": number, **event}
+                  for number, event in enumerate(events, seq + 1)]
+        lines = [(json.dumps(event) + "\n").encode("utf-8")
+                 for event in events]
+        offsets = list(accumulate((len(line) for line in lines), initial=end))
+
+        # The events are written before their offsets, so that an index
+        # entry never points past the end of the event file
+        for path, size, data in (
+                (self.path, end, b"".join(lines)),
+                (self.index_path, seq * CHANGE_FEED_OFFSET.size,
+                 b"".join(CHANGE_FEED_OFFSET.pack(offset)
+                          for offset in offsets[1:]))):
+            with open(path, "ab") as out_file:
+                out_file.truncate(size)
+                out_file.write(data)
+                self.bytes_written += len(data)
+                if self.sync:
+                    out_file.flush()
+                    os.fsync(out_file.fileno())
+        return events
+
+    def read(self, since=0, limit=None):
+        """
+        The method `read` reads the events after a sequence number.
+
+        :param since: The optional `since` parameter is the sequence
+        number of the last event already read, by default 0 to read from
+        the first event
+        :type since: int
+        :param limit: The optional `limit` parameter is the most events
+        read, by default every event up to the latest
+        :type limit: int
+        :return: The method `read` returns a list of events in order.
+        A negative `since` or `limit` raises a `ValueError`.
+        """
+
+        if since < 0 or limit is not None and limit < 0:
+            raise ValueError("The sequence number and limit must not be "
+                             "negative")
+        stop = self.last_seq()
+        if limit is not None:
+            stop = min(stop, since + limit)
+        if since >= stop:
+            return []
+
+        if since:
+            start, *_, end = self._end_offsets(since - 1, stop)
+        else:
+            start, end = 0, self._end_offsets(stop - 1, stop)[0]
+        with open(self.path, "rb") as in_file:
+            in_file.seek(start)
+            data = in_file.read(end - start)
+        return [json.loads(line) for line in data.splitlines()]
+
+    def _end_offsets(self, start, stop):
+        size = CHANGE_FEED_OFFSET.size
+        with open(self.index_path, "rb") as index_file:
+            index_file.seek(start * size)
+            data = index_file.read((stop - start) * size)
+        return [offset for offset, in CHANGE_FEED_OFFSET.iter_unpack(data)]
+
+
+def import_text(text_path, snapshot_path):
+    """
+    The function `import_text` converts a text task file into a binary
+    snapshot.
+
+    :param text_path: The `text_path` parameter is the location of the
+    text task file to read
+    :type text_path: str
+    :param snapshot_path: The `snapshot_path` parameter is the location
+    of the snapshot to write
+    :type snapshot_path: str
+    """
+
+    write_snapshot(snapshot_path, read_text_tasks(text_path))
+
+
+def export_text(snapshot_path, text_path):
+    """
+    The function `export_text` converts a binary snapshot into a text
+    task file.
+
+    :param snapshot_path: The `snapshot_path` parameter is the location
+    of the snapshot to read
+    :type snapshot_path: str
+    :param text_path: The `text_path` parameter is the location of the
+    text task file to write
+    :type text_path: str
+    """
+
+    write_text_tasks(text_path, SnapshotTasks(snapshot_path))
+
+
+def read_task_rows(path, file_format):
+    """
+    The function `read_task_rows` reads tasks to import from a CSV file
+    with a header row or from a JSON lines file. Values are returned as
+    found; checking them is left to `TaskStore.add_many`.
+
+    :param path: The `path` parameter is the location of the file
+    :type path: str
+    :param file_format: The `file_format` parameter is "csv" or "jsonl"
+    :type file_format: str
+    :return: The function `read_task_rows` yields a dictionary for each
+    row, or an error message string for a JSON line which could not be
+    read.
+    """
+
+    with open(path, "r", encoding="utf-8", newline="") as in_file:
+        if file_format == "csv":
+            yield from csv.DictReader(in_file)
+            return
+
+        for line in in_file:
+            if line.strip() == "":
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield f"Invalid JSON: {error}"
+                continue
+            if not isinstance(row, dict):
+                yield "Invalid JSON: expected an object"
+                continue
+            yield row
+
+
+def write_task_rows(out_file, tasks, file_format):
+    """
+    The function `write_task_rows` writes tasks for export as CSV with a
+    header row, as JSON lines, or in the text format of tasks.txt.
+
+    :param out_file: The `out_file` parameter is an open text file
+    :param tasks: The `tasks` parameter is an iterable of `(task_id,
+    task)` pairs
+    :param file_format: The `file_format` parameter is "csv", "jsonl" or
+    "text"
+    :type file_format: str
+    """
+
+    if file_format == "text":
+        out_file.writelines(f"{task.to_line()};{task_id}\n"
+                            for task_id, task in tasks)
+        return
+
+    rows = ((task_id, task.username, task.title, task.description,
+             task.due_date.strftime(DATETIME_STRING_FORMAT),
+             task.assigned_date.strftime(DATETIME_STRING_FORMAT),
+             task.completed)
+            for task_id, task in tasks)
+
+    if file_format == "csv":
+        writer = csv.writer(out_file)
+        writer.writerow(TASK_ROW_FIELDS)
+        writer.writerows(row[:-1] + ("Yes" if row[-1] else "No",)
+                         for row in rows)
+    else:
+        out_file.writelines(json.dumps(dict(zip(TASK_ROW_FIELDS, row))) + "\n"
+                            for row in rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Convert between text task files and binary snapshots.")
+    parser.add_argument("direction", choices=["import", "export"],
+                        help="import a text file into a snapshot, or "
+                             "export a snapshot to a text file")
+    parser.add_argument("text_path", help="text task file, e.g. tasks.txt")
+    parser.add_argument("snapshot_path",
+                        help="binary snapshot, e.g. tasks.bin")
+    args = parser.parse_args()
+
+    if args.direction == "import":
+        import_text(args.text_path, args.snapshot_path)
+    else:
+        export_text(args.snapshot_path, args.text_path)
@@ -0,0 +1,66 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# The modules live at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+from task_storage import BinaryBackend, SqliteBackend, TextBackend
+
+BACKENDS = ("text", "binary", "sqlite")
+
+# The moment reports are generated for, and the date tasks are assigned
+NOW = datetime(2026, 10, 15, 9, 30)
+ASSIGNED = datetime(2026, 1, 1)
+
+
+def make_backend(kind, compact_threshold=1000):
+    """
+    The function `make_backend` opens a storage backend on the default
+    files in the current directory.
+
+    :param kind: The `kind` parameter is "text", "binary" or "sqlite"
+    :type kind: str
+    :param compact_threshold: The optional `compact_threshold` parameter
+    is the number of journal records, or change log rows with SQLite,
+    kept before they are folded away
+    :type compact_threshold: int
+    :return: The function `make_backend` returns the backend.
+    """
+
+    if kind == "text":
+        return TextBackend(compact_threshold=compact_threshold)
+    if kind == "binary":
+        return BinaryBackend(compact_threshold=compact_threshold)
+    return SqliteBackend(change_log_size=compact_threshold)
+
+
+def task_rows(task_store):
+    """
+    The function `task_rows` lists every field of the live tasks in a
+    task store, for comparing one store with another.
+
+    :param task_store: The `task_store` parameter is the `TaskStore`
+    :type task_store: TaskStore
+    :return: The function `task_rows` returns a dictionary mapping each
+    task ID to a tuple of the task's fields.
+    """
+
+    return {task_id: (task.username, task.title, task.description,
+                      task.due_date, task.assigned_date, task.completed)
+            for task_id, task in enumerate(task_store.tasks)
+            if task is not None}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    The fixture `workdir` runs a test in an empty temporary directory,
+    where the task manager creates its files.
+    """
+
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+from conftest import ASSIGNED, NOW, task_rows
+from task_engine import TaskStore
+
+
+def counts_key(counts):
+    totals, user_counts = counts
+    return ((totals.total, totals.completed, totals.uncompleted,
+             totals.overdue),
+            {username: (user.total, user.completed, user.uncompleted,
+                        user.overdue)
+             for username, user in user_counts.items() if user.total})
+
+
+def recount(task_store, now):
+    # Count the tasks one by one, as the reports originally did
+    totals = [0, 0, 0, 0]
+    user_counts = {}
+    for username, _, _, due_date, _, completed in \
+            task_rows(task_store).values():
+        for counts in (totals, user_counts.setdefault(username,
+                                                      [0, 0, 0, 0])):
+            counts[0] += 1
+            if completed:
+                counts[1] += 1
+            else:
+                counts[2] += 1
+                if now > due_date:
+                    counts[3] += 1
+    return (tuple(totals),
+            {username: tuple(counts)
+             for username, counts in user_counts.items()})
+
+
+def make_changes(task_store):
+    for number in range(20):
+        task_store.add(("admin", "bob", "amy")[number % 3],
+                       f"Task {number}", "Description",
+                       datetime(2026, 1 + number % 12, 1 + number),
+                       ASSIGNED)
+    for task_id in (0, 5, 7, 12):
+        task_store.complete(task_id)
+    task_store.reassign(3, "amy")
+    task_store.reassign(5, "zoe")
+    task_store.set_due_date(8, datetime(2027, 1, 1))
+    task_store.set_due_date(9, datetime(2025, 1, 1))
+
+
+def test_counters_follow_every_change(workdir):
+    task_store = TaskStore()
+    task_store.load()
+    make_changes(task_store)
+
+    # The counters give the same answer as counting, whenever the
+    # moment they are read for
+    for now in (NOW, datetime(2026, 1, 1), datetime(2030, 1, 1)):
+        assert counts_key(task_store.counts(now)) == \
+            recount(task_store, now)
+
+    # and are built again the same way on load
+    task_store.close()
+    reloaded = TaskStore()
+    reloaded.load()
+    assert counts_key(reloaded.counts(NOW)) == recount(reloaded, NOW)
+
+
+def test_user_index_follows_reassignment(workdir):
+    task_store = TaskStore()
+    task_store.load()
+    make_changes(task_store)
+    rows = task_rows(task_store)
+    for username in ("admin", "bob", "amy", "zoe", "nobody"):
+        task_ids = {task_id for task_id, row in rows.items()
+                    if row[0] == username}
+        assert task_store.task_ids_for(username) == task_ids
+        assert [task_id for task_id, _ in task_store.query(
+            username=username, completed=False)] == sorted(
+                task_id for task_id in task_ids if not rows[task_id][5])
+
+
+def test_query_pages_match_the_filtered_tasks(workdir):
+    task_store = TaskStore()
+    task_store.load()
+    make_changes(task_store)
+    rows = task_rows(task_store)
+
+    for filters, matches in (
+            ({}, lambda row: True),
+            ({"username": "amy"}, lambda row: row[0] == "amy"),
+            ({"overdue_as_of": NOW},
+             lambda row: not row[5] and NOW > row[3]),
+            ({"due_from": datetime(2026, 5, 1),
+              "due_to": datetime(2026, 12, 31)},
+             lambda row: datetime(2026, 5, 1) <= row[3] <=
+             datetime(2026, 12, 31))):
+        task_ids = sorted(task_id for task_id, row in rows.items()
+                          if matches(row))
+        assert [task_id for task_id, _ in task_store.query(**filters)] == \
+            task_ids
+        for offset in (0, 3, 19, 25):
+            assert [task_id for task_id, _ in task_store.query(
+                offset=offset, limit=4, **filters)] == \
+                task_ids[offset:offset + 4]
+
+
+def test_due_date_index_follows_every_change(workdir):
+    task_store = TaskStore()
+    task_store.load()
+    make_changes(task_store)
+    rows = task_rows(task_store)
+
+    def by_due_date(matches):
+        return sorted((row[3], task_id) for task_id, row in rows.items()
+                      if not row[5] and matches(task_id, row))
+
+    for as_of in (NOW, datetime(2026, 1, 1), datetime(2030, 1, 1)):
+        for username in (None, "amy", "zoe", "nobody"):
+            def owned(task_id, row):
+                return username is None or row[0] == username
+
+            assert [(task.due_date, task_id) for task_id, task in
+                    task_store.overdue(as_of, username)] == by_due_date(
+                lambda task_id, row: owned(task_id, row) and
+                as_of > row[3])
+            assert [(task.due_date, task_id) for task_id, task in
+                    task_store.due_within(60, as_of, username)] == \
+                by_due_date(lambda task_id, row: owned(task_id, row) and
+                            as_of <= row[3] <= as_of + timedelta(days=60))
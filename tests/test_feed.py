@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+from conftest import ASSIGNED, BACKENDS, make_backend
+from task_engine import TaskStore
+from task_storage import ChangeFeed
+
+TASK_MANAGER = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "task_manager.py")
+
+
+def load_store(kind):
+    task_store = TaskStore(make_backend(kind), feed=ChangeFeed())
+    task_store.load()
+    return task_store
+
+
+def test_feed_reads_from_any_sequence_number(workdir):
+    feed = ChangeFeed()
+    assert feed.last_seq() == 0
+    assert feed.read() == []
+
+    written = feed.append([{"op": "add", "id": number, "title": "é" * number}
+                           for number in range(5)])
+    written += feed.append([{"op": "delete", "id": 2}])
+    assert [event["seq"] for event in written] == [1, 2, 3, 4, 5, 6]
+    assert feed.last_seq() == 6
+
+    assert feed.read() == written
+    for since in range(7):
+        assert feed.read(since) == written[since:]
+        assert feed.read(since, limit=2) == written[since:since + 2]
+    assert feed.read(10) == []
+    for since, limit in ((-1, None), (0, -1)):
+        with pytest.raises(ValueError):
+            feed.read(since, limit)
+
+
+def test_feed_ignores_an_interrupted_write(workdir):
+    feed = ChangeFeed()
+    feed.append([{"op": "add", "id": 0}, {"op": "complete", "id": 0}])
+
+    # Bytes written without their index entry are not events, and the
+    # next event is written over them
+    with open(feed.path, "ab") as event_file:
+        event_file.write(b'{"seq": 3, "op": "del')
+    assert feed.read(1) == [{"seq": 2, "op": "complete", "id": 0}]
+    assert feed.append([{"op": "delete", "id": 0}]) == [
+        {"seq": 3, "op": "delete", "id": 0}]
+    with open(feed.path, encoding="utf-8") as event_file:
+        assert [json.loads(line)["seq"] for line in event_file] == [1, 2, 3]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_changes_from_every_store_reach_the_feed(workdir, kind):
+    task_store = load_store(kind)
+    received = []
+    task_store.subscribe(received.extend)
+    task_store.add("admin", "Write", "Report", datetime(2026, 11, 1),
+                   ASSIGNED)
+    task_store.complete(0)
+    assert [(event["seq"], event["op"]) for event in received] == \
+        [(1, "add"), (2, "complete")]
+    assert received[0]["title"] == "Write"
+
+    # Another store's changes are numbered after these, and reach the
+    # subscriber when this store catches up
+    other = load_store(kind)
+    other.reassign(0, "bob")
+    other.set_due_date(0, datetime(2027, 1, 1))
+    task_store.delete(0)
+    assert [(event["seq"], event["op"]) for event in received] == \
+        [(1, "add"), (2, "complete"), (3, "reassign"), (4, "set_due_date"),
+         (5, "delete")]
+    assert task_store.events(2) == received[2:] == other.events(2, 10)
+
+    # A late subscriber can start from an earlier sequence number
+    late = []
+    task_store.subscribe(late.extend, since=3)
+    assert late == received[3:]
+    task_store.close()
+    other.close()
+
+
+def test_events_command_prints_the_feed(workdir):
+    task_store = load_store("text")
+    for number in range(3):
+        task_store.add("admin", f"Task {number}", "", datetime(2026, 11, 1),
+                       ASSIGNED)
+    task_store.close()
+
+    result = subprocess.run([sys.executable, TASK_MANAGER, "events",
+                             "--since", "1", "--limit", "1"],
+                            capture_output=True, text=True)
+    assert result.returncode == 0
+    assert [json.loads(line) for line in result.stdout.splitlines()] == \
+        task_store.events(1, 1)
+
+    # A negative sequence number is refused rather than read
+    result = subprocess.run([sys.executable, TASK_MANAGER, "events",
+                             "--since", "-1"],
+                            capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "must not be negative" in result.stderr
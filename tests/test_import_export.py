@@ -0,0 +1,147 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import date, datetime
+
+import pytest
+
+from conftest import ASSIGNED, BACKENDS, NOW, make_backend, task_rows
+from task_engine import TaskStore
+
+TASK_MANAGER = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "task_manager.py")
+
+CSV_ROWS = (
+    "username,title,description,due_date,assigned_date,completed\n"
+    "admin,Write report,\"Figures, quarterly\",2026-11-01,2026-01-01,No\n"
+    "ghost,Unknown user,Nobody,2026-11-01,2026-01-01,No\n"
+    "admin,Bad date,Never,2026-13-01,2026-01-01,No\n"
+    "admin,Book room,For the review,2026-12-01,2026-01-02,yes\n")
+
+
+def run(*args, cwd=None):
+    return subprocess.run([sys.executable, TASK_MANAGER, *args], cwd=cwd,
+                          capture_output=True, text=True)
+
+
+def write_file(path, text):
+    with open(path, "w", encoding="utf-8", newline="") as out_file:
+        out_file.write(text)
+
+
+def read_file(path):
+    with open(path, encoding="utf-8", newline="") as in_file:
+        return in_file.read()
+
+
+def test_import_skips_bad_rows_and_keeps_the_rest(workdir):
+    write_file("tasks.csv", CSV_ROWS)
+    result = run("import", "tasks.csv")
+    assert result.returncode == 1
+    assert "Imported 2 tasks from tasks.csv, 2 rows skipped." in \
+        result.stdout
+    assert "Row 2: User ghost does not exist" in result.stderr
+    assert "Row 3: Invalid due date 2026-13-01" in result.stderr
+
+    result = run("export", "--format", "jsonl", "--output", "tasks.jsonl")
+    assert result.returncode == 0
+    assert [json.loads(line) for line in
+            read_file("tasks.jsonl").splitlines()] == [
+        {"id": 0, "username": "admin", "title": "Write report",
+         "description": "Figures, quarterly", "due_date": "2026-11-01",
+         "assigned_date": "2026-01-01", "completed": False},
+        {"id": 1, "username": "admin", "title": "Book room",
+         "description": "For the review", "due_date": "2026-12-01",
+         "assigned_date": "2026-01-02", "completed": True}]
+
+
+@pytest.mark.parametrize("storage", ("text", "binary", "sqlite"))
+def test_exported_tasks_import_unchanged(workdir, storage):
+    write_file("tasks.csv", CSV_ROWS)
+    run("--storage", storage, "import", "tasks.csv")
+    assert run("--storage", storage, "export", "--output",
+               "export.csv").returncode == 0
+
+    # Importing the export elsewhere gives back the same export
+    os.mkdir("copy")
+    assert run("import", os.path.join("..", "export.csv"),
+               cwd="copy").returncode == 0
+    run("export", "--output", "export.csv", cwd="copy")
+    assert read_file(os.path.join("copy", "export.csv")) == \
+        read_file("export.csv")
+    assert len(read_file("export.csv").splitlines()) == 3
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_separators_are_kept_out_of_text_files(workdir, kind):
+    task_store = TaskStore(make_backend(kind))
+    task_store.load()
+    row = {"username": "admin", "title": "Plan", "description": "a;b",
+           "due_date": "2026-11-01", "assigned_date": "2026-01-01",
+           "completed": False}
+    for title, description in (("a;b", ""), ("", "line\nbreak"),
+                               ("", "carriage\rreturn")):
+        if kind == "sqlite":
+            task_store.add("admin", title, description,
+                           datetime(2026, 11, 1), ASSIGNED)
+        else:
+            with pytest.raises(ValueError):
+                task_store.add("admin", title, description,
+                               datetime(2026, 11, 1), ASSIGNED)
+
+    task_ids, errors = task_store.add_many([row])
+    if kind == "sqlite":
+        assert (len(task_ids), errors) == (1, [])
+    else:
+        assert task_ids == [] and len(errors) == 1
+
+    # Whatever was accepted reads back unchanged
+    expected = task_rows(task_store)
+    task_store.close()
+    reloaded = TaskStore(make_backend(kind))
+    reloaded.load()
+    assert task_rows(reloaded) == expected
+    reloaded.close()
+
+
+def test_switching_storage_keeps_pending_changes(workdir):
+    write_file("tasks.csv", CSV_ROWS)
+    run("import", "tasks.csv")
+
+    # Leave a change in the text journal, then switch to binary storage
+    task_store = TaskStore(make_backend("text"))
+    task_store.load()
+    task_store.complete(0)
+    expected = task_rows(task_store)
+    assert os.path.getsize(task_store.backend.journal_path) > 0
+
+    assert run("--storage", "binary", "export", "--format", "text",
+               "--output", "binary.txt").returncode == 0
+    binary_store = TaskStore(make_backend("binary"))
+    binary_store.load()
+    assert task_rows(binary_store) == expected
+    assert binary_store.backend.journal_path != \
+        task_store.backend.journal_path
+
+    # Changes made through the binary backend stay out of the text files
+    binary_store.set_due_date(1, datetime(2027, 1, 1))
+    text_store = TaskStore(make_backend("text"))
+    text_store.load()
+    assert task_rows(text_store) == expected
+    binary_store.close()
+    task_store.close()
+
+
+def test_dates_without_a_time_are_taken_as_midnight(workdir):
+    task_store = TaskStore(make_backend("text"))
+    task_store.load()
+    task_store.add("admin", "Timed", "", datetime(2026, 10, 1), ASSIGNED)
+    task_ids, errors = task_store.add_many([
+        {"username": "admin", "title": "Plain", "description": "",
+         "due_date": date(2026, 9, 1), "assigned_date": date(2026, 1, 1)}])
+    assert (task_ids, errors) == ([1], [])
+    assert task_store.get(1).due_date == datetime(2026, 9, 1)
+    assert [task_id for task_id, _ in task_store.overdue(NOW)] == [1, 0]
+    assert task_store.counts(NOW)[0].overdue == 2
+    task_store.close()
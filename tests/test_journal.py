@@ -0,0 +1,147 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from conftest import ASSIGNED, BACKENDS, make_backend, task_rows
+from task_engine import ConflictError, TaskStore, count_task_database
+from task_storage import TaskArchive
+
+
+def make_changes(task_store):
+    # One of each kind of change, so that replaying the journal has to
+    # handle every record
+    for number in range(12):
+        task_store.add(("admin", "bob", "amy")[number % 3],
+                       f"Task {number}", f"Description {number}",
+                       datetime(2026, 1 + number % 9, 1 + number),
+                       ASSIGNED)
+    task_store.complete(1)
+    task_store.complete(4)
+    task_store.reassign(2, "amy")
+    task_store.set_due_date(3, datetime(2027, 2, 3))
+    task_store.delete(5)
+    task_store.add("bob", "Task 12", "Added after a delete",
+                   datetime(2026, 12, 24), ASSIGNED)
+    task_store.delete(9)
+    task_store.complete(12)
+
+
+def load_store(kind, **kwargs):
+    task_store = TaskStore(make_backend(kind, **kwargs),
+                           archive=TaskArchive())
+    task_store.load()
+    return task_store
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_replay_rebuilds_the_same_tasks(workdir, kind):
+    task_store = load_store(kind)
+    make_changes(task_store)
+    expected = task_rows(task_store)
+
+    # Loading replays the journal over the task file it was written for,
+    # which the changes have left as it was
+    replayed = load_store(kind)
+    assert task_rows(replayed) == expected
+    assert replayed.next_id == task_store.next_id == 13
+    assert len(replayed) == 11
+    task_store.close()
+    assert task_rows(load_store(kind)) == expected
+
+
+@pytest.mark.parametrize("kind", ("text", "binary"))
+def test_close_folds_the_journal_into_the_task_file(workdir, kind):
+    task_store = load_store(kind)
+    snapshot_size = os.path.getsize(task_store.backend.task_path)
+    make_changes(task_store)
+    expected = task_rows(task_store)
+    assert os.path.getsize(task_store.backend.task_path) == snapshot_size
+    journal_path = task_store.backend.journal_path
+    with open(journal_path, encoding="utf-8") as journal_file:
+        journal = journal_file.read()
+    assert len(journal.splitlines()) == 20
+
+    task_store.close()
+    assert os.path.getsize(journal_path) == 0
+    assert task_rows(load_store(kind)) == expected
+
+    # Replaying a journal already folded into the task file changes
+    # nothing
+    with open(journal_path, "w", encoding="utf-8") as journal_file:
+        journal_file.write(journal)
+    assert task_rows(load_store(kind)) == expected
+
+
+@pytest.mark.parametrize("kind", ("text", "binary"))
+def test_threshold_compaction_keeps_the_tasks(workdir, kind):
+    task_store = load_store(kind, compact_threshold=3)
+    make_changes(task_store)
+    expected = task_rows(task_store)
+
+    # 20 changes leave two records in the journal after six compactions
+    assert task_store.backend.journal_record_count == 2
+    assert task_rows(load_store(kind)) == expected
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_stores_sharing_files_see_each_others_changes(workdir, kind):
+    task_store = load_store(kind, compact_threshold=4)
+    make_changes(task_store)
+    expected = task_rows(task_store)
+
+    other = load_store(kind, compact_threshold=4)
+    assert task_rows(other) == expected
+    version = other.version(0)
+    other.complete(0, version=version)
+    expected[0] = expected[0][:5] + (True,)
+    other.add("bob", "Other", "Added by the other store",
+              datetime(2026, 3, 3), ASSIGNED)
+
+    # Another process's changes are picked up without reloading, and
+    # its IDs are not handed out again
+    assert task_store.refresh() == 2
+    expected[13] = task_rows(other)[13]
+    assert task_rows(task_store) == expected
+    assert task_store.add("amy", "Mine", "Added here",
+                          datetime(2026, 4, 4), ASSIGNED) == 14
+
+    # A change made against a stale version is refused
+    with pytest.raises(ConflictError):
+        other.reassign(0, "amy", version=version)
+    task_store.reassign(0, "amy", version=task_store.version(0))
+    other.refresh()
+    assert task_rows(other) == task_rows(task_store)
+    task_store.close()
+    other.close()
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_archived_tasks_leave_the_store(workdir, kind):
+    task_store = load_store(kind)
+    make_changes(task_store)
+    expected = task_rows(task_store)
+
+    assert task_store.archive_tasks(datetime(2026, 6, 1)) == 2
+    archived = {task_id: expected.pop(task_id) for task_id in (1, 4)}
+    assert task_rows(task_store) == expected
+    assert task_store.query()[0][0] == 0
+    assert [task_id for task_id, _ in task_store.query(offset=3, limit=3)] \
+        == sorted(expected)[3:6]
+    task_store.close()
+
+    reloaded = load_store(kind)
+    assert task_rows(reloaded) == expected
+    assert len(reloaded) == len(expected)
+    assert reloaded.counts(datetime(2026, 10, 15))[0].total == 11
+    if kind == "sqlite":
+        totals = reloaded.counts(datetime(2026, 10, 15))[0]
+        counted = count_task_database(reloaded.backend,
+                                      datetime(2026, 10, 15),
+                                      reloaded.archive)[0]
+        assert (counted.total, counted.completed, counted.overdue) == \
+            (totals.total, totals.completed, totals.overdue)
+    assert {task_id: (task.username, task.title, task.description,
+                      task.due_date, task.assigned_date, task.completed)
+            for task_id, task in reloaded.archive.read()} == archived
+    reloaded.close()
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from conftest import task_rows
+from task_engine import TaskStore
+from task_storage import Task, parse_date
+
+
+def test_parse_date_matches_strptime():
+    for date_str in ("2026-10-05", "1999-12-31", "2026-1-5"):
+        assert parse_date(date_str) == \
+            datetime.strptime(date_str, "%Y-%m-%d")
+
+
+def test_load_reads_the_original_file_format(workdir):
+    # The original program wrote no trailing newline, and a file edited
+    # on Windows may have CRLF line endings or blank lines
+    with open("tasks.txt", "w", encoding="utf-8", newline="") as task_file:
+        task_file.write("admin;Write report;Figures;2026-11-01;2026-01-01;"
+                        "No\r\n\nbob;Book room;Review;2026-12-01;2026-01-02;"
+                        "Yes")
+
+    task_store = TaskStore()
+    task_store.load()
+    assert task_rows(task_store) == {
+        0: ("admin", "Write report", "Figures", datetime(2026, 11, 1),
+            datetime(2026, 1, 1), False),
+        1: ("bob", "Book room", "Review", datetime(2026, 12, 1),
+            datetime(2026, 1, 2), True)}
+    assert task_store.load_stats.rows == 2
+
+
+def test_task_lines_round_trip():
+    task = Task("admin", "Write report", "Figures", datetime(2026, 11, 1),
+                datetime(2026, 1, 1), True)
+    assert not hasattr(task, "__dict__")
+    line = task.to_line()
+    assert line == "admin;Write report;Figures;2026-11-01;2026-01-01;Yes"
+    copy = Task.from_line(line)
+    assert (copy.username, copy.title, copy.description, copy.due_date,
+            copy.assigned_date, copy.completed) == \
+        (task.username, task.title, task.description, task.due_date,
+         task.assigned_date, task.completed)
@@ -0,0 +1,108 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import ASSIGNED, NOW
+from task_engine import TaskStore, count_task_file
+from task_storage import (TEXT_HEADER_PREFIX, BinaryBackend, Task,
+                          TaskArchive, TextBackend)
+
+USERNAMES = ("admin", "amy", "bob", "carl", "dana")
+
+
+def counts_key(counts):
+    totals, user_counts = counts
+    return ((totals.total, totals.completed, totals.uncompleted,
+             totals.overdue),
+            {username: (user.total, user.completed, user.uncompleted,
+                        user.overdue)
+             for username, user in user_counts.items() if user.total})
+
+
+def random_task(rng):
+    return Task(rng.choice(USERNAMES), "Title", "Description",
+                datetime(2026, 1, 1) + timedelta(days=rng.randrange(400)),
+                ASSIGNED, rng.random() < 0.4)
+
+
+def assert_counts_agree(task_store):
+    expected = counts_key(task_store.counts(NOW))
+    for workers in (1, 2, 3):
+        assert counts_key(count_task_file(task_store.backend, NOW, workers,
+                                          task_store.archive)) == expected
+
+
+def test_parallel_count_matches_serial_count(workdir):
+    rng = random.Random(17)
+    task_store = TaskStore(TextBackend(), archive=TaskArchive())
+    task_store.load()
+    for _ in range(500):
+        task = random_task(rng)
+        task_id = task_store.add(task.username, task.title,
+                                 task.description, task.due_date,
+                                 task.assigned_date)
+        if task.completed:
+            task_store.complete(task_id)
+    task_store.compact()
+    assert_counts_agree(task_store)
+
+    # Changes still in the journal are applied on top of the ranges
+    for task_id in rng.sample(range(500), 60):
+        if rng.random() < 0.5:
+            task_store.delete(task_id)
+        elif not task_store.get(task_id).completed:
+            task_store.complete(task_id)
+    task_store.reassign(next(task_id for task_id, _ in task_store.query()),
+                        "erin")
+    task_store.add("dana", "Late", "Added after compacting",
+                   datetime(2026, 2, 1), ASSIGNED)
+    assert_counts_agree(task_store)
+
+    # Archived tasks are counted from the archive summary
+    task_store.archive_tasks(datetime(2026, 6, 1))
+    assert_counts_agree(task_store)
+    task_store.close()
+
+
+def test_parallel_count_reads_files_without_ids(workdir):
+    rng = random.Random(3)
+    with open("tasks.txt", "w", encoding="utf-8") as task_file:
+        for _ in range(300):
+            task_file.write(random_task(rng).to_line() + "\n")
+
+    task_store = TaskStore(TextBackend())
+    task_store.load()
+    assert_counts_agree(task_store)
+
+    # Without IDs in the file, changed tasks are found by line number
+    for task_id in rng.sample(range(300), 40):
+        if rng.random() < 0.5:
+            task_store.delete(task_id)
+        else:
+            task_store.set_due_date(task_id, datetime(2027, 1, 1))
+    with open("tasks.txt", encoding="utf-8") as task_file:
+        assert not task_file.readline().startswith(TEXT_HEADER_PREFIX)
+    assert_counts_agree(task_store)
+    task_store.close()
+
+
+def test_only_text_files_are_counted(workdir):
+    with pytest.raises(ValueError):
+        count_task_file(BinaryBackend(), NOW)
+    with pytest.raises(ValueError):
+        count_task_file(TextBackend(), NOW, workers=0)
+
+
+def test_parallel_count_reads_files_with_crlf_line_endings(workdir):
+    rng = random.Random(5)
+    with open("tasks.txt", "w", encoding="utf-8", newline="\r\n") \
+            as task_file:
+        for _ in range(300):
+            task_file.write(random_task(rng).to_line() + "\n")
+
+    task_store = TaskStore(TextBackend())
+    task_store.load()
+    assert task_store.counts(NOW)[0].completed
+    assert_counts_agree(task_store)
+    task_store.close()
@@ -0,0 +1,54 @@
+import os
+import pstats
+import subprocess
+import sys
+
+TASK_MANAGER = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "task_manager.py")
+
+CSV_ROWS = (
+    "username,title,description,due_date,assigned_date,completed\n"
+    "admin,Write report,Figures,2026-11-01,2026-01-01,No\n"
+    "admin,Book room,For the review,2026-12-01,2026-01-02,Yes\n")
+
+
+def run(*args, **env):
+    return subprocess.run([sys.executable, TASK_MANAGER, *args],
+                          capture_output=True, text=True,
+                          env={**os.environ, **env})
+
+
+def summary_rows(stderr):
+    lines = stderr.splitlines()
+    start = next(number for number, line in enumerate(lines)
+                 if line.startswith("Profile "))
+    return {line[:24].strip(): line[24:].split()
+            for line in lines[start + 1:]}
+
+
+def test_profile_summary_counts_calls_and_bytes(workdir):
+    with open("tasks.csv", "w", encoding="utf-8") as csv_file:
+        csv_file.write(CSV_ROWS)
+    assert "Profile " not in run("import", "tasks.csv").stderr
+    assert "Profile " not in run("export", "--output", "out.csv",
+                                 TASK_MANAGER_PROFILE="0").stderr
+    assert "Profile " in run("export", "--output", "out.csv",
+                             TASK_MANAGER_PROFILE="TRUE").stderr
+
+    result = run("import", "tasks.csv", TASK_MANAGER_PROFILE="1")
+    assert result.returncode == 0
+    rows = summary_rows(result.stderr)
+    assert rows["add tasks"][0] == "1"
+
+    # The second import wrote half the change feed, which is counted
+    # together with its journal append
+    with open("tasks_events.txt", "rb") as event_file:
+        feed_size = len(event_file.read()) // 2
+    assert int(rows["add tasks"][3].replace(",", "")) > feed_size
+    assert rows["load tasks"][0] == "1"
+
+    result = run("--profile-output", "reports.pstats", "reports")
+    rows = summary_rows(result.stderr)
+    assert rows["generate reports"][0] == "1"
+    assert rows["write report"][0] == "2"
+    assert pstats.Stats("reports.pstats").total_calls > 0
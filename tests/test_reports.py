@@ -0,0 +1,164 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from conftest import ASSIGNED, NOW, make_backend
+from task_engine import (ReportCache, TaskStore, UserStore,
+                         count_task_database, count_task_file, gen_reports,
+                         gen_task_overview, gen_user_overview)
+
+REPORT_PATHS = ("task_overview.txt", "user_overview.txt")
+
+# The reports for the tasks added by `make_store`, exactly as the
+# original per-user report loops wrote them
+TASK_OVERVIEW = (
+    "TASK OVERVIEW\n2026-10-15 09:30\n_____________\n"
+    "\nTotal number of tasks = 6"
+    "\nTotal number of completed tasks = 2 (33.3%)"
+    "\nTotal number of uncompleted tasks = 4 (66.7%)"
+    "\nTotal number of overdue tasks = 3 (50.0%)")
+USER_OVERVIEW = (
+    "USER OVERVIEW\n2026-10-15 09:30\n_____________\n"
+    "\nTotal number of users = 4"
+    "\nTotal number of tasks = 6"
+    "\n\n> admin"
+    "\nNumber of tasks assigned: 3 (50.0%)"
+    "\nNumber of assigned tasks completed: 1 (33.3%)"
+    "\nNumber of assigned tasks uncompleted: 2 (66.7%)"
+    "\nNumber of assigned tasks overdue: 2 (66.7%)"
+    "\n\n> amy"
+    "\nNumber of tasks assigned: 1 (16.7%)"
+    "\nNumber of assigned tasks completed: 0 (0.0%)"
+    "\nNumber of assigned tasks uncompleted: 1 (100.0%)"
+    "\nNumber of assigned tasks overdue: 1 (100.0%)"
+    "\n\n> bob"
+    "\nNumber of tasks assigned: 2 (33.3%)"
+    "\nNumber of assigned tasks completed: 1 (50.0%)"
+    "\nNumber of assigned tasks uncompleted: 1 (50.0%)"
+    "\nNumber of assigned tasks overdue: 0 (0.0%)"
+    "\n\n> zoe"
+    "\nNumber of tasks assigned: 0 (0.0%)"
+    "\nNumber of assigned tasks completed: 0 (0.0%)"
+    "\nNumber of assigned tasks uncompleted: 0 (0.0%)"
+    "\nNumber of assigned tasks overdue: 0 (0.0%)")
+
+
+def make_store(kind):
+    backend = make_backend(kind)
+    user_store = UserStore(backend)
+    user_store.load()
+    for username in ("bob", "amy", "zoe"):
+        user_store.add(username, "password")
+
+    task_store = TaskStore(backend, users=user_store)
+    task_store.load()
+    for username, due_date, completed in (
+            ("admin", datetime(2026, 10, 1), False),
+            ("admin", datetime(2026, 11, 1), True),
+            ("admin", datetime(2026, 10, 15), False),
+            ("bob", datetime(2026, 12, 1), False),
+            ("bob", datetime(2026, 9, 1), True),
+            ("amy", datetime(2026, 1, 1), False)):
+        task_id = task_store.add(username, "Title", "Description", due_date,
+                                 ASSIGNED)
+        if completed:
+            task_store.complete(task_id)
+    return task_store, user_store
+
+
+def read_reports(paths):
+    contents = []
+    for path in paths:
+        with open(path, encoding="utf-8") as report_file:
+            contents.append(report_file.read())
+    return contents
+
+
+@pytest.mark.parametrize("kind", ("text", "sqlite"))
+def test_reports_match_the_original_format(workdir, kind):
+    task_store, user_store = make_store(kind)
+    assert gen_reports(task_store, user_store, now=NOW) == REPORT_PATHS
+    assert read_reports(REPORT_PATHS) == [TASK_OVERVIEW, USER_OVERVIEW]
+
+    # Counting without loading the tasks gives the same reports
+    if kind == "text":
+        counts = count_task_file(task_store.backend, NOW, workers=2)
+    else:
+        counts = count_task_database(task_store.backend, NOW)
+    gen_reports(None, user_store, now=NOW, counts=counts)
+    assert read_reports(REPORT_PATHS) == [TASK_OVERVIEW, USER_OVERVIEW]
+    task_store.close()
+
+
+def test_each_report_matches_on_its_own(workdir):
+    task_store, user_store = make_store("text")
+    gen_task_overview(task_store, "tasks.out", now=NOW)
+    gen_user_overview(task_store, user_store, "users.out", now=NOW)
+    assert read_reports(("tasks.out", "users.out")) == \
+        [TASK_OVERVIEW, USER_OVERVIEW]
+
+
+def test_cached_reports_match_fresh_reports(workdir):
+    task_store, user_store = make_store("text")
+    cache = ReportCache()
+    gen_reports(task_store, user_store, now=NOW, cache=cache)
+    assert read_reports(REPORT_PATHS) == [TASK_OVERVIEW, USER_OVERVIEW]
+
+    # Sections are worked out again when a user's task is completed, and
+    # when one of their tasks falls due between two reports
+    task_store.complete(0)
+    for now in (NOW, datetime(2026, 12, 2, 9, 30)):
+        gen_reports(task_store, user_store, now=now, cache=cache)
+        cached = read_reports(REPORT_PATHS)
+        gen_reports(task_store, user_store, now=now)
+        assert cached == read_reports(REPORT_PATHS)
+    assert "> admin\nNumber of tasks assigned: 3 (50.0%)\n" \
+        "Number of assigned tasks completed: 2 (66.7%)" in cached[1]
+    assert "> bob\nNumber of tasks assigned: 2 (33.3%)\n" \
+        "Number of assigned tasks completed: 1 (50.0%)\n" \
+        "Number of assigned tasks uncompleted: 1 (50.0%)\n" \
+        "Number of assigned tasks overdue: 1 (50.0%)" in cached[1]
+    task_store.close()
+
+
+def test_reports_in_other_formats_hold_the_same_counts(workdir):
+    task_store, user_store = make_store("text")
+    paths = gen_reports(task_store, user_store, now=NOW, file_format="json",
+                        usernames=["bob", "amy"])
+    assert paths == ("task_overview.json", "user_overview.json")
+    task_report, user_report = map(json.loads, read_reports(paths))
+    assert (task_report["tasks"], task_report["completed"],
+            task_report["overdue"], task_report["percent_overdue"]) == \
+        (6, 2, 3, 50.0)
+    assert user_report["total_users"] == 4
+    assert [(user["username"], user["tasks"], user["completed"],
+             user["overdue"]) for user in user_report["users"]] == \
+        [("amy", 1, 0, 1), ("bob", 2, 1, 0)]
+
+    paths = gen_reports(task_store, user_store, now=NOW, file_format="csv")
+    with open(paths[1], encoding="utf-8", newline="") as report_file:
+        rows = list(csv.DictReader(report_file))
+    assert [(row["username"], row["tasks"], row["percent_assigned"])
+            for row in rows] == [("admin", "3", "50.0"), ("amy", "1", "16.7"),
+                                 ("bob", "2", "33.3"), ("zoe", "0", "0.0")]
+
+    # Only the finished reports are left behind
+    assert sorted(name for name in os.listdir()
+                  if "overview" in name) == sorted(
+        f"{report}_overview.{extension}" for report in ("task", "user")
+        for extension in ("csv", "json"))
+    task_store.close()
+
+
+def test_unknown_users_leave_both_reports_as_they_were(workdir):
+    task_store, user_store = make_store("text")
+    gen_reports(task_store, user_store, now=NOW)
+    task_store.complete(0)
+    with pytest.raises(ValueError):
+        gen_reports(task_store, user_store, now=NOW,
+                    usernames=["admin", "ghost"])
+    assert read_reports(REPORT_PATHS) == [TASK_OVERVIEW, USER_OVERVIEW]
+    task_store.close()
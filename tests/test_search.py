@@ -0,0 +1,81 @@
+import re
+from datetime import datetime
+
+import pytest
+
+from conftest import ASSIGNED, BACKENDS, make_backend
+from task_engine import TaskStore
+
+TASKS = (
+    ("admin", "Monthly report", "Figures for the monthly review"),
+    ("bob", "Send invoices", "Invoice every client by Friday"),
+    ("amy", "Report bug", "The invoice report crashes"),
+    ("bob", "Book room", "Quarterly review, room 2"),
+    ("amy", "Café menu", "Order from the CAFÉ"),
+    ("admin", "Invoice run", "Monthly invoicing"),
+)
+
+QUERIES = ("report", "Monthly report", "invoice*", "invoice",
+           "review OR café", "report AND invoice", "room 2", "nothing",
+           "mon* OR book", "")
+
+
+def matches(query, task):
+    # Check every task's words one by one, as a scan would
+    words = re.findall(r"\w+", f"{task.title} {task.description}".lower())
+    alternatives = [[]]
+    for term in query.split():
+        if term == "OR":
+            alternatives.append([])
+        elif term != "AND":
+            alternatives[-1].append(term.lower())
+    return any(alternative and all(
+        any(word.startswith(term[:-1]) if term.endswith("*")
+            else word == term for word in words)
+        for term in alternative) for alternative in alternatives)
+
+
+def expected_ids(task_store, query, username=None):
+    return [task_id for task_id, task in enumerate(task_store.tasks)
+            if matches(query, task) and
+            (username is None or task.username == username)]
+
+
+def load_store(kind):
+    task_store = TaskStore(make_backend(kind))
+    task_store.load()
+    return task_store
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_search_matches_a_scan(workdir, kind):
+    task_store = load_store(kind)
+    for username, title, description in TASKS:
+        task_store.add(username, title, description, datetime(2026, 11, 1),
+                       ASSIGNED)
+
+    def check():
+        for query in QUERIES:
+            for username in (None, "bob", "amy"):
+                total, tasks = task_store.search(query, username)
+                task_ids = expected_ids(task_store, query, username)
+                assert [task_id for task_id, _ in tasks] == task_ids
+                assert total == len(task_ids)
+
+    check()
+    assert task_store.search("invoice*", offset=1, limit=2) == (3, [
+        (task_id, task_store.tasks[task_id]) for task_id in (2, 5)])
+    assert task_store.search("report", completed=True)[0] == 0
+
+    # The index follows changes made after it was built, here and in
+    # another store sharing the files
+    task_store.add("amy", "Monthly invoices", "Report them", datetime(
+        2026, 12, 1), ASSIGNED)
+    task_store.reassign(0, "bob")
+    other = load_store(kind)
+    other.add("bob", "Room report", "Second floor", datetime(2026, 12, 1),
+              ASSIGNED)
+    other.close()
+    task_store.refresh()
+    check()
+    task_store.close()
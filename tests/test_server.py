@@ -0,0 +1,358 @@
+import asyncio
+import base64
+import http.client
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+from conftest import ASSIGNED, BACKENDS, make_backend, task_rows
+from task_engine import PasswordHasher, TaskStore, UserStore
+from task_server import TaskServer
+from task_storage import ChangeFeed
+
+ADMIN = ("admin", "password")
+BOB = ("bob", "hunter2")
+
+
+class Client:
+    """
+    The class `Client` sends requests to a running server over one
+    keep-alive connection.
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.connection = http.client.HTTPConnection("127.0.0.1", port)
+
+    def request(self, method, path, auth=ADMIN, data=None):
+        headers = {}
+        if auth is not None:
+            headers["Authorization"] = "Basic " + base64.b64encode(
+                ":".join(auth).encode("utf-8")).decode("ascii")
+        body = None if data is None else json.dumps(data)
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+
+def load_stores(kind):
+    backend = make_backend(kind)
+    user_store = UserStore(backend, PasswordHasher.from_spec(
+        "scrypt:n=16,r=1,p=1"))
+    user_store.load()
+    task_store = TaskStore(backend, users=user_store, feed=ChangeFeed())
+    task_store.load()
+    return task_store, user_store
+
+
+def run_server(task_store, user_store, client):
+    """
+    The function `run_server` serves the stores on a free port while
+    `client` is called with a `Client` in another thread.
+    """
+
+    async def main():
+        server = TaskServer(task_store, user_store)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        serving = asyncio.create_task(server.serve(port=port))
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.01)
+        try:
+            return server, await asyncio.to_thread(client, Client(port))
+        finally:
+            server.stop()
+            await serving
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_server_round_trip(workdir, kind):
+    task_store, user_store = load_stores(kind)
+
+    def client(client):
+        assert client.request("GET", "/tasks", auth=None)[0] == 401
+        assert client.request("GET", "/tasks",
+                              auth=("admin", "wrong"))[0] == 401
+        assert client.request("POST", "/users", data={
+            "username": "bob", "password": "hunter2"}) == \
+            (201, {"username": "bob"})
+        for username in ("a;b", "x\ny"):
+            assert client.request("POST", "/users", data={
+                "username": username, "password": "secret"})[0] == 400
+        assert client.request("GET", "/users", auth=BOB) == \
+            (200, {"users": ["admin", "bob"]})
+
+        status, task = client.request("POST", "/tasks", data={
+            "username": "bob", "title": "Write", "description": "Report",
+            "due_date": "2026-11-01"})
+        assert status == 201
+        assert task == {"id": 0, "username": "bob", "title": "Write",
+                        "description": "Report",
+                        "due_date": "2026-11-01",
+                        "assigned_date": task["assigned_date"],
+                        "completed": False, "version": 0}
+        assert client.request("GET", "/tasks/0", auth=BOB) == (200, task)
+
+        # Changes are checked against the version the client read
+        status, task = client.request("PATCH", "/tasks/0", auth=BOB, data={
+            "due_date": "2026-12-01", "version": 0})
+        assert (status, task["due_date"], task["version"]) == \
+            (200, "2026-12-01", 1)
+        assert client.request("PATCH", "/tasks/0", auth=BOB, data={
+            "due_date": "2027-01-01", "version": 0})[0] == 409
+        status, task = client.request("POST", "/tasks/0/complete",
+                                      auth=BOB, data={"version": 1})
+        assert (status, task["completed"]) == (200, True)
+        assert client.request("PATCH", "/tasks/0", data={
+            "username": "admin"})[0] == 409
+
+        status, result = client.request(
+            "GET", "/tasks?username=bob&completed=yes")
+        assert (status, [task["id"] for task in result["tasks"]]) == \
+            (200, [0])
+        status, result = client.request("GET", "/search?q=writ*+report")
+        assert (status, result["total"], result["tasks"][0]["id"]) == \
+            (200, 1, 0)
+        assert client.request("GET", "/search?q=report&completed=no")[1] \
+            == {"total": 0, "tasks": []}
+        assert client.request("GET", "/stats", auth=BOB)[0] == 403
+        assert client.request("GET", "/stats") == (200, {
+            "users": 2, "tasks": 1, "completed": 1, "uncompleted": 0,
+            "overdue": 0})
+
+        assert client.request("POST", "/tasks", data={
+            "username": "bob", "title": "Late", "description": "",
+            "due_date": "2026-13-01"})[0] == 400
+        assert client.request("POST", "/tasks", data={
+            "username": "ghost", "title": "Lost", "description": "",
+            "due_date": "2026-11-01"})[0] == 400
+        assert client.request("GET", "/tasks/9")[0] == 404
+
+        # Deleting a task leaves the IDs of the others as they were
+        status, task = client.request("POST", "/tasks", data={
+            "username": "admin", "title": "Spare", "description": "",
+            "due_date": "2026-11-01"})
+        assert (status, task["id"]) == (201, 1)
+
+        # Only the task's owner and admin can read or change it
+        for method, path in (("GET", "/tasks/1"), ("DELETE", "/tasks/1"),
+                             ("PATCH", "/tasks/1"),
+                             ("POST", "/tasks/1/complete")):
+            assert client.request(method, path, auth=BOB, data={})[0] == 403
+        assert client.request("GET", "/tasks/0")[0] == 200
+        assert client.request("DELETE", "/tasks/1") == \
+            (200, {"id": 1, "deleted": True})
+        assert client.request("GET", "/tasks/1")[0] == 404
+        assert client.request("GET", "/tasks/0")[0] == 200
+
+        # The change feed is read a page at a time
+        status, result = client.request("GET", "/events?since=1&limit=2")
+        assert (status, [(event["seq"], event["op"])
+                         for event in result["events"]], result["next"]) \
+            == (200, [(2, "set_due_date"), (3, "complete")], 3)
+        assert client.request("GET", "/events?since=6")[1] == \
+            {"events": [], "next": 6}
+        assert client.request("GET", "/events?since=-1")[0] == 400
+        assert client.request("DELETE", "/users")[0] == 405
+        return client.request("GET", "/tasks")[1]["tasks"]
+
+    _, tasks = run_server(task_store, user_store, client)
+    task_store.close()
+
+    # Every answered change was written
+    reloaded, users = load_stores(kind)
+    assert [(task["id"], task["username"], task["title"],
+             task["description"], task["due_date"], task["assigned_date"],
+             task["completed"]) for task in tasks] == \
+        [(task_id, task.username, task.title, task.description,
+          task.due_date.strftime("%Y-%m-%d"),
+          task.assigned_date.strftime("%Y-%m-%d"), task.completed)
+         for task_id, task in enumerate(reloaded.tasks)
+         if task is not None]
+    assert users.check_password(*BOB)
+    reloaded.close()
+
+
+def test_concurrent_changes_are_written_in_batches(workdir):
+    task_store, user_store = load_stores("text")
+
+    def add_tasks(port):
+        client = Client(port)
+        for number in range(10):
+            assert client.request("POST", "/tasks", data={
+                "username": "admin", "title": f"Task {number}",
+                "description": "", "due_date": "2026-11-01"})[0] == 201
+
+    def client(client):
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(add_tasks, [client.port] * 8))
+
+    server, _ = run_server(task_store, user_store, client)
+    assert server.changes == 80
+    assert 1 <= server.batches <= 80
+    assert len(task_store) == 80
+    assert sorted({task.title for task in task_store.tasks}) == \
+        [f"Task {number}" for number in range(10)]
+    task_store.close()
+
+
+@pytest.mark.parametrize("kind", ("text", "binary"))
+def test_batch_appends_the_journal_once(workdir, kind):
+    task_store, _ = load_stores(kind)
+    journal_path = task_store.backend.journal_path
+    with task_store.batch():
+        for number in range(3):
+            task_store.add("admin", f"Task {number}", "Batched",
+                           datetime(2026, 11, 1), ASSIGNED)
+        assert not os.path.exists(journal_path) or \
+            os.path.getsize(journal_path) == 0
+    with open(journal_path, encoding="utf-8") as journal_file:
+        assert len(journal_file.read().splitlines()) == 3
+    expected = task_rows(task_store)
+    task_store.close()
+    assert task_rows(load_stores(kind)[0]) == expected
+
+
+def test_writer_carries_on_after_a_failed_batch(workdir):
+    task_store, user_store = load_stores("text")
+    batch = task_store.batch
+    failures = [RuntimeError("Disk gone")]
+
+    @contextmanager
+    def failing_batch():
+        if failures:
+            raise failures.pop()
+        with batch():
+            yield
+
+    task_store.batch = failing_batch
+    data = {"username": "admin", "title": "Write", "description": "",
+            "due_date": "2026-11-01"}
+
+    def client(client):
+        assert client.request("POST", "/tasks", data=data) == \
+            (500, {"error": "Disk gone"})
+        assert client.request("POST", "/tasks", data=data)[0] == 201
+
+    run_server(task_store, user_store, client)
+    assert len(task_store) == 1
+    task_store.close()
+
+
+def test_changes_which_cannot_be_written_are_not_served(workdir):
+    task_store, user_store = load_stores("text")
+    append_journal_records = task_store.backend._append_journal_records
+    failures = [OSError("No space left on device")]
+
+    # Fail the write of the batch, once its records have been collected
+    def failing_append(records):
+        if failures and task_store.backend._batch is None:
+            raise failures.pop()
+        append_journal_records(records)
+
+    task_store.backend._append_journal_records = failing_append
+    data = {"username": "admin", "title": "Write", "description": "",
+            "due_date": "2026-11-01"}
+
+    def client(client):
+        assert client.request("POST", "/tasks", data=data) == \
+            (500, {"error": "No space left on device"})
+        assert client.request("GET", "/tasks") == (200, {"tasks": []})
+        assert client.request("GET", "/events") == \
+            (200, {"events": [], "next": 0})
+
+        status, task = client.request("POST", "/tasks", data=data)
+        assert (status, task["id"]) == (201, 0)
+        assert [event["seq"] for event in
+                client.request("GET", "/events")[1]["events"]] == [1]
+
+    run_server(task_store, user_store, client)
+    task_store.close()
+    assert [(task_id, task.title) for task_id, task in
+            enumerate(load_stores("text")[0].tasks)] == [(0, "Write")]
+
+
+def test_password_checks_do_not_hold_up_other_requests(workdir):
+    task_store, user_store = load_stores("text")
+    user_store.add(*BOB)
+    verify = user_store.hasher.verify
+    started, release = threading.Event(), threading.Event()
+
+    def slow_verify(password, password_hash):
+        started.set()
+        assert release.wait(5)
+        return verify(password, password_hash)
+
+    def check_bob(port):
+        return Client(port).request("GET", "/tasks", auth=BOB)[0]
+
+    def client(client):
+        assert client.request("GET", "/tasks")[0] == 200
+        user_store.hasher.verify = slow_verify
+        with ThreadPoolExecutor(1) as executor:
+            checking = executor.submit(check_bob, client.port)
+            assert started.wait(5)
+
+            # A password already checked is served while bob's is hashed
+            assert client.request("GET", "/tasks")[0] == 200
+            release.set()
+            assert checking.result() == 200
+        assert client.request("GET", "/tasks", auth=("bob", "wrong"))[0] == \
+            401
+
+    run_server(task_store, user_store, client)
+    task_store.close()
+
+
+def test_users_only_see_their_own_tasks(workdir):
+    task_store, user_store = load_stores("text")
+    user_store.add(*BOB)
+    for username, title in (("admin", "Audit"), ("bob", "Write"),
+                            ("admin", "Hand over")):
+        task_store.add(username, title, "Report", datetime(2026, 1, 1),
+                       ASSIGNED)
+    task_store.reassign(2, "bob")
+
+    def ids(result):
+        return [task["id"] for task in result["tasks"]]
+
+    def client(client):
+        assert ids(client.request("GET", "/tasks")[1]) == [0, 1, 2]
+        assert ids(client.request("GET", "/tasks", auth=BOB)[1]) == [1, 2]
+        assert ids(client.request("GET", "/tasks?username=bob",
+                                  auth=BOB)[1]) == [1, 2]
+        assert ids(client.request("GET", "/search?q=report",
+                                  auth=BOB)[1]) == [1, 2]
+        assert [task["id"] for task in client.request(
+            "GET", "/due", auth=BOB)[1]["overdue"]] == [1, 2]
+        for path in ("/tasks?username=admin", "/search?q=report&"
+                     "username=admin", "/due?username=admin"):
+            assert client.request("GET", path, auth=BOB)[0] == 403
+
+        # Events of other users' tasks are left out, but paging carries
+        # on after them; bob sees the reassignment of a task to him
+        status, result = client.request("GET", "/events?limit=3",
+                                        auth=BOB)
+        assert (status, [event["seq"] for event in result["events"]],
+                result["next"]) == (200, [2], 3)
+        assert [(event["seq"], event["op"]) for event in client.request(
+            "GET", "/events?since=3", auth=BOB)[1]["events"]] == \
+            [(4, "reassign")]
+        assert len(client.request("GET", "/events")[1]["events"]) == 4
+
+    run_server(task_store, user_store, client)
+    task_store.close()
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from conftest import ASSIGNED, make_backend, task_rows
+from task_engine import TaskStore
+from task_storage import (SnapshotTasks, Task, export_text, import_text,
+                          write_snapshot, write_text_tasks)
+
+TASKS = [
+    Task("admin", "Write report", "Quarterly figures", datetime(2026, 11, 1),
+         ASSIGNED),
+    Task("bøb", "Réserver la salle", "", datetime(2026, 12, 1),
+         datetime(2026, 2, 3), True),
+    Task("admin", "", "Longer description " * 20, datetime(2027, 1, 2),
+         ASSIGNED)]
+
+
+def fields(task):
+    return (task.username, task.title, task.description, task.due_date,
+            task.assigned_date, task.completed)
+
+
+def test_snapshot_tasks_are_decoded_lazily(workdir):
+    write_snapshot("tasks.bin", TASKS)
+    tasks = SnapshotTasks("tasks.bin")
+    assert len(tasks) == 3
+
+    # Indexing reads the fixed-width table without decoding any task
+    assert list(tasks.index_rows()) == [
+        (task.username, task.due_date, task.completed) for task in TASKS]
+    assert not any(isinstance(task, Task) for task in tasks._tasks)
+
+    assert fields(tasks[1]) == fields(TASKS[1])
+    assert not isinstance(tasks._tasks[0], Task)
+    assert not isinstance(tasks._tasks[2], Task)
+    assert [fields(task) for task in tasks] == [fields(task)
+                                                for task in TASKS]
+
+    # Appended tasks are held alongside the mapped ones
+    tasks.append(Task("amy", "New", "Task", datetime(2026, 5, 5),
+                      ASSIGNED))
+    assert len(tasks) == 4
+    assert list(tasks.index_rows())[3] == ("amy", datetime(2026, 5, 5),
+                                           False)
+
+
+def test_text_and_snapshot_convert_both_ways(workdir):
+    write_text_tasks("tasks.txt", TASKS)
+    with open("tasks.txt", encoding="utf-8") as task_file:
+        text = task_file.read()
+
+    import_text("tasks.txt", "tasks.bin")
+    assert [fields(task) for task in SnapshotTasks("tasks.bin")] == \
+        [fields(task) for task in TASKS]
+    export_text("tasks.bin", "copy.txt")
+    with open("copy.txt", encoding="utf-8") as task_file:
+        assert task_file.read() == text
+
+
+def test_deleted_tasks_keep_their_ids(workdir):
+    tasks = [TASKS[0], None, TASKS[2]]
+    write_snapshot("tasks.bin", tasks)
+    snapshot = SnapshotTasks("tasks.bin")
+    assert list(snapshot.index_rows())[1] is None
+    assert [task and fields(task) for task in snapshot] == \
+        [task and fields(task) for task in tasks]
+
+    # The text file records the IDs too
+    export_text("tasks.bin", "tasks.txt")
+    import_text("tasks.txt", "copy.bin")
+    assert [task and fields(task) for task in SnapshotTasks("copy.bin")] == \
+        [task and fields(task) for task in tasks]
+
+
+def test_compaction_maps_the_new_snapshot(workdir):
+    task_store = TaskStore(make_backend("binary", compact_threshold=3))
+    task_store.load()
+    for task in TASKS:
+        task_store.add(task.username, task.title, task.description,
+                       task.due_date, task.assigned_date)
+    task_store.complete(1)
+    tasks = task_store.tasks
+
+    # The tasks written by the compaction are read from the new
+    # snapshot, rather than kept decoded; only the task completed since
+    # has been decoded again
+    assert task_store.backend.journal_record_count == 1
+    assert task_store.tasks is tasks
+    assert len(tasks) == 3
+    assert [isinstance(task, Task) for task in tasks._tasks] == \
+        [False, True, False]
+    assert [fields(task) for task in tasks] == \
+        [fields(TASKS[0]), fields(TASKS[1])[:5] + (True,), fields(TASKS[2])]
+
+    # Changes after a compaction in the same batch are kept too
+    with task_store.batch():
+        for number in range(5):
+            task_store.add("admin", f"Task {number}", "Batched",
+                           datetime(2026, 11, 1), ASSIGNED)
+            task_store.complete(number + 3)
+    expected = task_rows(task_store)
+    task_store.close()
+    reloaded = TaskStore(make_backend("binary"))
+    reloaded.load()
+    assert task_rows(reloaded) == expected
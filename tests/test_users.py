@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import ASSIGNED, BACKENDS, make_backend
+from task_engine import PasswordHasher, TaskStore, UserStore
+
+# Cheap cost parameters keep the tests fast
+FAST_SCRYPT = "scrypt:n=16,r=1,p=1"
+FAST_PBKDF2 = "pbkdf2:iterations=10"
+
+
+def load_users(kind, spec=FAST_SCRYPT):
+    user_store = UserStore(make_backend(kind),
+                           hasher=PasswordHasher.from_spec(spec))
+    user_store.load()
+    return user_store
+
+
+@pytest.mark.parametrize("spec", (FAST_SCRYPT, FAST_PBKDF2))
+def test_hashes_are_salted_and_checked(spec):
+    hasher = PasswordHasher.from_spec(spec)
+    first = hasher.hash("secret")
+    second = hasher.hash("secret")
+    assert first != second
+    assert "secret" not in first
+    assert hasher.verify("secret", first) and hasher.verify("secret", second)
+    assert not hasher.verify("Secret", first)
+    assert not hasher.needs_rehash(first)
+
+
+def test_unknown_hash_settings_are_rejected():
+    with pytest.raises(ValueError):
+        PasswordHasher("md5")
+    with pytest.raises(ValueError):
+        PasswordHasher.from_spec("scrypt:m=4")
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_passwords_are_checked_after_reloading(workdir, kind):
+    user_store = load_users(kind)
+    user_store.add("bob", "hunter2")
+    assert user_store.check_password("bob", "hunter2")
+    assert user_store.check_password("bob", "hunter2")
+    assert not user_store.check_password("bob", "hunter3")
+    assert not user_store.check_password("nobody", "hunter2")
+
+    reloaded = load_users(kind)
+    assert PasswordHasher.is_hash(reloaded.username_password["bob"])
+    assert reloaded.check_password("bob", "hunter2")
+    assert reloaded.check_password("admin", "password")
+    assert not reloaded.check_password("admin", "hunter2")
+
+
+def test_plain_text_passwords_are_hashed_on_load(workdir):
+    with open("user.txt", "w", encoding="utf-8") as user_file:
+        user_file.write("admin;password\nbob;hunter2")
+
+    user_store = load_users("text")
+    with open("user.txt", encoding="utf-8") as user_file:
+        saved = dict(line.split(";") for line in user_file.read().split("\n"))
+    assert saved == user_store.username_password
+    assert all(PasswordHasher.is_hash(password)
+               for password in saved.values())
+    assert load_users("text").check_password("bob", "hunter2")
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_old_hashes_are_upgraded_on_login(workdir, kind):
+    load_users(kind, FAST_PBKDF2).add("bob", "hunter2")
+
+    user_store = load_users(kind)
+    assert user_store.username_password["bob"].startswith("pbkdf2$")
+    assert not user_store.check_password("bob", "wrong")
+    assert user_store.username_password["bob"].startswith("pbkdf2$")
+    assert user_store.check_password("bob", "hunter2")
+    assert user_store.username_password["bob"].startswith("scrypt$16$")
+
+    # The upgraded hash is the one saved
+    reloaded = load_users(kind)
+    assert reloaded.username_password == user_store.username_password
+    assert reloaded.check_password("bob", "hunter2")
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_usernames_which_cannot_be_stored_are_rejected(workdir, kind):
+    user_store = load_users(kind)
+    task_store = TaskStore(user_store.backend, users=user_store)
+    task_store.load()
+    task_id = task_store.add("admin", "Title", "Description",
+                             datetime(2026, 11, 1), ASSIGNED)
+
+    for username in ("", "a;b", "x\ny", "x\r"):
+        with pytest.raises(ValueError):
+            user_store.add(username, "password")
+        with pytest.raises(ValueError):
+            task_store.add(username, "Title", "Description",
+                           datetime(2026, 11, 1), ASSIGNED)
+        with pytest.raises(ValueError):
+            task_store.reassign(task_id, username)
+
+    # Nothing was written for them
+    assert list(load_users(kind)) == ["admin"]
+    assert task_store.get(task_id).username == "admin"
+    assert len(task_store) == 1
+    task_store.close()